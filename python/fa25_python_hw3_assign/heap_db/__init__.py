@@ -0,0 +1,3 @@
+from .csv_loader import load_csv, load_csv_parallel
+
+__all__ = ["load_csv", "load_csv_parallel"]
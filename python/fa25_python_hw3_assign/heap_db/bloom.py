@@ -0,0 +1,118 @@
+"""
+bloom.py: Bloom filters for skipping lookups of values that are not there.
+
+    bloom = BloomFilter(capacity=10000, fp_rate=0.01)
+    bloom.add("Comp. Sci.")
+    "Comp. Sci." in bloom       # True
+    "History" in bloom          # False, or True for about 1% of absent values
+
+A filter answers "definitely absent" or "maybe present" in k bit probes, with
+no false negatives. Up to `capacity` values the false positive rate stays near
+`fp_rate`; past it the rate climbs, so owners rebuild a full filter larger.
+Removing values is not supported; a removed value only costs false positives.
+
+Values are hashed deterministically (INTs by value, VARCHARs by CRC-32 of their
+UTF-8 bytes), not with hash(), which is salted per process for strings. So a
+filter can be saved to a file or sent to another process.
+"""
+
+import math
+import zlib
+from typing import Any, Iterable
+
+DEFAULT_FP_RATE = 0.01
+
+_MASK32 = (1 << 32) - 1
+_MASK64 = (1 << 64) - 1
+
+
+def _hash64(value: Any) -> int:
+    if isinstance(value, str):
+        h = zlib.crc32(value.encode("utf-8")) | (1 << 32)  # kept apart from the INT with the same bits
+    elif isinstance(value, int):
+        h = value & _MASK64
+    elif value is None:
+        h = 1 << 33
+    elif isinstance(value, float) and value.is_integer():
+        h = int(value) & _MASK64  # 5.0 == 5, so it must land on the same bits
+    else:
+        h = zlib.crc32(repr(value).encode("utf-8")) | (1 << 34)
+    # splitmix64 finalizer, as in statistics.py
+    z = (h + 0x9E3779B97F4A7C15) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter using double hashing (bit i = h1 + i * h2 mod m)."""
+
+    __slots__ = ("bits", "num_bits", "num_hashes", "capacity", "count")
+
+    def __init__(self, capacity: int, fp_rate: float = DEFAULT_FP_RATE):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1.")
+        if not 0 < fp_rate < 1:
+            raise ValueError("fp_rate must be between 0 and 1.")
+        ln2 = math.log(2)
+        num_bits = max(64, math.ceil(-capacity * math.log(fp_rate) / (ln2 * ln2)))
+        self.num_bits = (num_bits + 7) // 8 * 8
+        self.num_hashes = max(1, round(self.num_bits / capacity * ln2))
+        self.bits = bytearray(self.num_bits // 8)
+        self.capacity = capacity
+        self.count = 0
+
+    @classmethod
+    def of(cls, values: Iterable[Any], capacity: int, fp_rate: float = DEFAULT_FP_RATE) -> "BloomFilter":
+        """Return a filter sized for `capacity` values holding `values`."""
+        bloom = cls(capacity, fp_rate)
+        bloom.add_all(values)
+        return bloom
+
+    def add(self, value: Any) -> None:
+        h = _hash64(value)
+        h1, h2 = h & _MASK32, (h >> 32) | 1
+        bits, m = self.bits, self.num_bits
+        for i in range(self.num_hashes):
+            p = (h1 + i * h2) % m
+            bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def add_all(self, values: Iterable[Any]) -> None:
+        for value in values:
+            self.add(value)
+
+    def might_contain(self, value: Any) -> bool:
+        """False means `value` was never added; True means it probably was."""
+        h = _hash64(value)
+        h1, h2 = h & _MASK32, (h >> 32) | 1
+        bits, m = self.bits, self.num_bits
+        for i in range(self.num_hashes):
+            p = (h1 + i * h2) % m
+            if not bits[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+    __contains__ = might_contain
+
+    def is_full(self) -> bool:
+        """True once more values were added than the filter was sized for."""
+        return self.count > self.capacity
+
+    def to_bytes(self) -> bytes:
+        """Serialize as capacity <I | count <I | num_hashes <B | bit array."""
+        return (self.capacity.to_bytes(4, "little") + self.count.to_bytes(4, "little")
+                + bytes([self.num_hashes]) + bytes(self.bits))
+
+    @classmethod
+    def from_bytes(cls, data: Any) -> "BloomFilter":
+        bloom = cls.__new__(cls)
+        bloom.capacity = int.from_bytes(data[0:4], "little")
+        bloom.count = int.from_bytes(data[4:8], "little")
+        bloom.num_hashes = data[8]
+        bloom.bits = bytearray(data[9:])
+        bloom.num_bits = len(bloom.bits) * 8
+        return bloom
+
+    def __repr__(self) -> str:
+        return f"BloomFilter(capacity={self.capacity}, bits={self.num_bits}, hashes={self.num_hashes}, count={self.count})"
@@ -0,0 +1,206 @@
+"""
+btree.py: an in-memory B+tree used for ordered secondary indexes.
+
+Each distinct key maps to a posting list of values (row references), so the
+tree works for non-unique columns. Leaves are chained left to right, which
+makes range scans a walk along the leaf level.
+
+    tree = BPlusTree()
+    tree.insert("Comp. Sci.", row1)
+    tree.insert("Comp. Sci.", row2)
+    tree.search("Comp. Sci.")            # [row1, row2]
+    list(tree.range("A", "D"))           # [(key, value), ...] in key order
+
+NULL (None) keys are kept apart from the tree: `search(None)` returns them,
+but range scans never do (NULL compares false against everything in SQL).
+
+Deletes remove entries without rebalancing. Leaves may become underfull, but
+the tree stays correct and lookups stay logarithmic in the number of inserts.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterator, List, Optional, Tuple
+
+DEFAULT_ORDER = 64
+
+
+class _Leaf:
+    __slots__ = ("keys", "postings", "next")
+
+    def __init__(self):
+        self.keys: List[Any] = []
+        self.postings: List[List[Any]] = []
+        self.next: Optional["_Leaf"] = None
+
+
+class _Internal:
+    __slots__ = ("keys", "children")
+
+    def __init__(self):
+        # children[i] holds keys < keys[i]; children[-1] holds the rest
+        self.keys: List[Any] = []
+        self.children: List[Any] = []
+
+
+class BPlusTree:
+    """Ordered multimap from key to values with O(log n) lookups and ordered range scans."""
+
+    def __init__(self, order: int = DEFAULT_ORDER):
+        if order < 3:
+            raise ValueError("B+tree order must be >= 3.")
+        self.order = order
+        self.root: Any = _Leaf()
+        self.nulls: List[Any] = []
+        self.entries = 0
+
+    def __len__(self) -> int:
+        """Return the number of (key, value) entries, including NULL keys."""
+        return self.entries
+
+    # ----- lookup -----
+
+    def _find_leaf(self, key: Any) -> _Leaf:
+        node = self.root
+        while isinstance(node, _Internal):
+            node = node.children[bisect_right(node.keys, key)]
+        return node
+
+    def _first_leaf(self) -> _Leaf:
+        node = self.root
+        while isinstance(node, _Internal):
+            node = node.children[0]
+        return node
+
+    def search(self, key: Any) -> List[Any]:
+        """Return the values stored under `key`, in insertion order."""
+        if key is None:
+            return list(self.nulls)
+        leaf = self._find_leaf(key)
+        i = bisect_left(leaf.keys, key)
+        if i < len(leaf.keys) and leaf.keys[i] == key:
+            return list(leaf.postings[i])
+        return []
+
+    def range(self, low: Any = None, high: Any = None,
+              low_inclusive: bool = True, high_inclusive: bool = True) -> Iterator[Tuple[Any, Any]]:
+        """
+        Yield (key, value) pairs with low <= key <= high in key order.
+        A bound of None means unbounded on that side.
+        """
+        if low is None:
+            leaf: Optional[_Leaf] = self._first_leaf()
+            i = 0
+        else:
+            leaf = self._find_leaf(low)
+            i = bisect_left(leaf.keys, low) if low_inclusive else bisect_right(leaf.keys, low)
+
+        while leaf is not None:
+            while i < len(leaf.keys):
+                key = leaf.keys[i]
+                if high is not None and (key > high or (key == high and not high_inclusive)):
+                    return
+                for value in leaf.postings[i]:
+                    yield key, value
+                i += 1
+            leaf = leaf.next
+            i = 0
+
+    def keys(self) -> Iterator[Any]:
+        """Yield the distinct non-NULL keys in order."""
+        leaf: Optional[_Leaf] = self._first_leaf()
+        while leaf is not None:
+            yield from leaf.keys
+            leaf = leaf.next
+
+    def count(self, key: Any) -> int:
+        """Return the number of values stored under `key`."""
+        if key is None:
+            return len(self.nulls)
+        leaf = self._find_leaf(key)
+        i = bisect_left(leaf.keys, key)
+        return len(leaf.postings[i]) if i < len(leaf.keys) and leaf.keys[i] == key else 0
+
+    # ----- modification -----
+
+    def insert(self, key: Any, value: Any) -> None:
+        """Add `value` under `key` (duplicates allowed)."""
+        self.entries += 1
+        if key is None:
+            self.nulls.append(value)
+            return
+        split = self._insert(self.root, key, value)
+        if split is not None:
+            sep, right = split
+            new_root = _Internal()
+            new_root.keys = [sep]
+            new_root.children = [self.root, right]
+            self.root = new_root
+
+    def _insert(self, node: Any, key: Any, value: Any) -> Optional[Tuple[Any, Any]]:
+        if isinstance(node, _Leaf):
+            i = bisect_left(node.keys, key)
+            if i < len(node.keys) and node.keys[i] == key:
+                node.postings[i].append(value)
+                return None
+            node.keys.insert(i, key)
+            node.postings.insert(i, [value])
+            if len(node.keys) < self.order:
+                return None
+            return self._split_leaf(node)
+
+        i = bisect_right(node.keys, key)
+        split = self._insert(node.children[i], key, value)
+        if split is None:
+            return None
+        sep, right = split
+        node.keys.insert(i, sep)
+        node.children.insert(i + 1, right)
+        if len(node.keys) < self.order:
+            return None
+        return self._split_internal(node)
+
+    @staticmethod
+    def _split_leaf(leaf: _Leaf) -> Tuple[Any, _Leaf]:
+        mid = len(leaf.keys) // 2
+        right = _Leaf()
+        right.keys, leaf.keys = leaf.keys[mid:], leaf.keys[:mid]
+        right.postings, leaf.postings = leaf.postings[mid:], leaf.postings[:mid]
+        right.next, leaf.next = leaf.next, right
+        return right.keys[0], right
+
+    @staticmethod
+    def _split_internal(node: _Internal) -> Tuple[Any, _Internal]:
+        mid = len(node.keys) // 2
+        sep = node.keys[mid]
+        right = _Internal()
+        right.keys, node.keys = node.keys[mid + 1:], node.keys[:mid]
+        right.children, node.children = node.children[mid + 1:], node.children[:mid + 1]
+        return sep, right
+
+    def remove(self, key: Any, value: Any) -> bool:
+        """
+        Remove one occurrence of `value` under `key`.
+        Values are matched by identity first, then by equality.
+        :return: True if an entry was removed
+        """
+        if key is None:
+            postings = self.nulls
+        else:
+            leaf = self._find_leaf(key)
+            i = bisect_left(leaf.keys, key)
+            if i >= len(leaf.keys) or leaf.keys[i] != key:
+                return False
+            postings = leaf.postings[i]
+
+        pos = next((j for j, v in enumerate(postings) if v is value), -1)
+        if pos == -1:
+            pos = next((j for j, v in enumerate(postings) if v == value), -1)
+        if pos == -1:
+            return False
+
+        del postings[pos]
+        self.entries -= 1
+        if key is not None and not postings:
+            del leaf.keys[i]
+            del leaf.postings[i]
+        return True
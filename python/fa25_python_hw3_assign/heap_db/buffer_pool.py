@@ -0,0 +1,228 @@
+"""
+buffer_pool.py: a bounded cache of disk pages shared by all file-backed tables.
+
+Pages are identified by (source, page_no), where `source` is any object that can
+move whole pages to and from disk:
+
+    source.read_page(page_no) -> bytearray
+    source.write_page(page_no, data) -> None
+
+Callers pin a page while they use it and unpin it when done, saying whether they
+modified it. Unpinned pages stay cached until the pool needs room, at which point
+the least recently used unpinned page is evicted (written back first if dirty).
+The pool is thread-safe: one lock covers its bookkeeping and write-backs, but
+a page is read from its source outside the lock, so threads that miss on
+different pages wait on the disk together. Threads that miss on a page that
+is already being read wait for that read instead of issuing their own.
+
+    pool = BufferPool(memory_budget=4 * 1024 * 1024)
+    with pool.page(table, 3) as data:            # read-only access
+        ...
+    with pool.page(table, 3, dirty=True) as data:  # modify in place
+        ...
+"""
+
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+DEFAULT_MEMORY_BUDGET = 8 * 1024 * 1024  # 8 MiB
+
+
+@dataclass
+class BufferPoolStats:
+    """Counters describing how well the pool is serving requests."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    writes: int = 0
+
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class _Frame:
+    __slots__ = ("data", "pin_count", "dirty")
+
+    def __init__(self, data: bytearray):
+        self.data = data
+        self.pin_count = 0
+        self.dirty = False
+
+
+class BufferPool:
+    """LRU buffer pool with pin counts, dirty tracking and a byte budget."""
+
+    def __init__(self, memory_budget: int = DEFAULT_MEMORY_BUDGET):
+        if memory_budget <= 0:
+            raise ValueError("memory_budget must be > 0.")
+        self.memory_budget = memory_budget
+        self.used_bytes = 0
+        self.stats = BufferPoolStats()
+        # Ordered from least to most recently used.
+        self._frames: "OrderedDict[Tuple[Any, int], _Frame]" = OrderedDict()
+        # reentrant: a write-back may call into the table, which may log or fetch
+        self._lock = threading.RLock()
+        # Pages being read from their source right now, and the signal that one has arrived.
+        self._loading: Set[Tuple[Any, int]] = set()
+        self._loaded = threading.Condition(self._lock)
+
+    # ----- pinning -----
+
+    def fetch_page(self, source: Any, page_no: int) -> bytearray:
+        """
+        Pin the page and return its buffer, reading it from `source` on a miss.
+        Every fetch must be matched by an `unpin_page`.
+        """
+        key = (source, page_no)
+        with self._lock:
+            while key in self._loading:
+                self._loaded.wait()
+            frame = self._frames.get(key)
+            if frame is not None:
+                self.stats.hits += 1
+                self._frames.move_to_end(key)
+                frame.pin_count += 1
+                return frame.data
+            self.stats.misses += 1
+            self._loading.add(key)
+
+        try:
+            data = source.read_page(page_no)  # without the lock, so other pages can be read meanwhile
+            with self._lock:
+                frame = self._admit(key, data)
+                frame.pin_count += 1
+                return frame.data
+        finally:
+            with self._lock:
+                self._loading.discard(key)
+                self._loaded.notify_all()
+
+    def new_page(self, source: Any, page_no: int, data: bytearray) -> bytearray:
+        """
+        Register a freshly created page without reading it from disk.
+        The page is returned pinned and marked dirty.
+        """
+        with self._lock:
+            key = (source, page_no)
+            if key in self._frames:
+                raise ValueError(f"Page {page_no} is already cached.")
+            frame = self._admit(key, data)
+            frame.pin_count += 1
+            frame.dirty = True
+            return frame.data
+
+    def unpin_page(self, source: Any, page_no: int, dirty: bool = False) -> None:
+        """Release one pin on the page, marking it dirty if the caller modified it."""
+        with self._lock:
+            frame = self._frames.get((source, page_no))
+            if frame is None or frame.pin_count == 0:
+                raise ValueError(f"Page {page_no} is not pinned.")
+            frame.pin_count -= 1
+            frame.dirty = frame.dirty or dirty
+
+    @contextmanager
+    def page(self, source: Any, page_no: int, dirty: bool = False) -> Iterator[bytearray]:
+        """Context manager that pins the page for the duration of the block."""
+        data = self.fetch_page(source, page_no)
+        try:
+            yield data
+        finally:
+            self.unpin_page(source, page_no, dirty)
+
+    # ----- write-back -----
+
+    def flush_page(self, source: Any, page_no: int) -> None:
+        """Write the page back to `source` if it is cached and dirty."""
+        with self._lock:
+            frame = self._frames.get((source, page_no))
+            if frame is not None and frame.dirty:
+                self._write_back(source, page_no, frame)
+
+    def flush_file(self, source: Any) -> None:
+        """Write back every dirty page belonging to `source`, in page order."""
+        with self._lock:
+            for (owner, page_no), frame in sorted(self._items_for(source), key=lambda item: item[0][1]):
+                if frame.dirty:
+                    self._write_back(owner, page_no, frame)
+
+    def drop_file(self, source: Any) -> None:
+        """Flush and forget every page of `source` (used when a table is closed)."""
+        with self._lock:
+            self.flush_file(source)
+            for key, frame in self._items_for(source):
+                if frame.pin_count:
+                    raise ValueError(f"Page {key[1]} is still pinned.")
+                del self._frames[key]
+                self.used_bytes -= len(frame.data)
+
+    def flush_all(self) -> None:
+        """Write back every dirty page in the pool."""
+        with self._lock:
+            for (source, page_no), frame in list(self._frames.items()):
+                if frame.dirty:
+                    self._write_back(source, page_no, frame)
+
+    def cached_pages(self, source: Optional[Any] = None) -> int:
+        """Return how many pages are cached, optionally only those of `source`."""
+        with self._lock:
+            if source is None:
+                return len(self._frames)
+            return len(self._items_for(source))
+
+    def reset_stats(self) -> None:
+        self.stats = BufferPoolStats()
+
+    # ----- internals -----
+
+    def _items_for(self, source: Any):
+        return [(key, frame) for key, frame in self._frames.items() if key[0] is source]
+
+    def _write_back(self, source: Any, page_no: int, frame: _Frame) -> None:
+        source.write_page(page_no, frame.data)
+        frame.dirty = False
+        self.stats.writes += 1
+
+    def _admit(self, key: Tuple[Any, int], data: bytearray) -> _Frame:
+        self._make_room(len(data))
+        frame = _Frame(data)
+        self._frames[key] = frame
+        self.used_bytes += len(data)
+        return frame
+
+    def _make_room(self, needed: int) -> None:
+        """Evict least recently used unpinned pages until `needed` bytes fit the budget."""
+        if self.used_bytes + needed <= self.memory_budget:
+            return
+        for key in list(self._frames):
+            frame = self._frames[key]
+            if frame.pin_count:
+                continue
+            if frame.dirty:
+                self._write_back(key[0], key[1], frame)
+            del self._frames[key]
+            self.used_bytes -= len(frame.data)
+            self.stats.evictions += 1
+            if self.used_bytes + needed <= self.memory_budget:
+                return
+        raise RuntimeError("Buffer pool exhausted: every cached page is pinned.")
+
+
+_default_pool: Optional[BufferPool] = None
+
+
+def get_buffer_pool() -> BufferPool:
+    """Return the process-wide pool shared by tables that are not given their own."""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = BufferPool()
+    return _default_pool
+
+
+def set_buffer_pool(pool: BufferPool) -> None:
+    """Replace the process-wide pool (e.g. to change its memory budget)."""
+    global _default_pool
+    _default_pool = pool
@@ -79,15 +79,16 @@ class TypeVarchar:
         return 2  
 
     # "<I" → unsigned int, explicit little-endian, standard size, no alignment/padding.
-    def read_value(self, buffer: memoryview) -> str:
-        if len(buffer) < 4:
+    def read_value(self, buf: memoryview, offset: int) -> tuple[str, int]:
+        if offset + 4 > len(buf):
             raise ValueError("Not enough bytes to read length")
-        strlen = unpack_from("<I", buffer, 0)[0]
+        (strlen,) = unpack_from("<I", buf, offset)
         if strlen > self.max_size:
             raise ValueError(f"Length {strlen} exceeds max {self.max_size}")
-        if 4 + strlen > len(buffer):
+        start = offset + 4
+        if start + strlen > len(buf):
             raise ValueError("Buffer does not contain full string payload")
-        return buffer[4:4+strlen].tobytes().decode("utf-8")
+        return bytes(buf[start:start + strlen]).decode("utf-8"), start + strlen
 
     def write_value(self, value: Any, buffer: bytearray) -> None:
         if not isinstance(value, str):
@@ -0,0 +1,362 @@
+"""
+columnar_table.py: an in-memory table that stores each column separately.
+
+`Table` keeps one DbTuple (a Python list plus boxed values) per row. A
+ColumnarTable instead keeps:
+
+- INT columns in an `array('i')` (4 bytes per value, NULLs tracked in a
+  bytearray that is only allocated once a NULL shows up)
+- VARCHAR columns as one UTF-8 byte buffer plus an `array('q')` of end offsets
+
+DbTuple objects are only built when a caller asks for rows, and
+`column_values` / `scan_columns` let a scan read just the columns it needs.
+`scan` evaluates its predicate on a lazy ColumnRowView, so filtering reads
+only the columns the predicate uses and builds DbTuples only for matches.
+The public API matches `Table`.
+"""
+
+from array import array
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from .schema import Schema
+from .db_tuple import DbTuple
+from .column_types import TypeInt, TypeVarchar
+from .btree import BPlusTree
+from .table import Table
+from .tuple_view import ColumnRowView
+
+
+class _IntColumn:
+    __slots__ = ("values", "nulls")
+
+    def __init__(self):
+        self.values = array("i")
+        self.nulls: Optional[bytearray] = None
+
+    def append(self, value: Any) -> None:
+        if value is None:
+            if self.nulls is None:
+                self.nulls = bytearray(len(self.values))
+            self.nulls.append(1)
+            self.values.append(0)
+            return
+        if self.nulls is not None:
+            self.nulls.append(0)
+        self.values.append(value)
+
+    def get(self, row_id: int) -> Any:
+        if self.nulls is not None and self.nulls[row_id]:
+            return None
+        return self.values[row_id]
+
+    __getitem__ = get  # read through ColumnRowView
+
+    def __iter__(self) -> Iterator[Any]:
+        if self.nulls is None:
+            return iter(self.values)
+        return (None if null else v for v, null in zip(self.values, self.nulls))
+
+    def nbytes(self) -> int:
+        return self.values.itemsize * len(self.values) + (len(self.nulls) if self.nulls is not None else 0)
+
+
+class _VarcharColumn:
+    __slots__ = ("data", "ends")
+
+    def __init__(self):
+        self.data = bytearray()
+        self.ends = array("q")
+
+    def append(self, value: str) -> None:
+        self.data += value.encode("utf-8")
+        self.ends.append(len(self.data))
+
+    def get(self, row_id: int) -> str:
+        start = self.ends[row_id - 1] if row_id else 0
+        return self.data[start:self.ends[row_id]].decode("utf-8")
+
+    __getitem__ = get
+
+    def __iter__(self) -> Iterator[str]:
+        data = self.data
+        start = 0
+        for end in self.ends:
+            yield data[start:end].decode("utf-8")
+            start = end
+
+    def nbytes(self) -> int:
+        return len(self.data) + self.ends.itemsize * len(self.ends)
+
+
+class ColumnarTable:
+    """Column-oriented in-memory table with the same API as `Table`."""
+
+    def __init__(self, schema: Schema):
+        """
+        Initialize an empty table with a given schema.
+        """
+        self.schema = schema
+        self._columns = self._new_columns()
+        # One byte per row id; 1 marks a deleted row. Row ids are positions in the column arrays.
+        self._deleted = bytearray()
+        self._deleted_count = 0
+        self._key_column = -1 if schema.get_key() is None else schema.get_column_index(schema.get_key())
+        self._key_index: Dict[Any, int] = {}
+        self._indexes: Dict[str, Tuple[int, BPlusTree]] = {}
+        self.statistics: Optional[Any] = None
+        # Bumped by every insert and delete, so copies shipped to worker processes can tell they are stale.
+        self._changes = 0
+
+    def _new_columns(self) -> List[Any]:
+        columns: List[Any] = []
+        for i in range(self.schema.size()):
+            col_type = self.schema.get_type(i)
+            if isinstance(col_type, TypeInt):
+                columns.append(_IntColumn())
+            elif isinstance(col_type, TypeVarchar):
+                columns.append(_VarcharColumn())
+            else:
+                raise ValueError(f"Unsupported column type {col_type!r}.")
+        return columns
+
+    # ----- row materialization -----
+
+    def _row(self, row_id: int) -> DbTuple:
+        return DbTuple.from_trusted_values(self.schema, [column.get(row_id) for column in self._columns])
+
+    def _live_ids(self) -> Iterator[int]:
+        if self._deleted_count == 0:
+            return iter(range(len(self._deleted)))
+        return (i for i, dead in enumerate(self._deleted) if not dead)
+
+    # ----- Table API -----
+
+    def get_schema(self) -> Schema:
+        """Return the schema of the table."""
+        return self.schema
+
+    def size(self) -> int:
+        """Return the number of db tuples (rows) in the table."""
+        return len(self._deleted) - self._deleted_count
+
+    def close(self) -> None:
+        """Nothing to release for an in-memory table."""
+        pass
+
+    def analyze(self, sample_size: Optional[int] = None) -> Any:
+        """Compute per-column statistics, keep them in self.statistics and return them."""
+        from .statistics import DEFAULT_SAMPLE_SIZE, analyze  # local import: statistics imports the planner
+        self.statistics = analyze(self, sample_size or DEFAULT_SAMPLE_SIZE)
+        return self.statistics
+
+    def insert(self, rec: DbTuple) -> bool:
+        """
+        Insert a db tuple into the table.
+        :return: True if insert succeeds, False if key already exists
+        """
+        if rec.get_schema() is not self.schema:
+            raise ValueError("Error: db tuple schema object does not match table schema (must reuse the same Schema instance).")
+        return self._append(rec.values)
+
+    def insert_many(self, rows: Iterable[DbTuple]) -> int:
+        """
+        Insert many db tuples (duplicates of an existing key are skipped).
+        :return: the number of db tuples inserted
+        """
+        inserted = 0
+        for rec in rows:
+            if rec.schema is not self.schema:
+                raise ValueError("Error: db tuple schema object does not match table schema (must reuse the same Schema instance).")
+            inserted += self._append(rec.values)
+        return inserted
+
+    def _append(self, values: Sequence[Any]) -> bool:
+        row_id = len(self._deleted)
+        if self._key_column >= 0:
+            key = values[self._key_column]
+            if key in self._key_index:
+                return False
+            self._key_index[key] = row_id
+
+        for column, value in zip(self._columns, values):
+            column.append(value)
+        self._deleted.append(0)
+        for col_index, tree in self._indexes.values():
+            tree.insert(values[col_index], row_id)
+        self._changes += 1
+        return True
+
+    def delete(self, key: object) -> bool:
+        """
+        Delete a db tuple given the primary key value.
+        :return: True if deletion succeeds, False if key not found
+        """
+        if self.schema.key is None:
+            raise ValueError("Error: table does not have a primary key. Cannot delete.")
+
+        row_id = self._key_index.pop(key, None)
+        if row_id is None:
+            return False
+
+        for col_index, tree in self._indexes.values():
+            tree.remove(self._columns[col_index].get(row_id), row_id)
+        self._deleted[row_id] = 1
+        self._deleted_count += 1
+        self._changes += 1
+        if self._deleted_count > 32 and self._deleted_count * 2 > len(self._deleted):
+            self._compact()
+        return True
+
+    def _compact(self) -> None:
+        """Rebuild the column arrays without deleted rows and renumber the indexes."""
+        live = [[column.get(i) for column in self._columns] for i in self._live_ids()]
+        indexed = list(self._indexes)
+        self._columns = self._new_columns()
+        self._deleted = bytearray()
+        self._deleted_count = 0
+        self._key_index = {}
+        self._indexes = {}
+        for values in live:
+            self._append(values)
+        for colname in indexed:
+            self.create_index(colname)
+
+    def lookup_by_key(self, key: object) -> Optional[DbTuple]:
+        """
+        Return the db tuple with the given primary key value, or None if no such db tuple exists.
+        """
+        if self.schema.key is None:
+            raise ValueError("Error: table does not have a primary key. Cannot lookup.")
+
+        row_id = self._key_index.get(key)
+        return None if row_id is None else self._row(row_id)
+
+    def lookup_by_column(self, colname: str, value: object) -> Table:
+        """
+        Return an in-memory Table holding the db tuples that satisfy colname=value.
+        Without an index only the `colname` column is scanned; matching rows are
+        materialized afterwards.
+        """
+        col_index = self.schema.get_column_index(colname)
+        if col_index < 0:
+            raise ValueError(f"Error: table does not contain column '{colname}'.")
+
+        if col_index == self._key_column:
+            row_id = self._key_index.get(value)
+            row_ids: Sequence[int] = [] if row_id is None else [row_id]
+        elif colname in self._indexes:
+            row_ids = self._index_ids(colname, value)
+        else:
+            deleted = self._deleted
+            row_ids = [i for i, v in enumerate(self._columns[col_index]) if v == value and not deleted[i]]
+
+        result_table = Table(self.schema)
+        for row_id in row_ids:
+            result_table.insert(self._row(row_id))
+        return result_table
+
+    def create_index(self, colname: str) -> None:
+        """Build an ordered B+tree secondary index (value -> row id) on `colname`."""
+        col_index = self.schema.get_column_index(colname)
+        if col_index < 0:
+            raise ValueError(f"Error: table does not contain column '{colname}'.")
+        if colname in self._indexes:
+            return
+
+        tree = BPlusTree()
+        column = self._columns[col_index]
+        for row_id in self._live_ids():
+            tree.insert(column.get(row_id), row_id)
+        self._indexes[colname] = (col_index, tree)
+
+    def has_index(self, colname: str) -> bool:
+        """Return True if a secondary index exists on `colname`."""
+        return colname in self._indexes
+
+    def _index_ids(self, colname: str, value: object) -> List[int]:
+        try:
+            return self._indexes[colname][1].search(value)
+        except TypeError:
+            return []
+
+    def index_lookup(self, colname: str, value: object) -> Optional[List[DbTuple]]:
+        """
+        Return the db tuples with colname == value using the secondary index,
+        or None if `colname` is not indexed.
+        """
+        if colname not in self._indexes:
+            return None
+        return [self._row(row_id) for row_id in self._index_ids(colname, value)]
+
+    def index_range(self, colname: str, low: Any = None, high: Any = None,
+                    low_inclusive: bool = True, high_inclusive: bool = True) -> Optional[List[DbTuple]]:
+        """
+        Return the db tuples with low <= colname <= high (None bounds are open)
+        in column order using the secondary index, or None if `colname` is not indexed.
+        """
+        if colname not in self._indexes:
+            return None
+        try:
+            row_ids = [row_id for _, row_id in self._indexes[colname][1].range(low, high, low_inclusive, high_inclusive)]
+        except TypeError:
+            return []
+        return [self._row(row_id) for row_id in row_ids]
+
+    # ----- column access -----
+
+    def column_values(self, colname: str) -> Iterator[Any]:
+        """Yield the values of one column for every live row, without building DbTuples."""
+        col_index = self.schema.get_column_index(colname)
+        if col_index < 0:
+            raise ValueError(f"Error: table does not contain column '{colname}'.")
+        column = self._columns[col_index]
+        if self._deleted_count == 0:
+            return iter(column)
+        return (v for v, dead in zip(column, self._deleted) if not dead)
+
+    def scan_columns(self, colnames: Sequence[str],
+                     predicate: Optional[Callable[[Any], bool]] = None) -> Iterator[Tuple[Any, ...]]:
+        """
+        Yield one tuple per live row holding only the requested columns, in
+        `colnames` order. With `predicate`, only rows satisfying it are yielded;
+        it is evaluated on ColumnRowViews, so it reads only the columns it uses.
+        """
+        if predicate is None:
+            return zip(*[self.column_values(name) for name in colnames])
+        columns = []
+        for name in colnames:
+            col_index = self.schema.get_column_index(name)
+            if col_index < 0:
+                raise ValueError(f"Error: table does not contain column '{name}'.")
+            columns.append(self._columns[col_index])
+        return (tuple(column.get(row_id) for column in columns) for row_id in self._matching_ids(predicate))
+
+    def _matching_ids(self, predicate: Callable[[Any], bool]) -> Iterator[int]:
+        schema = self.schema
+        columns = self._columns
+        return (row_id for row_id in self._live_ids() if predicate(ColumnRowView(schema, columns, row_id)))
+
+    def memory_bytes(self) -> int:
+        """Return the bytes held by the column buffers (excluding indexes)."""
+        return sum(column.nbytes() for column in self._columns) + len(self._deleted)
+
+    def scan(self, predicate: Optional[Callable[[DbTuple], bool]] = None) -> Iterator[DbTuple]:
+        """
+        Yield the db tuples that satisfy `predicate` (every db tuple if None).
+        """
+        if predicate is None:
+            return iter(self)
+        return (self._row(row_id) for row_id in self._matching_ids(predicate))
+
+    def __iter__(self) -> Iterator[DbTuple]:
+        """
+        Return an iterator over the table's db tuples, built one row at a time.
+        """
+        return (self._row(row_id) for row_id in self._live_ids())
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the table.
+        """
+        if self.size() == 0:
+            return "Empty Table"
+        return "\n".join(str(t) for t in self)
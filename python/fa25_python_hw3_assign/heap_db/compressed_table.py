@@ -0,0 +1,559 @@
+"""
+compressed_table.py: an append-only table file whose pages are stored column by column, compressed.
+
+File layout (all integers little-endian):
+
+    header            magic "HDZ2" | schema_len <I | Schema.serialize() bytes
+                      | bloom_count <H | column index <H per Bloom-filtered column
+    page, page, ...   body_len <I | row_count <I | body
+
+    page body         column offsets, <I per column, then the offset of the
+                      filters, all from the start of the body
+                      | one column block per column (see page_encoding.py)
+                      | per Bloom-filtered column: length <I | BloomFilter.to_bytes()
+
+Inserted rows collect in an open page in memory. When it holds ROWS_PER_PAGE
+rows, or on flush/close, the page is sealed: each column is encoded with
+whichever of dictionary, run-length or bit-packed encoding comes out smallest
+for the values in that page, and the page is appended to the file. Sealed
+pages are never rewritten, so the table supports inserts but not deletes.
+A page left half-written by a crash is ignored when the file is reopened, as
+the write-ahead log ignores a torn final record, and the handle's first new
+page is written over it. Only a handle that writes cuts the torn bytes off:
+a reader may be looking at a page that a writer is still appending.
+
+For low-cardinality strings and small INTs, such as most census columns, the
+file is many times smaller than a heap file and a scan reads that much less.
+`scan_columns` decodes only the columns it is asked for, and a filtered scan
+decodes a page's other columns only if some row of the page matches.
+
+Each page also carries a Bloom filter (see bloom.py) per filtered column, the
+primary key by default. The filters are loaded when the table is opened, so
+lookup_by_key and lookup_by_column read and decode only the pages whose filter
+may hold the value, and a value no filter holds costs no read at all.
+
+    table = CompressedTable("census.tblz", schema)
+    load_csv("census.csv", table=table)
+    table.close()
+    ages = CompressedTable("census.tblz").column_values("age")
+"""
+
+import os
+from struct import Struct
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from .schema import Schema
+from .db_tuple import DbTuple
+from .table import Table
+from .column_types import TypeInt, TypeVarchar
+from .locks import RWLock
+from .page_encoding import column_encoding, decode_column, encode_column
+from .bloom import BloomFilter
+from .tuple_view import ColumnRowView
+
+FILE_MAGIC = b"HDZ2"
+_OLD_FILE_MAGIC = b"HDBZ"  # the format before pages carried Bloom filters
+ROWS_PER_PAGE = 4096
+
+_FILE_HEADER = Struct("<4sI")   # magic | schema_len
+_PAGE_HEADER = Struct("<II")    # body_len | row_count
+_COUNT = Struct("<H")
+_LENGTH = Struct("<I")
+
+# (page_no, row number within the page); page_no == number of sealed pages means the open page
+RowId = Tuple[int, int]
+
+
+class _PageColumns:
+    """The columns of one sealed page, each decoded the first time it is read."""
+
+    __slots__ = ("_body", "_directory", "_rows", "_is_int", "_decoded")
+
+    def __init__(self, body: bytes, directory: Sequence[int], rows: int, is_int: List[bool]):
+        self._body = body
+        self._directory = directory
+        self._rows = rows
+        self._is_int = is_int
+        self._decoded: Dict[int, List[Any]] = {}
+
+    def __getitem__(self, i: int) -> List[Any]:
+        column = self._decoded.get(i)
+        if column is None:
+            column = self._decoded[i] = decode_column(self._body, self._directory[i], self._rows, self._is_int[i])[0]
+        return column
+
+
+class CompressedTable:
+    """
+    A file-backed, append-only table stored as compressed column pages.
+
+    Exposes the same API as `Table` except delete. Reopening an existing file
+    needs only the path:
+
+        table = CompressedTable("census.tblz", schema)   # create
+        table = CompressedTable("census.tblz")           # reopen
+
+    With read_only=True the file is opened for reading only and insert raises
+    ValueError. Process pool workers open tables this way (see executor.py).
+    """
+
+    def __init__(self, path: str, schema: Optional[Schema] = None, rows_per_page: int = ROWS_PER_PAGE,
+                 bloom_columns: Optional[Sequence[str]] = None, read_only: bool = False):
+        """
+        Open the compressed table file at `path`, creating it with `schema` if it does not exist.
+        When opening an existing file, a passed schema must match the stored one.
+        `bloom_columns` names the columns given per-page Bloom filters when the
+        file is created (default: the primary key, if any); a reopened file
+        keeps the columns it was created with.
+        """
+        if rows_per_page < 1:
+            raise ValueError("rows_per_page must be >= 1.")
+        self.path = path
+        self.rows_per_page = rows_per_page
+        self.read_only = read_only
+        # File offset just past the last whole page, where the next page is written.
+        self._end = 0
+        # True while bytes of a torn page follow _end; the first sealed page cuts them off.
+        self._torn = False
+        # Sealed pages: (file offset of the body, body length, row count).
+        self._pages: List[Tuple[int, int, int]] = []
+        # Rows of the open page, not yet encoded or written.
+        self._open: List[List[Any]] = []
+        self.row_count = 0
+        # Primary-key index (key -> RowId), built by one pass over the key column on first use.
+        self._key_index: Optional[Dict[Any, RowId]] = None
+        # The last page decoded for a point lookup: (page_no, columns).
+        self._cached: Optional[Tuple[int, List[List[Any]]]] = None
+        # Per sealed page, the Bloom filter of each filtered column (column index -> filter).
+        self._blooms: List[Dict[int, BloomFilter]] = []
+        self.statistics: Optional[Any] = None
+        self._lock = RWLock()
+
+        if read_only:
+            if not (os.path.exists(path) and os.path.getsize(path) > 0):
+                raise ValueError(f"Error: '{path}' does not exist. Cannot open it read-only.")
+            self.file = open(path, "rb")
+            self._read_file(schema)
+        elif os.path.exists(path) and os.path.getsize(path) > 0:
+            self.file = open(path, "r+b")
+            self._read_file(schema)
+        else:
+            if schema is None:
+                raise ValueError(f"Error: '{path}' does not exist and no schema was given.")
+            self.schema = schema
+            self._check_types()
+            if bloom_columns is None:
+                bloom_columns = [] if schema.key is None else [schema.key]
+            self._bloom_columns = []
+            for name in bloom_columns:
+                col_index = schema.get_column_index(name)
+                if col_index < 0:
+                    raise ValueError(f"Error: table does not contain column '{name}'.")
+                self._bloom_columns.append(col_index)
+            self.file = open(path, "w+b")
+            schema_bytes = schema.serialize()
+            self.file.write(_FILE_HEADER.pack(FILE_MAGIC, len(schema_bytes)) + schema_bytes
+                            + _COUNT.pack(len(self._bloom_columns))
+                            + b"".join(_COUNT.pack(i) for i in self._bloom_columns))
+            self._end = self.file.tell()
+        self._is_int = [isinstance(self.schema.get_type(i), TypeInt) for i in range(self.schema.size())]
+
+    def _check_types(self) -> None:
+        for i in range(self.schema.size()):
+            if not isinstance(self.schema.get_type(i), (TypeInt, TypeVarchar)):
+                raise ValueError(f"Unsupported column type {self.schema.get_type(i)!r}.")
+
+    def _read_file(self, schema: Optional[Schema]) -> None:
+        """
+        Read the header and walk the page headers to find every sealed page,
+        stopping at a torn final page without touching it.
+        """
+        header = self.file.read(_FILE_HEADER.size)
+        if len(header) < _FILE_HEADER.size:
+            raise ValueError(f"Error: '{self.path}' is not a compressed table (truncated header).")
+        magic, schema_len = _FILE_HEADER.unpack(header)
+        if magic == _OLD_FILE_MAGIC:
+            raise ValueError(f"Error: '{self.path}' is a compressed table in an older format without "
+                             "Bloom filters; reload it into a new file.")
+        if magic != FILE_MAGIC:
+            raise ValueError(f"Error: '{self.path}' is not a compressed table.")
+        stored = Schema.deserialize(self.file.read(schema_len))
+        if schema is not None:
+            if schema.serialize() != stored.serialize():
+                raise ValueError("Error: schema does not match the schema stored in the compressed table.")
+            stored = schema
+        self.schema = stored
+        (count,) = _COUNT.unpack(self.file.read(_COUNT.size))
+        self._bloom_columns = [_COUNT.unpack(self.file.read(_COUNT.size))[0] for _ in range(count)]
+
+        end = os.fstat(self.file.fileno()).st_size
+        offset = self.file.tell()
+        while offset < end:
+            page_header = os.pread(self.file.fileno(), _PAGE_HEADER.size, offset)
+            body_len, rows = _PAGE_HEADER.unpack(page_header) if len(page_header) == _PAGE_HEADER.size else (0, 0)
+            body = offset + _PAGE_HEADER.size
+            if rows == 0 or body + body_len > end:
+                self._torn = True
+                break
+            self._pages.append((body, body_len, rows))
+            self._blooms.append(self._read_blooms(len(self._pages) - 1))
+            self.row_count += rows
+            offset = body + body_len
+        self._end = offset
+
+    def _read_blooms(self, page_no: int) -> Dict[int, BloomFilter]:
+        """Read just the filter section of a sealed page."""
+        if not self._bloom_columns:
+            return {}
+        offset, length, _ = self._pages[page_no]
+        directory_size = 4 * (self.schema.size() + 1)
+        start = _LENGTH.unpack(os.pread(self.file.fileno(), 4, offset + directory_size - 4))[0]
+        section = os.pread(self.file.fileno(), length - start, offset + start)
+        blooms = {}
+        position = 0
+        for col_index in self._bloom_columns:
+            (size,) = _LENGTH.unpack_from(section, position)
+            position += _LENGTH.size
+            blooms[col_index] = BloomFilter.from_bytes(section[position:position + size])
+            position += size
+        return blooms
+
+    # ----- pages -----
+
+    def _seal(self) -> None:
+        """Encode the open page and append it to the file. Caller holds the write lock."""
+        rows = self._open
+        if not rows:
+            return
+        columns = list(zip(*rows))
+        blocks = [encode_column(values, is_int) for values, is_int in zip(columns, self._is_int)]
+        blooms = {i: BloomFilter.of(columns[i], capacity=len(rows)) for i in self._bloom_columns}
+        directory = Struct(f"<{len(blocks) + 1}I")
+        offsets = []
+        position = directory.size
+        for block in blocks:
+            offsets.append(position)
+            position += len(block)
+        offsets.append(position)
+        filters = b"".join(_LENGTH.pack(len(data)) + data
+                           for data in (blooms[i].to_bytes() for i in self._bloom_columns))
+        body = directory.pack(*offsets) + b"".join(blocks) + filters
+
+        offset = self._end
+        if self._torn:
+            self.file.truncate(offset)  # this handle writes, so the torn page is not one being appended
+            self._torn = False
+        self.file.seek(offset)
+        self.file.write(_PAGE_HEADER.pack(len(body), len(rows)) + body)
+        self.file.flush()  # pages are read back with os.pread, which bypasses the file's buffer
+        self._end = offset + _PAGE_HEADER.size + len(body)
+        self._pages.append((offset + _PAGE_HEADER.size, len(body), len(rows)))
+        self._blooms.append(blooms)
+        self._open = []
+
+    def _read_body(self, page_no: int) -> Tuple[bytes, int]:
+        offset, length, rows = self._pages[page_no]
+        return os.pread(self.file.fileno(), length, offset), rows
+
+    def _decode_columns(self, page_no: int, col_indexes: Sequence[int]) -> List[List[Any]]:
+        """Return the values of the given columns of a sealed page, decoding no other column."""
+        body, rows = self._read_body(page_no)
+        directory = Struct(f"<{self.schema.size()}I").unpack_from(body, 0)
+        return [decode_column(body, directory[i], rows, self._is_int[i])[0] for i in col_indexes]
+
+    def _page_columns(self, col_indexes: Sequence[int]) -> Iterator[List[List[Any]]]:
+        """
+        Yield, page by page, the values of the given columns, ending with the open page.
+        Pages are read under the read lock and yielded with no lock held.
+        """
+        page_count, open_rows = self._snapshot()
+        for page_no in range(page_count):
+            with self._lock.read():
+                columns = self._decode_columns(page_no, col_indexes)
+            yield columns
+        if open_rows:
+            yield [[row[i] for row in open_rows] for i in col_indexes]
+
+    def _snapshot(self) -> Tuple[int, List[List[Any]]]:
+        """
+        Return the sealed page count and a copy of the open page's rows, taken
+        together: a page sealed afterwards holds rows of the copy, not new ones.
+        """
+        with self._lock.read():
+            return len(self._pages), list(self._open)
+
+    def _fetch(self, row_id: RowId) -> DbTuple:
+        page_no, row_no = row_id
+        if page_no == len(self._pages):
+            return DbTuple.from_trusted_values(self.schema, list(self._open[row_no]))
+        if self._cached is None or self._cached[0] != page_no:
+            self._cached = (page_no, self._decode_columns(page_no, range(self.schema.size())))
+        return DbTuple.from_trusted_values(self.schema, [column[row_no] for column in self._cached[1]])
+
+    def _key_rows(self) -> Dict[Any, RowId]:
+        """Return the primary-key index, decoding the key column once to build it if needed."""
+        if self._key_index is None:
+            key_column = self.schema.get_column_index(self.schema.key)
+            index: Dict[Any, RowId] = {}
+            for page_no in range(len(self._pages)):
+                (keys,) = self._decode_columns(page_no, [key_column])
+                index.update((key, (page_no, row_no)) for row_no, key in enumerate(keys))
+            open_page = len(self._pages)
+            index.update((row[key_column], (open_page, row_no)) for row_no, row in enumerate(self._open))
+            self._key_index = index
+        return self._key_index
+
+    def page_count(self) -> int:
+        """Return the number of sealed pages."""
+        return len(self._pages)
+
+    def column_encodings(self, page_no: int) -> List[str]:
+        """Return the encoding chosen for each column of a sealed page, in column order."""
+        with self._lock.read():
+            body, rows = self._read_body(page_no)
+        directory = Struct(f"<{self.schema.size()}I").unpack_from(body, 0)
+        return [column_encoding(body, offset, rows) for offset in directory]
+
+    def file_bytes(self) -> int:
+        """Return the size of the file once the open page is sealed."""
+        with self._lock.write():
+            self._seal()
+            return self._end
+
+    # ----- Table API -----
+
+    def get_schema(self) -> Schema:
+        """Return the schema of the table."""
+        return self.schema
+
+    def size(self) -> int:
+        """Return the number of db tuples (rows) in the table."""
+        return self.row_count
+
+    def flush(self) -> None:
+        """Seal the open page, if it holds any rows, and push buffered writes to the OS."""
+        with self._lock.write():
+            self._seal()
+            self.file.flush()
+
+    def close(self) -> None:
+        """Flush and close the underlying file."""
+        with self._lock.write():
+            if self.file.closed:
+                return
+            self.flush()
+            self.file.close()
+
+    def __reduce__(self):
+        # pickled for process pools (see executor.py): the worker reopens the file by path,
+        # read-only, so it never cuts off a page this table is still appending
+        return _open_read_only, (self.path,)
+
+    def analyze(self, sample_size: Optional[int] = None) -> Any:
+        """Compute per-column statistics, keep them in self.statistics and return them."""
+        from .statistics import DEFAULT_SAMPLE_SIZE, analyze  # local import: statistics imports the planner
+        self.statistics = analyze(self, sample_size or DEFAULT_SAMPLE_SIZE)
+        return self.statistics
+
+    def insert(self, rec: DbTuple) -> bool:
+        """
+        Insert a db tuple into the table.
+        :return: True if insert succeeds, False if key already exists
+        """
+        return self.insert_many([rec]) == 1
+
+    def insert_many(self, rows: Iterable[DbTuple]) -> int:
+        """
+        Insert many db tuples (duplicates of an existing key are skipped),
+        sealing a page each time ROWS_PER_PAGE rows have collected.
+        :return: the number of db tuples inserted
+        """
+        if self.read_only:
+            raise ValueError(f"Error: '{self.path}' is open read-only. Cannot insert.")
+        key_column = -1 if self.schema.key is None else self.schema.get_column_index(self.schema.key)
+        inserted = 0
+        with self._lock.write():
+            key_index = self._key_rows() if key_column >= 0 else None
+            for rec in rows:
+                if rec.schema is not self.schema:
+                    raise ValueError("Error: db tuple schema object does not match table schema (must reuse the same Schema instance).")
+                if key_index is not None:
+                    key = rec.values[key_column]
+                    if key in key_index:
+                        continue
+                    key_index[key] = (len(self._pages), len(self._open))
+                self._open.append(list(rec.values))
+                self.row_count += 1  # per row: a later row that raises leaves the earlier ones counted
+                inserted += 1
+                if len(self._open) >= self.rows_per_page:
+                    self._seal()
+        return inserted
+
+    def delete(self, key: object) -> bool:
+        raise ValueError("Error: a compressed table is append-only. Cannot delete.")
+
+    def lookup_by_key(self, key: object) -> Optional[DbTuple]:
+        """
+        Return the db tuple with the given primary key value, or None if no such db tuple exists.
+        """
+        if self.schema.key is None:
+            raise ValueError("Error: table does not have a primary key. Cannot lookup.")
+
+        key_column = self.schema.get_column_index(self.schema.key)
+        with self._lock.write():  # may fill the page cache
+            if self._key_index is None and key_column in self._bloom_columns:
+                # no index yet (so no open rows either): read only the pages whose filter may hold the key
+                for page_no in self._candidate_pages(key_column, key, len(self._pages)):
+                    (keys,) = self._decode_columns(page_no, [key_column])
+                    if key in keys:
+                        return self._fetch((page_no, keys.index(key)))
+                return None
+            row_id = self._key_rows().get(key)
+            return None if row_id is None else self._fetch(row_id)
+
+    def lookup_by_column(self, colname: str, value: object) -> Table:
+        """
+        Return an in-memory Table holding the db tuples that satisfy colname=value.
+        Only the rows of pages where the column matches are decoded in full.
+        """
+        col_index = self.schema.get_column_index(colname)
+        if col_index < 0:
+            raise ValueError(f"Error: table does not contain column '{colname}'.")
+
+        result_table = Table(self.schema)
+        all_columns = range(self.schema.size())
+        page_count, open_rows = self._snapshot()
+        for page_no in self._candidate_pages(col_index, value, page_count):
+            with self._lock.read():
+                (values,) = self._decode_columns(page_no, [col_index])
+                if value not in values:
+                    continue
+                columns = self._decode_columns(page_no, all_columns)
+            for row in zip(*columns):
+                if row[col_index] == value:
+                    result_table.insert(DbTuple.from_trusted_values(self.schema, list(row)))
+        for row in open_rows:
+            if row[col_index] == value:
+                result_table.insert(DbTuple.from_trusted_values(self.schema, list(row)))
+        return result_table
+
+    def _candidate_pages(self, col_index: int, value: object, page_count: int) -> Iterator[int]:
+        """
+        Yield the first `page_count` sealed pages that may hold `value` in the
+        column, skipping pages whose filter rules it out.
+        """
+        for page_no, blooms in enumerate(self._blooms[:page_count]):
+            bloom = blooms.get(col_index)
+            if bloom is None or bloom.might_contain(value):
+                yield page_no
+
+    def might_contain(self, colname: str, value: object) -> bool:
+        """False if the Bloom filters on `colname` rule `value` out of every page; True otherwise."""
+        col_index = self.schema.get_column_index(colname)
+        if col_index not in self._bloom_columns:
+            return True
+        with self._lock.read():
+            if any(True for _ in self._candidate_pages(col_index, value, len(self._pages))):
+                return True
+            return any(row[col_index] == value for row in self._open)
+
+    def has_index(self, colname: str) -> bool:
+        """Compressed tables have no secondary indexes."""
+        return False
+
+    def index_lookup(self, colname: str, value: object) -> Optional[List[DbTuple]]:
+        """Compressed tables have no secondary indexes, so this is always None."""
+        return None
+
+    def index_range(self, colname: str, low: Any = None, high: Any = None,
+                    low_inclusive: bool = True, high_inclusive: bool = True) -> Optional[List[DbTuple]]:
+        """Compressed tables have no secondary indexes, so this is always None."""
+        return None
+
+    # ----- column access -----
+
+    def column_values(self, colname: str) -> Iterator[Any]:
+        """Yield the values of one column for every row, decoding no other column."""
+        col_index = self.schema.get_column_index(colname)
+        if col_index < 0:
+            raise ValueError(f"Error: table does not contain column '{colname}'.")
+        for (values,) in self._page_columns([col_index]):
+            yield from values
+
+    def scan_columns(self, colnames: Sequence[str],
+                     predicate: Optional[Callable[[Any], bool]] = None) -> Iterator[Tuple[Any, ...]]:
+        """
+        Yield one tuple per row holding only the requested columns, in
+        `colnames` order. With `predicate`, only rows satisfying it are yielded
+        (see _matching_columns).
+        """
+        col_indexes = []
+        for name in colnames:
+            col_index = self.schema.get_column_index(name)
+            if col_index < 0:
+                raise ValueError(f"Error: table does not contain column '{name}'.")
+            col_indexes.append(col_index)
+        pages = self._page_columns(col_indexes) if predicate is None else self._matching_columns(predicate, col_indexes)
+        for columns in pages:
+            yield from zip(*columns)
+
+    def _matching_columns(self, predicate: Callable[[Any], bool],
+                          col_indexes: Sequence[int]) -> Iterator[List[List[Any]]]:
+        """
+        Yield, page by page, the values of the given columns for the rows that
+        satisfy `predicate`. On sealed pages it is evaluated on ColumnRowViews,
+        so only the columns it reads are decoded, plus the requested ones of
+        pages where some row matches.
+        """
+        schema = self.schema
+        width = schema.size()
+        page_count, open_rows = self._snapshot()
+        for page_no in range(page_count):
+            with self._lock.read():
+                body, rows = self._read_body(page_no)
+            page = _PageColumns(body, Struct(f"<{width}I").unpack_from(body, 0), rows, self._is_int)
+            matched = [row for row in range(rows) if predicate(ColumnRowView(schema, page, row))]
+            if matched:
+                yield [[column[row] for row in matched] for column in (page[i] for i in col_indexes)]
+        trusted = DbTuple.from_trusted_values
+        matched_rows = [row for row in open_rows if predicate(trusted(schema, row))]
+        if matched_rows:
+            yield [[row[i] for row in matched_rows] for i in col_indexes]
+
+    def scan(self, predicate: Optional[Callable[[DbTuple], bool]] = None) -> Iterator[DbTuple]:
+        """
+        Yield the db tuples that satisfy `predicate` (every db tuple if None).
+        """
+        if predicate is None:
+            return iter(self)
+        schema = self.schema
+        trusted = DbTuple.from_trusted_values
+        return (trusted(schema, list(row)) for row in self.scan_columns(
+            [schema.get_name(i) for i in range(schema.size())], predicate))
+
+    def __iter__(self) -> Iterator[DbTuple]:
+        """
+        Return an iterator over the table's db tuples, decoded one page at a time.
+        """
+        schema = self.schema
+        trusted = DbTuple.from_trusted_values
+        for columns in self._page_columns(range(schema.size())):
+            for row in zip(*columns):
+                yield trusted(schema, list(row))
+
+    def __enter__(self) -> "CompressedTable":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the table.
+        """
+        if self.row_count == 0:
+            return "Empty Table"
+        return "\n".join(str(t) for t in self)
+
+
+def _open_read_only(path: str) -> CompressedTable:
+    return CompressedTable(path, read_only=True)
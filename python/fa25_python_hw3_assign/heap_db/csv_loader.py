@@ -0,0 +1,368 @@
+"""
+csv_loader.py: bulk-load a CSV file into a heap_db table.
+
+    table = load_csv("csvs/1994-census-summary.csv", key="usid")
+
+The file is read with the `csv` module one chunk at a time, so memory use is
+bounded by `chunk_size` rows regardless of file size. Each field is checked and
+converted once by a per-column converter, and the resulting rows are built
+with `DbTuple.from_trusted_values` and handed to the table's `insert_many`,
+which avoids re-validating every value in DbTuple.__init__ and the per-row
+overhead of `insert`.
+
+`load_csv_parallel` splits the file on record boundaries and parses and encodes
+the pieces in worker processes, merging their record batches in file order.
+
+Without a schema one is inferred from the first `sample_size` rows: a column is
+INT when every non-empty sample value is a 32-bit integer and VARCHAR otherwise.
+VARCHAR widths get headroom over the longest sampled value; a later value that
+does not fit its inferred type raises ValueError naming the line.
+"""
+
+import csv
+import io
+import marshal
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, BinaryIO, Callable, Deque, Iterator, List, Optional, Tuple
+from .schema import Schema
+from .db_tuple import DbTuple, INT32_MIN, INT32_MAX
+from .column_types import TypeInt, TypeVarchar
+from .table import Table
+
+DEFAULT_SAMPLE_SIZE = 1000
+DEFAULT_CHUNK_SIZE = 10000
+DEFAULT_CHUNK_BYTES = 1 << 20  # 1 MiB per parallel work unit
+
+# Inferred VARCHAR widths are at least this many bytes.
+_MIN_VARCHAR_WIDTH = 16
+
+
+@dataclass
+class LoadProgress:
+    """Progress of a running load, passed to the `progress` callback after each chunk."""
+    rows: int = 0       # rows inserted so far
+    skipped: int = 0    # rows skipped because their key was already present
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def _parse_int(text: str) -> Optional[int]:
+    try:
+        value = int(text)
+    except ValueError:
+        return None
+    return value if INT32_MIN <= value <= INT32_MAX else None
+
+
+def _varchar_width(max_bytes: int) -> int:
+    """Twice the longest sampled value, rounded up to a multiple of 8."""
+    return max(_MIN_VARCHAR_WIDTH, (2 * max_bytes + 7) // 8 * 8)
+
+
+def _open(path: str):
+    return open(path, newline="", encoding="utf-8")
+
+
+def infer_schema(path: str, key: Optional[str] = None, sample_size: int = DEFAULT_SAMPLE_SIZE) -> Schema:
+    """
+    Infer a schema from the header and first `sample_size` rows of a CSV file.
+    `key` names the column to use as the primary key (no key if None).
+    """
+    with _open(path) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            raise ValueError(f"Error: CSV file '{path}' has no header row.")
+        if key is not None and key not in header:
+            raise ValueError(f"Error: key column '{key}' is not in the CSV header.")
+
+        is_int = [True] * len(header)
+        max_bytes = [0] * len(header)
+        for row in islice(reader, sample_size):
+            for i, text in enumerate(row[:len(header)]):
+                if not text:
+                    continue
+                if is_int[i] and _parse_int(text) is None:
+                    is_int[i] = False
+                max_bytes[i] = max(max_bytes[i], len(text.encode("utf-8")))
+
+    schema = Schema()
+    for i, name in enumerate(header):
+        if name == key:
+            if is_int[i]:
+                schema.add_key_int_type(name)
+            else:
+                schema.add_key_varchar_type(name, _varchar_width(max_bytes[i]))
+        elif is_int[i]:
+            schema.add_int_type(name)
+        else:
+            schema.add_varchar_type(name, _varchar_width(max_bytes[i]))
+    return schema
+
+
+def _converters(schema: Schema) -> List[Callable[[str], Any]]:
+    """One function per column turning a CSV field into a value DbTuple.set would accept."""
+    key = schema.get_key()
+    converters: List[Callable[[str], Any]] = []
+    for i in range(schema.size()):
+        col_type = schema.get_type(i)
+        name = schema.get_name(i)
+        if isinstance(col_type, TypeInt):
+            converters.append(_int_converter(name, name == key))
+        elif isinstance(col_type, TypeVarchar):
+            converters.append(_varchar_converter(name, col_type.get_max_sql_length()))
+        else:
+            raise ValueError(f"Unsupported column type {col_type!r}.")
+    return converters
+
+
+def _int_converter(name: str, is_key: bool) -> Callable[[str], Any]:
+    def convert(text: str) -> Optional[int]:
+        if not text:
+            if is_key:
+                raise ValueError(f"Primary key '{name}' cannot be None")
+            return None
+        value = int(text)
+        if value < INT32_MIN or value > INT32_MAX:
+            raise ValueError(f"Column '{name}': INT out of 32-bit signed range")
+        return value
+    return convert
+
+
+def _varchar_converter(name: str, max_size: int) -> Callable[[str], str]:
+    # A string of at most max_size // 4 characters always fits, whatever its encoding.
+    safe = max_size // 4
+
+    def convert(text: str) -> str:
+        if len(text) > safe and len(text.encode("utf-8")) > max_size:
+            raise ValueError(f"Column '{name}': string too long for VARCHAR({max_size})")
+        return text
+    return convert
+
+
+def _read_rows(reader: Any, schema: Schema, first_line: int = 1) -> Iterator[DbTuple]:
+    """Convert CSV records to db tuples; `first_line` is the file line number of the reader's first line."""
+    converters = _converters(schema)
+    line_offset = first_line - 1
+    width = len(converters)
+    trusted = DbTuple.from_trusted_values
+    for row in reader:
+        if len(row) != width:
+            if not row:
+                continue
+            raise ValueError(f"Error: line {reader.line_num + line_offset} has {len(row)} fields, expected {width}.")
+        try:
+            values = [convert(text) for convert, text in zip(converters, row)]
+        except ValueError as e:
+            raise ValueError(f"Error: line {reader.line_num + line_offset}: {e}") from None
+        yield trusted(schema, values)
+
+
+def _prepare(path: str, schema: Optional[Schema], table: Any, key: Optional[str], sample_size: int) -> Tuple[Schema, Any]:
+    if table is not None:
+        schema = table.get_schema()
+    elif schema is None:
+        schema = infer_schema(path, key=key, sample_size=sample_size)
+    if table is None:
+        table = Table(schema)
+    return schema, table
+
+
+def _check_header(header: Optional[List[str]], schema: Schema) -> None:
+    names = [schema.get_name(i) for i in range(schema.size())]
+    if header != names:
+        raise ValueError(f"Error: CSV header {header} does not match schema columns {names}.")
+
+
+def load_csv(path: str, schema: Optional[Schema] = None, table: Any = None, key: Optional[str] = None,
+             sample_size: int = DEFAULT_SAMPLE_SIZE, chunk_size: int = DEFAULT_CHUNK_SIZE,
+             progress: Optional[Callable[[LoadProgress], None]] = None) -> Any:
+    """
+    Load a CSV file (with a header row) into a table and return the table.
+
+    - table: append to this table (a Table, ColumnarTable or HeapFileTable);
+      its schema is used. Otherwise a new in-memory Table is created.
+    - schema: schema for the new table; inferred from the file if None.
+    - key: primary key column when the schema is inferred.
+    - progress: called with a LoadProgress after every chunk and once at the end.
+
+    Header names must match the schema's column names, in order. Rows whose key
+    is already in the table are skipped and counted in LoadProgress.skipped.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be > 0.")
+    schema, table = _prepare(path, schema, table, key, sample_size)
+    status = LoadProgress()
+    start = time.perf_counter()
+    with _open(path) as f:
+        reader = csv.reader(f)
+        _check_header(next(reader, None), schema)
+
+        rows = _read_rows(reader, schema)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            inserted = table.insert_many(chunk)
+            status.rows += inserted
+            status.skipped += len(chunk) - inserted
+            status.seconds = time.perf_counter() - start
+            if progress is not None:
+                progress(status)
+
+    status.seconds = time.perf_counter() - start
+    if progress is not None:
+        progress(status)
+    return table
+
+
+# ----- parallel loading -----
+
+_SCAN_BLOCK = 1 << 16
+
+
+def _record_end(f: BinaryIO, pos: int, quoted: int) -> Tuple[int, int, int]:
+    """
+    Scan forward from byte `pos` (with `quoted` = 1 if `pos` is inside a quoted
+    field) to just past the next newline that is outside quotes.
+    Returns (end offset, newlines passed, quote parity at end); end is EOF if none.
+    """
+    f.seek(pos)
+    lines = 0
+    while True:
+        block = f.read(_SCAN_BLOCK)
+        if not block:
+            return pos, lines, quoted
+        i = 0
+        while True:
+            nl = block.find(b"\n", i)
+            if nl < 0:
+                quoted ^= block.count(b'"', i) & 1
+                break
+            quoted ^= block.count(b'"', i, nl) & 1
+            lines += 1
+            if not quoted:
+                return pos + nl + 1, lines, 0
+            i = nl + 1
+        pos += len(block)
+
+
+def split_csv(path: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> List[Tuple[int, int, int]]:
+    """
+    Split the data rows of a CSV file into byte ranges of about `chunk_bytes`
+    that start and end on record boundaries. Returns (start, end, first line
+    number) triples covering everything after the header.
+
+    A newline only ends a record when an even number of quote characters
+    precede it, so quoted fields with embedded commas, doubled quotes or line
+    breaks are never cut. (Like any parity scan this assumes quotes only appear
+    in quoted fields, as RFC 4180 requires.)
+    """
+    if chunk_bytes <= 0:
+        raise ValueError("chunk_bytes must be > 0.")
+    size = os.path.getsize(path)
+    chunks: List[Tuple[int, int, int]] = []
+    with open(path, "rb") as f:
+        pos, header_lines, _ = _record_end(f, 0, 0)
+        line = header_lines + 1
+        while pos < size:
+            target = min(pos + chunk_bytes, size)
+            f.seek(pos)
+            data = f.read(target - pos)
+            quoted = data.count(b'"') & 1
+            lines = data.count(b"\n")
+            end = target
+            if target < size and (quoted or not data.endswith(b"\n")):
+                end, extra, _ = _record_end(f, target, quoted)
+                lines += extra
+            chunks.append((pos, end, line))
+            line += lines
+            pos = end
+    return chunks
+
+
+def _parse_chunk(path: str, start: int, end: int, first_line: int, schema_bytes: bytes) -> Tuple[str, Any, Any]:
+    """
+    Worker: parse and validate one byte range and encode it. Returns
+    ("records", buffer, offsets) from RecordCodec.serialize_many, or
+    ("values", marshalled value lists) when a row holds a NULL INT, which the
+    record format cannot encode.
+    """
+    schema = Schema.deserialize(schema_bytes)
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    rows = list(_read_rows(csv.reader(io.StringIO(text, newline="")), schema, first_line))
+    try:
+        buf, offsets = schema.get_codec().serialize_many(rows)
+    except ValueError:
+        return "values", marshal.dumps([row.values for row in rows]), None
+    return "records", bytes(buf), offsets
+
+
+def _merge_chunk(table: Any, schema: Schema, result: Tuple[str, Any, Any]) -> Tuple[int, int]:
+    """Insert one worker result into `table`; returns (rows parsed, rows inserted)."""
+    kind, data, offsets = result
+    if kind == "records":
+        if hasattr(table, "insert_serialized"):
+            return len(offsets) - 1, table.insert_serialized(data, offsets)
+        rows = schema.get_codec().deserialize_many(data, offsets)
+    else:
+        trusted = DbTuple.from_trusted_values
+        rows = [trusted(schema, values) for values in marshal.loads(data)]
+    return len(rows), table.insert_many(rows)
+
+
+def load_csv_parallel(path: str, schema: Optional[Schema] = None, table: Any = None, key: Optional[str] = None,
+                      workers: Optional[int] = None, chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+                      sample_size: int = DEFAULT_SAMPLE_SIZE,
+                      progress: Optional[Callable[[LoadProgress], None]] = None) -> Any:
+    """
+    Like `load_csv`, but the file is split with `split_csv` and the ranges are
+    parsed, validated and encoded in a ProcessPoolExecutor of `workers`
+    processes (default: one per CPU). The parent merges the encoded batches into
+    the table in file order, so the result is the same as `load_csv`'s.
+
+    At most two ranges per worker are in flight, which bounds memory use.
+    """
+    schema, table = _prepare(path, schema, table, key, sample_size)
+    with _open(path) as f:
+        _check_header(next(csv.reader(f), None), schema)
+
+    workers = workers or os.cpu_count() or 1
+    chunks = iter(split_csv(path, chunk_bytes))
+    schema_bytes = schema.serialize()
+    status = LoadProgress()
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: Deque[Future] = deque()
+
+        def submit() -> None:
+            chunk = next(chunks, None)
+            if chunk is not None:
+                pending.append(executor.submit(_parse_chunk, path, *chunk, schema_bytes))
+
+        for _ in range(2 * workers):
+            submit()
+        while pending:
+            result = pending.popleft().result()
+            submit()
+            parsed, inserted = _merge_chunk(table, schema, result)
+            status.rows += inserted
+            status.skipped += parsed - inserted
+            status.seconds = time.perf_counter() - start
+            if progress is not None:
+                progress(status)
+
+    status.seconds = time.perf_counter() - start
+    if progress is not None:
+        progress(status)
+    return table
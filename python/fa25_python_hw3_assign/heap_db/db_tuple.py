@@ -1,5 +1,5 @@
 from typing import List, Any, Optional, Union, Iterator, final
-from struct import unpack_from
+from struct import error as StructError
 from .schema import Schema 
 from .column_types import TypeInt, TypeVarchar
 
@@ -36,6 +36,19 @@ class DbTuple:
                 self.set(i, default)
 
 
+    @classmethod
+    def from_trusted_values(cls, schema: Schema, values: List[Any]) -> "DbTuple":
+        """
+        Create a db tuple from values that are already known to satisfy `schema`
+        (rows read back from storage, or columns copied from other validated
+        tuples), skipping the per-value checks done by __init__. `values` is
+        adopted, not copied.
+        """
+        t = cls.__new__(cls)
+        t.schema = schema
+        t.values = values
+        return t
+
     @classmethod
     def join_db_tuple(cls, schema: Schema, t1: "DbTuple", t2: "DbTuple") -> "DbTuple":
         """
@@ -159,27 +172,24 @@ class DbTuple:
         return DbTuple(schema, *projected_values)
 
     def serialize(self) -> bytes:
-        """Serialize the db tuple to a binary format."""
-        buf = bytearray()
-        for i in range(self.schema.size()):
-            t = self.schema.get_type(i)
-            v = self.values[i]
-            if v is None:
-                raise ValueError(f"Cannot serialize NULL at column {i} without null encoding")
-            t.write_value(v, buf)
-        return bytes(buf)
+        """Serialize the db tuple to a binary format (see record_codec for the layout)."""
+        return self.schema.get_codec().encode(self.values)
 
 
 
     @classmethod
     def deserialize(cls, schema: Schema, byte_data: bytes) -> "DbTuple":
+        """
+        Parse bytes produced by serialize() and validate the values against `schema`.
+        Storage code reading back its own records uses schema.get_codec().decode instead.
+        """
         buf = memoryview(byte_data)
-        offset = 0
-        values: List[Any] = []
-        for i in range(schema.size()):
-            t = schema.get_type(i)
-            val, offset = t.read_value(buf, offset)  # type parses itself and advances offset
-            values.append(val)
+        try:
+            values, offset = schema.get_codec().decode_values(buf, 0)
+        except (StructError, UnicodeDecodeError) as e:
+            raise ValueError(f"Malformed tuple payload: {e}") from None
+        if offset > len(buf):
+            raise ValueError("Buffer does not contain full tuple payload")
         if offset != len(buf):
             raise ValueError(f"Extra {len(buf) - offset} bytes after tuple payload")
         return cls(schema, *values)
@@ -0,0 +1,105 @@
+"""
+executor.py: run many queries at once on a thread or process pool.
+
+    with QueryExecutor(max_workers=8) as executor:
+        futures = executor.submit_all([(by_dept, instructors), (top_paid, instructors)])
+        results = [f.result() for f in futures]     # Tables, in submission order
+
+A query is anything with a select(table) method (SelectQuery, GroupByQuery).
+Threads share the tables: reads run concurrently under the tables' locks, and
+lookups that wait on disk overlap. Python code itself runs one thread at a
+time, so for CPU-bound queries pass processes=True. Heap files are then
+flushed and reopened in the worker read-only by path, once per task. In-memory
+tables are copied into each worker once, when the pool starts: a table that
+is new or has changed since it was shipped restarts the pool (queued tasks
+still finish on the old one), so a batch of queries over the same tables
+pays for one copy per worker. Results come back as Tables either way.
+"""
+
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .table import Table
+from .columnar_table import ColumnarTable
+
+# In a worker process: the in-memory tables its pool was started with, by id in the parent.
+_worker_tables: Dict[int, Any] = {}
+
+
+def _run(query: Any, table: Any) -> Table:
+    # module level, so that process pools can pickle it
+    return query.select(table)
+
+
+def _install_tables(tables: Dict[int, Any]) -> None:
+    _worker_tables.update(tables)
+
+
+def _run_shipped(query: Any, table_id: int) -> Table:
+    return query.select(_worker_tables[table_id])
+
+
+def _contents_version(table: Any) -> Any:
+    """What changes whenever an in-memory table's rows change; None if unknown."""
+    if isinstance(table, Table):
+        return table._head  # replaced by every committed write
+    if isinstance(table, ColumnarTable):
+        return table._changes
+    return None
+
+
+class QueryExecutor:
+    """Submit (query, table) pairs to a pool and get futures of their result Tables."""
+
+    def __init__(self, max_workers: Optional[int] = None, processes: bool = False):
+        if max_workers is not None and max_workers < 1:
+            raise ValueError("max_workers must be >= 1.")
+        self.processes = processes
+        self.max_workers = max_workers
+        self._pool: Executor = (ProcessPoolExecutor(max_workers) if processes
+                                else ThreadPoolExecutor(max_workers, thread_name_prefix="query"))
+        # Process pools: in-memory tables the current pool was started with, id -> (table, version).
+        self._shipped: Dict[int, Tuple[Any, Any]] = {}
+        self._ship_lock = threading.Lock()
+
+    def submit(self, query: Any, table: Any) -> "Future[Table]":
+        """Start `query.select(table)` on the pool and return its future."""
+        if not self.processes:
+            return self._pool.submit(_run, query, table)
+        if hasattr(table, "flush"):
+            table.flush()  # the worker reopens the file, so it must see every change
+            return self._pool.submit(_run, query, table)
+        version = _contents_version(table)
+        if version is None:
+            return self._pool.submit(_run, query, table)  # cannot tell when it changes: copy it every time
+        with self._ship_lock:
+            shipped = self._shipped.get(id(table))
+            if shipped is None or shipped[0] is not table or shipped[1] != version:
+                self._shipped[id(table)] = (table, version)
+                self._restart_pool()
+            return self._pool.submit(_run_shipped, query, id(table))
+
+    def _restart_pool(self) -> None:
+        """Start a pool whose workers each get a copy of every shipped table."""
+        old = self._pool
+        tables = {table_id: table for table_id, (table, _) in self._shipped.items()}
+        self._pool = ProcessPoolExecutor(self.max_workers, initializer=_install_tables, initargs=(tables,))
+        old.shutdown(wait=False)
+
+    def submit_all(self, batch: Iterable[Tuple[Any, Any]]) -> List["Future[Table]"]:
+        """Submit every (query, table) pair; the futures are in the same order."""
+        return [self.submit(query, table) for query, table in batch]
+
+    def map(self, batch: Iterable[Tuple[Any, Any]]) -> List[Table]:
+        """Run every (query, table) pair and return the result Tables in order."""
+        return [future.result() for future in self.submit_all(batch)]
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+        self._shipped.clear()
+
+    def __enter__(self) -> "QueryExecutor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
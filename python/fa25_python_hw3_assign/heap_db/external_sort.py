@@ -0,0 +1,167 @@
+"""
+external_sort.py: sort a stream of db tuples under a memory budget.
+
+Rows are collected into memory until the budget is reached, sorted, and
+written to a temporary file as a sorted run. The runs are then merged with a
+k-way heap merge, so memory use is bounded by the budget (plus one buffered
+row per run) no matter how large the input is. Inputs that fit the budget are
+sorted in memory and never touch disk.
+
+Runs store each row's value list with `marshal` rather than `DbTuple.serialize`,
+because the tuple format has no NULL encoding and nullable INT columns are common.
+"""
+
+import heapq
+import marshal
+import os
+import tempfile
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, List, Optional, Sequence
+from .schema import Schema
+from .db_tuple import DbTuple
+
+DEFAULT_MEMORY_BUDGET = 16 * 1024 * 1024  # 16 MiB
+MAX_MERGE_FAN_IN = 64
+
+# Rough per-row overhead of a DbTuple and its value list, on top of the payload.
+_ROW_OVERHEAD_BYTES = 120
+
+
+class _Descending:
+    """Wraps a sort key component so that it orders in reverse."""
+
+    __slots__ = ("key",)
+
+    def __init__(self, key: Any):
+        self.key = key
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return other.key < self.key
+
+    def __gt__(self, other: "_Descending") -> bool:
+        return other.key > self.key
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and self.key == other.key
+
+
+def sort_key(indexes: Sequence[int], descending: Optional[Sequence[bool]] = None) -> Callable[[DbTuple], Any]:
+    """
+    Return a key function ordering rows by the given column indexes, each
+    ascending unless the matching `descending` flag is set.
+    NULLs sort after every non-NULL value (so first when descending), and
+    compare equal to each other.
+    """
+    if descending is not None and any(descending):
+        flags = list(descending)
+
+        def mixed(row: DbTuple) -> Any:
+            values = row.values
+            return tuple(_Descending((values[i] is None, values[i])) if desc else (values[i] is None, values[i])
+                         for i, desc in zip(indexes, flags))
+        return mixed
+
+    if len(indexes) == 1:
+        i = indexes[0]
+
+        def single(row: DbTuple) -> Any:
+            v = row.values[i]
+            return (v is None, v)
+        return single
+
+    def composite(row: DbTuple) -> Any:
+        values = row.values
+        return tuple((values[i] is None, values[i]) for i in indexes)
+    return composite
+
+
+def is_sorted(rows: Iterable[DbTuple], key: Callable[[DbTuple], Any]) -> bool:
+    """Return True if `rows` is already in ascending `key` order (one sequential pass)."""
+    prev = None
+    first = True
+    for row in rows:
+        k = key(row)
+        if not first and k < prev:
+            return False
+        prev, first = k, False
+    return True
+
+
+def estimate_row_bytes(schema: Schema) -> int:
+    """Upper bound on the memory one row of `schema` occupies while sorting."""
+    return schema.get_db_tuple_size_in_bytes() + _ROW_OVERHEAD_BYTES
+
+
+class ExternalSorter:
+    """
+    Sorts rows of one schema, spilling sorted runs to temporary files when the
+    in-memory buffer would exceed `memory_budget` bytes.
+
+        sorter = ExternalSorter(schema, sort_key([1]), memory_budget=1 << 20)
+        for row in sorter.sort(table):
+            ...
+    """
+
+    def __init__(self, schema: Schema, key: Callable[[DbTuple], Any],
+                 memory_budget: int = DEFAULT_MEMORY_BUDGET, temp_dir: Optional[str] = None):
+        if memory_budget <= 0:
+            raise ValueError("memory_budget must be > 0.")
+        self.schema = schema
+        self.key = key
+        self.temp_dir = temp_dir
+        self.rows_per_run = max(1, memory_budget // estimate_row_bytes(schema))
+        self.runs_written = 0
+
+    def sort(self, rows: Iterable[DbTuple]) -> Iterator[DbTuple]:
+        """Yield `rows` in ascending key order. Temporary files are removed when the iterator finishes or is closed."""
+        runs: List[BinaryIO] = []
+        try:
+            buffer: List[DbTuple] = []
+            for row in rows:
+                buffer.append(row)
+                if len(buffer) >= self.rows_per_run:
+                    buffer.sort(key=self.key)
+                    runs.append(self._write_run(buffer))
+                    buffer = []
+
+            buffer.sort(key=self.key)
+            if not runs:
+                yield from buffer
+                return
+            if buffer:
+                runs.append(self._write_run(buffer))
+            del buffer
+
+            # Merge in passes until one pass can consume every remaining run.
+            while len(runs) > MAX_MERGE_FAN_IN:
+                merged: List[BinaryIO] = []
+                for start in range(0, len(runs), MAX_MERGE_FAN_IN):
+                    group = runs[start:start + MAX_MERGE_FAN_IN]
+                    merged.append(self._write_run(heapq.merge(*map(self._read_run, group), key=self.key)))
+                    for f in group:
+                        self._discard(f)
+                runs = merged
+
+            yield from heapq.merge(*map(self._read_run, runs), key=self.key)
+        finally:
+            for f in runs:
+                self._discard(f)
+
+    def _write_run(self, rows: Iterable[DbTuple]) -> BinaryIO:
+        f = tempfile.TemporaryFile(dir=self.temp_dir)
+        for row in rows:
+            marshal.dump(row.values, f)
+        f.flush()
+        self.runs_written += 1
+        return f
+
+    def _read_run(self, f: BinaryIO) -> Iterator[DbTuple]:
+        f.seek(0)
+        schema = self.schema
+        end = os.fstat(f.fileno()).st_size
+        while f.tell() < end:
+            yield DbTuple.from_trusted_values(schema, marshal.load(f))
+
+    @staticmethod
+    def _discard(f: BinaryIO) -> None:
+        if not f.closed:
+            f.close()
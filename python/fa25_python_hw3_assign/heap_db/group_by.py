@@ -0,0 +1,395 @@
+"""
+group_by.py: hash aggregation (GROUP BY) with COUNT, COUNT DISTINCT, SUM, MIN, MAX and AVG.
+
+    query = GroupByQuery(["dept_name"], [Aggregate("count"), Aggregate("avg", "salary")])
+    result = query.select(instructors)      # Table(dept_name, count, avg_salary)
+    for dept, n, avg in query.stream(instructors):
+        ...                                  # exact AVG values
+
+Input rows are read once. Each row's group key is looked up in a dict that
+maps it to one accumulator per aggregate, and the accumulators are updated in
+place, so no intermediate table is ever built.
+
+When the number of groups would exceed the memory budget, groups already in
+memory keep aggregating, but rows of new groups are hash-partitioned into
+temporary spill files (marshal-encoded, as in external_sort). After the input
+ends, the in-memory groups are emitted and each partition is aggregated the same
+way, recursively if it is still too large. In-memory groups come out in
+first-seen order, followed by the spilled ones; use ORDER BY for a defined order.
+
+Aggregates follow SQL: COUNT(*) counts rows, the others ignore NULLs, and SUM,
+MIN, MAX and AVG of no values are NULL. A query with no GROUP BY columns
+returns exactly one row, even for empty input. heap_db has no floating-point
+type, so the Table returned by `select` stores AVG rounded to the nearest
+integer; `stream` yields the exact values.
+"""
+
+from __future__ import annotations
+import marshal
+import os
+import tempfile
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from .schema import Schema, MAX_COLUMN_NAME_LENGTH
+from .table import Table
+from .db_tuple import DbTuple
+from .column_types import TypeVarchar
+from .query_conditions import Condition
+from .operators import Filter, Operator, Scan
+from .external_sort import DEFAULT_MEMORY_BUDGET
+
+AGGREGATE_FUNCTIONS = ("count", "count_distinct", "sum", "min", "max", "avg")
+
+# Spill fan-out per level, and how many times a partition may be re-partitioned.
+SPILL_PARTITIONS = 16
+MAX_SPILL_DEPTH = 4
+
+# Rough per-group memory: dict entry, key and accumulator objects.
+_GROUP_OVERHEAD_BYTES = 200
+_ACCUMULATOR_BYTES = 80
+
+
+@dataclass(frozen=True)
+class Aggregate:
+    """
+    One aggregate in a GroupByQuery, e.g. Aggregate("sum", "salary").
+    `column` is None only for COUNT(*). The output column is named `alias`,
+    or "<func>_<column>" ("count" for COUNT(*)) when no alias is given.
+    """
+    func: str
+    column: Optional[str] = None
+    alias: Optional[str] = None
+
+    def __post_init__(self):
+        func = self.func.lower()
+        if func not in AGGREGATE_FUNCTIONS:
+            raise ValueError(f"Unknown aggregate function '{self.func}'.")
+        if self.column is None and func != "count":
+            raise ValueError(f"Aggregate '{func}' needs a column.")
+        object.__setattr__(self, "func", func)
+
+    def output_name(self) -> str:
+        if self.alias is not None:
+            return self.alias
+        name = self.func if self.column is None else f"{self.func}_{self.column}"
+        return name[:MAX_COLUMN_NAME_LENGTH]
+
+    def __str__(self) -> str:
+        if self.func == "count_distinct":
+            return f"COUNT(DISTINCT {self.column})"
+        return f"{self.func.upper()}({'*' if self.column is None else self.column})"
+
+
+# ----- accumulators -----
+
+class _CountStar:
+    __slots__ = ("n",)
+
+    def __init__(self):
+        self.n = 0
+
+    def add(self, v: Any) -> None:
+        self.n += 1
+
+    def result(self) -> Any:
+        return self.n
+
+
+class _Count:
+    __slots__ = ("n",)
+
+    def __init__(self):
+        self.n = 0
+
+    def add(self, v: Any) -> None:
+        if v is not None:
+            self.n += 1
+
+    def result(self) -> Any:
+        return self.n
+
+
+class _CountDistinct:
+    __slots__ = ("seen",)
+
+    def __init__(self):
+        self.seen: set = set()
+
+    def add(self, v: Any) -> None:
+        if v is not None:
+            self.seen.add(v)
+
+    def result(self) -> Any:
+        return len(self.seen)
+
+
+class _Sum:
+    __slots__ = ("total",)
+
+    def __init__(self):
+        self.total: Any = None
+
+    def add(self, v: Any) -> None:
+        if v is not None:
+            self.total = v if self.total is None else self.total + v
+
+    def result(self) -> Any:
+        return self.total
+
+
+class _Min:
+    __slots__ = ("best",)
+
+    def __init__(self):
+        self.best: Any = None
+
+    def add(self, v: Any) -> None:
+        if v is not None and (self.best is None or v < self.best):
+            self.best = v
+
+    def result(self) -> Any:
+        return self.best
+
+
+class _Max:
+    __slots__ = ("best",)
+
+    def __init__(self):
+        self.best: Any = None
+
+    def add(self, v: Any) -> None:
+        if v is not None and (self.best is None or v > self.best):
+            self.best = v
+
+    def result(self) -> Any:
+        return self.best
+
+
+class _Avg:
+    __slots__ = ("total", "n")
+
+    def __init__(self):
+        self.total = 0
+        self.n = 0
+
+    def add(self, v: Any) -> None:
+        if v is not None:
+            self.total += v
+            self.n += 1
+
+    def result(self) -> Any:
+        return self.total / self.n if self.n else None
+
+
+_ACCUMULATORS = {"count_distinct": _CountDistinct, "sum": _Sum, "min": _Min, "max": _Max, "avg": _Avg}
+
+
+def _accumulator(agg: Aggregate) -> Callable[[], Any]:
+    if agg.func == "count":
+        return _CountStar if agg.column is None else _Count
+    return _ACCUMULATORS[agg.func]
+
+
+def _getter(indexes: Sequence[int]) -> Callable[[Sequence[Any]], Any]:
+    """Return a function extracting a hashable group key from a value list."""
+    if not indexes:
+        return lambda values: ()
+    if len(indexes) == 1:
+        return itemgetter(indexes[0])
+    return itemgetter(*indexes)
+
+
+class GroupByQuery:
+    """GROUP BY `group_by` computing `aggregates`, optionally filtered by `condition` and `having`."""
+
+    def __init__(self, group_by: Iterable[str], aggregates: Iterable[Aggregate],
+                 condition: Optional[Condition] = None, having: Optional[Condition] = None,
+                 memory_budget: int = DEFAULT_MEMORY_BUDGET, temp_dir: Optional[str] = None):
+        """
+        group_by: grouping column names (empty for one global group)
+        aggregates: the Aggregates to compute per group
+        condition: WHERE condition applied to input rows (None keeps every row)
+        having: condition on output columns applied to each group
+        """
+        if memory_budget <= 0:
+            raise ValueError("memory_budget must be > 0.")
+        self.group_by = [str(name) for name in group_by]
+        self.aggregates = list(aggregates)
+        if not self.group_by and not self.aggregates:
+            raise ValueError("GROUP BY needs grouping columns or aggregates.")
+        self.condition = condition
+        self.having = having
+        self.memory_budget = memory_budget
+        self.temp_dir = temp_dir
+        self.partitions_spilled = 0
+
+    def output_schema(self, schema: Schema) -> Schema:
+        """Return the schema of the result: the grouping columns, then one column per aggregate."""
+        out = schema.projection(self.group_by)
+        out.key = None
+        for agg in self.aggregates:
+            name = agg.output_name()
+            if agg.column is not None and schema.get_column_index(agg.column) == -1:
+                raise ValueError(f"Column '{agg.column}' not found in schema.")
+            col_type = None if agg.column is None else schema.get_type(schema.get_column_index(agg.column))
+            if agg.func in ("min", "max") and isinstance(col_type, TypeVarchar):
+                out.add_varchar_type(name, col_type.get_max_sql_length())
+            else:
+                out.add_int_type(name)
+        return out
+
+    # ----- execution -----
+
+    def _input(self, source: Any) -> Any:
+        if self.condition is None:
+            return source
+        if isinstance(source, Operator):
+            return Filter(source, self.condition)
+        # imported here because select_query imports the operator modules
+        from .select_query import SelectQuery
+        return SelectQuery(None, self.condition).plan(source)
+
+    def stream(self, source: Any) -> Iterator[List[Any]]:
+        """
+        Aggregate `source` (a table or an Operator) in one pass and yield one
+        value list per group, in output_schema order, with exact AVG values.
+        """
+        schema = source.get_schema()
+        out_schema = self.output_schema(schema)
+        group_indexes = [schema.get_column_index(name) for name in self.group_by]
+        input_indexes = [-1 if agg.column is None else schema.get_column_index(agg.column)
+                         for agg in self.aggregates]
+        # Spilled rows keep only the columns aggregation needs: group columns, then inputs.
+        needed = group_indexes + [i for i in input_indexes if i >= 0]
+        key_bytes = sum(schema.get_type(i).get_max_size_bytes() for i in group_indexes)
+        per_group = _GROUP_OVERHEAD_BYTES + key_bytes + _ACCUMULATOR_BYTES * len(self.aggregates)
+        self._max_groups = max(1, self.memory_budget // per_group)
+        self._factories = [_accumulator(agg) for agg in self.aggregates]
+
+        having = None if self.having is None else self.having.compile(out_schema)
+        source_rows = self._input(source)
+        used = list(dict.fromkeys(needed))
+        used_names = [schema.get_name(i) for i in used]
+        columns = None
+        if used and isinstance(source_rows, Scan):
+            columns = source_rows.scan_columns(used_names)
+        elif used and not isinstance(source_rows, Operator) and hasattr(source_rows, "scan_columns"):
+            columns = source_rows.scan_columns(used_names)  # an unfiltered column store
+        if columns is not None:
+            # a column store reads only the aggregated columns; renumber them by position in `used`
+            position = {i: n for n, i in enumerate(used)}
+            group_indexes = [position[i] for i in group_indexes]
+            input_indexes = [-1 if i < 0 else position[i] for i in input_indexes]
+            needed = [position[i] for i in needed]
+            rows: Iterable[Sequence[Any]] = columns
+        else:
+            rows = (row.values for row in source_rows)
+        groups = self._aggregate(rows, group_indexes, input_indexes, needed, 0)
+        if not self.group_by:
+            groups = iter(list(groups) or [[acc().result() for acc in self._factories]])
+        for values in groups:
+            if having is None or having(DbTuple.from_trusted_values(out_schema, values)):
+                yield values
+
+    def _aggregate(self, rows: Iterable[Sequence[Any]], group_indexes: List[int], input_indexes: List[int],
+                   needed: List[int], depth: int) -> Iterator[List[Any]]:
+        key_of = _getter(group_indexes)
+        factories = self._factories
+        inputs = list(zip(range(len(factories)), input_indexes))
+        groups: Dict[Any, List[Any]] = {}
+        max_groups = self._max_groups if depth < MAX_SPILL_DEPTH else float("inf")
+        spills: List[BinaryIO] = []
+        try:
+            for values in rows:
+                key = key_of(values)
+                accs = groups.get(key)
+                if accs is None:
+                    if len(groups) >= max_groups:
+                        if not spills:
+                            spills = [tempfile.TemporaryFile(dir=self.temp_dir) for _ in range(SPILL_PARTITIONS)]
+                            self.partitions_spilled += SPILL_PARTITIONS
+                        part = hash((depth, key)) % SPILL_PARTITIONS
+                        marshal.dump([values[i] for i in needed], spills[part])
+                        continue
+                    accs = groups[key] = [factory() for factory in factories]
+                for n, i in inputs:
+                    accs[n].add(values[i])
+
+            single = len(group_indexes) == 1
+            for key, accs in groups.items():
+                head = [key] if single else list(key)
+                yield head + [acc.result() for acc in accs]
+            del groups
+
+            # Spilled rows hold the group columns first, then each aggregate's input.
+            width = len(group_indexes)
+            spilled_groups = list(range(width))
+            spilled_inputs: List[int] = []
+            for i in input_indexes:
+                if i >= 0:
+                    spilled_inputs.append(width)
+                    width += 1
+                else:
+                    spilled_inputs.append(-1)
+            for f in spills:
+                yield from self._aggregate(self._read_spill(f), spilled_groups, spilled_inputs,
+                                           list(range(width)), depth + 1)
+                f.close()
+        finally:
+            for f in spills:
+                if not f.closed:
+                    f.close()
+
+    @staticmethod
+    def _read_spill(f: BinaryIO) -> Iterator[List[Any]]:
+        f.seek(0)
+        end = os.fstat(f.fileno()).st_size
+        while f.tell() < end:
+            yield marshal.load(f)
+
+    def plan(self, source: Any) -> "HashAggregate":
+        """Return the aggregation as an Operator, for use inside a larger pipeline."""
+        return HashAggregate(self, source)
+
+    def select(self, source: Any) -> Table:
+        """Run the aggregation and return the result as a new Table (AVG rounded to an integer)."""
+        return self.plan(source).to_table()
+
+    def __str__(self) -> str:
+        columns = ", ".join(self.group_by + [str(agg) for agg in self.aggregates])
+        text = f"select {columns}"
+        if self.condition is not None:
+            text += f" where {self.condition}"
+        if self.group_by:
+            text += f" group by {', '.join(self.group_by)}"
+        if self.having is not None:
+            text += f" having {self.having}"
+        return text
+
+
+class HashAggregate(Operator):
+    """Operator form of a GroupByQuery: yields one DbTuple per group, AVG rounded to an integer."""
+
+    def __init__(self, query: GroupByQuery, source: Any):
+        self.query = query
+        self.source = source
+        self.schema = query.output_schema(source.get_schema())
+        self._avg_columns = [len(query.group_by) + n for n, agg in enumerate(query.aggregates)
+                             if agg.func == "avg"]
+
+    def rows(self) -> Iterator[DbTuple]:
+        schema = self.schema
+        trusted = DbTuple.from_trusted_values
+        avg_columns = self._avg_columns
+        for values in self.query.stream(self.source):
+            for i in avg_columns:
+                if values[i] is not None:
+                    values[i] = int(round(values[i]))
+            yield trusted(schema, values)
+
+    def children(self) -> List[Operator]:
+        return [self.source] if isinstance(self.source, Operator) else []
+
+    def __str__(self) -> str:
+        return f"HashAggregate({self.query})"
@@ -0,0 +1,842 @@
+"""
+heap_file.py: a file-backed table stored as fixed-size slotted pages.
+
+File layout (all integers little-endian):
+
+    page 0            header page
+                      magic "HDB1" | page_size <I | page_count <I | row_count <Q
+                      | schema_len <I | Schema.serialize() bytes
+    page 1 .. n-1     slotted data pages
+
+Slotted page layout:
+
+    [0:2]   slot_count <H
+    [2:4]   free_end   <H   (records are packed downward from the end of the page)
+    [4:..]  slot directory, 4 bytes per slot: record offset <H | record length <H
+            (offset 0 marks an empty slot, since no record can start inside the header)
+    ...     free space
+    [free_end:page_size]  record bytes, each one a DbTuple.serialize() payload
+
+A record id (RID) is the pair (page_no, slot_no). Slots are never renumbered, so
+a RID stays valid until its record is deleted.
+"""
+
+import os
+from struct import pack_into, unpack_from
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from .schema import Schema
+from .db_tuple import DbTuple
+from .table import Table
+from .buffer_pool import BufferPool, get_buffer_pool
+from .btree import BPlusTree
+from .tuple_view import DbTupleView
+from .column_types import TypeInt, TypeVarchar
+from .locks import RWLock
+from .bloom import DEFAULT_FP_RATE, BloomFilter
+from .wal import DEFAULT_FLUSH_INTERVAL, OP_DELETE, OP_INSERT, WriteAheadLog, read_log
+
+PAGE_SIZE = 4096
+FILE_MAGIC = b"HDB1"
+
+# magic(4) | page_size | page_count | row_count | schema_len
+HEADER_FORMAT = "<4sIIQI"
+HEADER_SIZE = 24
+
+PAGE_HEADER_SIZE = 4
+SLOT_SIZE = 4
+
+RID = Tuple[int, int]
+
+
+class SlottedPage:
+    """
+    View over one slotted data page held in a bytearray.
+    All edits are made in place on the underlying buffer.
+    """
+
+    def __init__(self, data: bytearray):
+        self.data = data
+
+    @staticmethod
+    def format(page_size: int) -> bytearray:
+        """Return a freshly initialized, empty page."""
+        data = bytearray(page_size)
+        pack_into("<HH", data, 0, 0, page_size)
+        return data
+
+    def slot_count(self) -> int:
+        return unpack_from("<H", self.data, 0)[0]
+
+    def _free_end(self) -> int:
+        return unpack_from("<H", self.data, 2)[0]
+
+    def _set_header(self, slot_count: int, free_end: int) -> None:
+        pack_into("<HH", self.data, 0, slot_count, free_end)
+
+    def _slot(self, slot_no: int) -> Tuple[int, int]:
+        return unpack_from("<HH", self.data, PAGE_HEADER_SIZE + slot_no * SLOT_SIZE)
+
+    def _set_slot(self, slot_no: int, offset: int, length: int) -> None:
+        pack_into("<HH", self.data, PAGE_HEADER_SIZE + slot_no * SLOT_SIZE, offset, length)
+
+    def _directory_end(self, slot_count: int) -> int:
+        return PAGE_HEADER_SIZE + slot_count * SLOT_SIZE
+
+    def _find_empty_slot(self, slot_count: int) -> int:
+        for slot_no in range(slot_count):
+            if self._slot(slot_no)[0] == 0:
+                return slot_no
+        return -1
+
+    def _live_bytes(self) -> int:
+        return sum(length for offset, length in
+                   (self._slot(i) for i in range(self.slot_count())) if offset)
+
+    def can_fit(self, length: int) -> bool:
+        """Return True if a record of `length` bytes fits (possibly after compaction)."""
+        slot_count = self.slot_count()
+        needs_slot = self._find_empty_slot(slot_count) == -1
+        directory_end = self._directory_end(slot_count + (1 if needs_slot else 0))
+        return directory_end + self._live_bytes() + length <= len(self.data)
+
+    def insert(self, record: bytes) -> int:
+        """
+        Store `record` in the page and return its slot number, or -1 if it does not fit.
+        Records are appended while there is contiguous free space; once there is not,
+        empty slots left behind by deletes are reused and the page is compacted.
+        """
+        slot_count, free_end = unpack_from("<HH", self.data, 0)
+        if free_end - len(record) >= self._directory_end(slot_count + 1):
+            # fast path: enough contiguous space to append a new slot
+            offset = free_end - len(record)
+            self.data[offset:free_end] = record
+            self._set_slot(slot_count, offset, len(record))
+            self._set_header(slot_count + 1, offset)
+            return slot_count
+
+        if not self.can_fit(len(record)):
+            return -1
+
+        slot_no = self._find_empty_slot(slot_count)
+        if slot_no == -1:
+            slot_no = slot_count
+        new_count = max(slot_count, slot_no + 1)
+
+        free_end = self._free_end()
+        if free_end - len(record) < self._directory_end(new_count):
+            self.compact()
+            free_end = self._free_end()
+
+        offset = free_end - len(record)
+        self.data[offset:free_end] = record
+        self._set_slot(slot_no, offset, len(record))
+        self._set_header(new_count, offset)
+        return slot_no
+
+    def put(self, slot_no: int, record: bytes) -> bool:
+        """
+        Store `record` in the given slot, replacing what is there and growing the
+        slot directory if needed (used by WAL redo). Return False if it does not fit.
+        """
+        slot_count = self.slot_count()
+        if slot_no < slot_count:
+            self.delete(slot_no)
+        new_count = max(slot_count, slot_no + 1)
+        if self._directory_end(new_count) + self._live_bytes() + len(record) > len(self.data):
+            return False
+
+        free_end = self._free_end()
+        if free_end - len(record) < self._directory_end(new_count):
+            self.compact()
+            free_end = self._free_end()
+        for empty in range(slot_count, new_count):
+            self._set_slot(empty, 0, 0)
+        offset = free_end - len(record)
+        self.data[offset:free_end] = record
+        self._set_slot(slot_no, offset, len(record))
+        self._set_header(new_count, offset)
+        return True
+
+    def get(self, slot_no: int) -> Optional[memoryview]:
+        """Return the record bytes stored in `slot_no`, or None if the slot is empty."""
+        if slot_no < 0 or slot_no >= self.slot_count():
+            return None
+        offset, length = self._slot(slot_no)
+        if offset == 0:
+            return None
+        return memoryview(self.data)[offset:offset + length]
+
+    def delete(self, slot_no: int) -> bool:
+        """Mark `slot_no` empty. The record bytes are reclaimed by the next compaction."""
+        if slot_no < 0 or slot_no >= self.slot_count():
+            return False
+        if self._slot(slot_no)[0] == 0:
+            return False
+        self._set_slot(slot_no, 0, 0)
+        return True
+
+    def live_count(self) -> int:
+        """Return the number of occupied slots."""
+        return sum(1 for slot_no in range(self.slot_count()) if self._slot(slot_no)[0])
+
+    def records(self) -> Iterator[Tuple[int, memoryview]]:
+        """Yield (slot_no, record bytes) for every occupied slot, in slot order."""
+        view = memoryview(self.data)
+        for slot_no in range(self.slot_count()):
+            offset, length = self._slot(slot_no)
+            if offset:
+                yield slot_no, view[offset:offset + length]
+
+    def compact(self) -> None:
+        """Slide live records to the end of the page so that free space is contiguous."""
+        slot_count = self.slot_count()
+        live = []
+        for slot_no in range(slot_count):
+            offset, length = self._slot(slot_no)
+            if offset:
+                live.append((slot_no, bytes(self.data[offset:offset + length])))
+
+        free_end = len(self.data)
+        for slot_no, record in live:
+            free_end -= len(record)
+            self.data[free_end:free_end + len(record)] = record
+            self._set_slot(slot_no, free_end, len(record))
+        self._set_header(slot_count, free_end)
+
+
+class HeapFileTable:
+    """
+    A table whose rows live in a heap file on disk instead of a Python list.
+
+    Exposes the same API as `Table` (insert/delete/lookup_by_key/lookup_by_column/
+    iteration). The schema is stored in the header page, so reopening an existing
+    file needs only the path. Data pages are read and written through a `BufferPool`
+    (the shared default pool unless one is passed in):
+
+        table = HeapFileTable("players.tbl", schema)   # create
+        table.close()
+        table = HeapFileTable("players.tbl")           # reopen
+
+    Writers take a reader/writer lock exclusively; lookups take it shared, and
+    scans take it shared one page at a time, so a long scan never holds it
+    while the caller processes rows.
+
+    With wal=True, inserts and deletes are logged to "<path>.wal" and survive a
+    crash (see wal.py). Opening a table whose log was left behind by a crash
+    replays the log first, whether or not the reopened table is logged.
+
+    With read_only=True the file is opened for reading only: no recovery runs,
+    any log is left alone, and insert/delete raise ValueError. Process pool
+    workers open tables this way (see executor.py), next to the owner's handle.
+    """
+
+    def __init__(self, path: str, schema: Optional[Schema] = None, page_size: int = PAGE_SIZE,
+                 buffer_pool: Optional[BufferPool] = None, wal: bool = False,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, read_only: bool = False):
+        """
+        Open the heap file at `path`, creating it with `schema` if it does not exist.
+        When opening an existing file, a passed schema must match the stored one.
+        `flush_interval` is the write-ahead log's group-commit interval in seconds.
+        """
+        self.path = path
+        self.read_only = read_only
+        self.pool = buffer_pool if buffer_pool is not None else get_buffer_pool()
+        # Primary-key hash index (key -> RID), built by one scan on first use.
+        self._key_index: Optional[Dict[Any, RID]] = None
+        # Secondary B+tree indexes: column name -> (column index, tree of value -> RID).
+        self._indexes: Dict[str, Tuple[int, BPlusTree]] = {}
+        # Bloom filters: column name -> (column index, filter, false positive rate), consulted before lookups.
+        self._blooms: Dict[str, Tuple[int, BloomFilter, float]] = {}
+        # Column statistics from analyze(), persisted in a sidecar file next to the table.
+        self.statistics: Optional[Any] = None
+        self.wal: Optional[WriteAheadLog] = None
+        self._lock = RWLock()
+
+        if read_only:
+            if wal:
+                raise ValueError("Error: a read-only table cannot have a write-ahead log.")
+            if not (os.path.exists(path) and os.path.getsize(path) > 0):
+                raise ValueError(f"Error: '{path}' does not exist. Cannot open it read-only.")
+            self.file = open(path, "rb")
+            self._read_header(schema)
+            self._read_statistics()
+        elif os.path.exists(path) and os.path.getsize(path) > 0:
+            self.file = open(path, "r+b")
+            self._read_header(schema)
+            self._read_statistics()
+            self._recover()
+        else:
+            if schema is None:
+                raise ValueError(f"Error: '{path}' does not exist and no schema was given.")
+            if not (256 <= page_size <= 32768):
+                raise ValueError("page_size must be between 256 and 32768 bytes.")
+            self.schema = schema
+            self.page_size = page_size
+            self.page_count = 1
+            self.row_count = 0
+            self._check_record_fits()
+            self.file = open(path, "w+b")
+            if os.path.exists(self._wal_path()):
+                os.remove(self._wal_path())  # left over from an earlier file at this path
+            self._write_header()
+        self.wal = WriteAheadLog(self._wal_path(), flush_interval) if wal else None
+
+    # ----- header / catalog -----
+
+    def _check_writable(self, action: str) -> None:
+        if self.read_only:
+            raise ValueError(f"Error: '{self.path}' is open read-only. Cannot {action}.")
+
+    def _check_record_fits(self) -> None:
+        max_record = self.schema.get_db_tuple_size_in_bytes()
+        if PAGE_HEADER_SIZE + SLOT_SIZE + max_record > self.page_size:
+            raise ValueError(f"Rows of up to {max_record} bytes do not fit in a {self.page_size}-byte page.")
+
+    def _read_header(self, schema: Optional[Schema]) -> None:
+        self.file.seek(0)
+        fixed = self.file.read(HEADER_SIZE)
+        if len(fixed) < HEADER_SIZE:
+            raise ValueError(f"Error: '{self.path}' is not a heap file (truncated header).")
+        magic, page_size, page_count, row_count, schema_len = unpack_from(HEADER_FORMAT, fixed, 0)
+        if magic != FILE_MAGIC:
+            raise ValueError(f"Error: '{self.path}' is not a heap file.")
+
+        stored = Schema.deserialize(self.file.read(schema_len))
+        if schema is not None:
+            if schema.serialize() != stored.serialize():
+                raise ValueError("Error: schema does not match the schema stored in the heap file.")
+            stored = schema
+
+        self.schema = stored
+        self.page_size = page_size
+        self.page_count = page_count
+        self.row_count = row_count
+
+    def _write_header(self) -> None:
+        schema_bytes = self.schema.serialize()
+        if HEADER_SIZE + len(schema_bytes) > self.page_size:
+            raise ValueError("Schema does not fit in the header page.")
+        header = bytearray(self.page_size)
+        pack_into(HEADER_FORMAT, header, 0, FILE_MAGIC, self.page_size,
+                  self.page_count, self.row_count, len(schema_bytes))
+        header[HEADER_SIZE:HEADER_SIZE + len(schema_bytes)] = schema_bytes
+        self.write_page(0, header)
+
+    def _stats_path(self) -> str:
+        return self.path + ".stats"
+
+    def _read_statistics(self) -> None:
+        if os.path.exists(self._stats_path()):
+            from .statistics import AnalyzedStats  # local import: statistics imports the planner
+            self.statistics = AnalyzedStats.load(self._stats_path())
+
+    def analyze(self, sample_size: Optional[int] = None) -> Any:
+        """
+        Compute per-column statistics (see statistics.py) in one pass and save
+        them to "<path>.stats", where reopening the table finds them again.
+        """
+        self._check_writable("analyze")
+        from .statistics import DEFAULT_SAMPLE_SIZE, analyze  # local import: statistics imports the planner
+        self.statistics = analyze(self, sample_size or DEFAULT_SAMPLE_SIZE)
+        self.statistics.save(self._stats_path())
+        return self.statistics
+
+    # ----- write-ahead log -----
+
+    def _wal_path(self) -> str:
+        return self.path + ".wal"
+
+    def _recover(self) -> None:
+        """
+        Redo the changes in a log left behind by a crash, then checkpoint.
+
+        Each RID ends up as its last log record says: holding the logged row
+        image, or empty after a delete. Slots the log does not mention have not
+        changed since the last checkpoint. Pages written before the crash may
+        already contain some of the changes, so redo sets slots rather than
+        re-inserting rows, and replaying the same log twice is harmless.
+        """
+        final: Dict[RID, Optional[bytes]] = {}
+        for op, rid, record in read_log(self._wal_path()):
+            final[rid] = record if op == OP_INSERT else None
+        if final:
+            by_page: Dict[int, List[Tuple[int, Optional[bytes]]]] = {}
+            for (page_no, slot_no), record in final.items():
+                by_page.setdefault(page_no, []).append((slot_no, record))
+            on_disk = os.path.getsize(self.path) // self.page_size
+            self.page_count = max(self.page_count, max(by_page) + 1)
+            for page_no in range(on_disk, self.page_count):
+                self.write_page(page_no, SlottedPage.format(self.page_size))  # allocated, never written
+
+            for page_no, slots in sorted(by_page.items()):
+                data = self.read_page(page_no)
+                page = SlottedPage(data)
+                for slot_no, record in slots:
+                    if record is None:
+                        page.delete(slot_no)
+                for slot_no, record in slots:
+                    if record is not None and not page.put(slot_no, record):
+                        raise ValueError(f"Error: cannot redo slot {slot_no} of page {page_no} of '{self.path}'.")
+                self.write_page(page_no, data)
+
+            self.row_count = sum(SlottedPage(self.read_page(page_no)).live_count()
+                                 for page_no in range(1, self.page_count))
+            self._write_header()
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        if os.path.exists(self._wal_path()):
+            os.remove(self._wal_path())
+
+    # ----- page I/O (called by the buffer pool) -----
+
+    def read_page(self, page_no: int) -> bytearray:
+        """
+        Read one page straight from disk. Reads and writes are positioned (no
+        shared file offset), so the buffer pool can read pages from several
+        threads at once.
+        """
+        data = bytearray(os.pread(self.file.fileno(), self.page_size, page_no * self.page_size))
+        if len(data) != self.page_size:
+            raise ValueError(f"Error: short read on page {page_no} of '{self.path}'.")
+        return data
+
+    def write_page(self, page_no: int, data: bytearray) -> None:
+        """Write one page straight to disk, forcing the write-ahead log first."""
+        if self.wal is not None and self.wal.pending():
+            self.wal.sync()
+        os.pwrite(self.file.fileno(), data, page_no * self.page_size)
+
+    def _allocate_page(self) -> int:
+        """Append an empty data page. It is cached dirty and reaches disk on write-back."""
+        page_no = self.page_count
+        self.pool.new_page(self, page_no, SlottedPage.format(self.page_size))
+        self.pool.unpin_page(self, page_no)
+        self.page_count += 1
+        return page_no
+
+    # ----- record access -----
+
+    def _records(self) -> Iterator[Tuple[RID, memoryview]]:
+        """Yield (rid, record bytes) for every stored row, in page/slot order."""
+        for page_no in range(1, self.page_count):
+            with self.pool.page(self, page_no) as data:
+                for slot_no, record in SlottedPage(data).records():
+                    yield (page_no, slot_no), record
+
+    def _decode(self, record: memoryview) -> DbTuple:
+        return self.schema.get_codec().decode(record)
+
+    def _fetch(self, rid: RID) -> Optional[DbTuple]:
+        page_no, slot_no = rid
+        with self.pool.page(self, page_no) as data:
+            record = SlottedPage(data).get(slot_no)
+            return None if record is None else self._decode(record)
+
+    def _key_rids(self) -> Dict[Any, RID]:
+        """Return the primary-key index, scanning the file once to build it if needed."""
+        if self._key_index is None:
+            key_column = self.schema.get_column_index(self.schema.key)
+            self._key_index = {self._decode(record).values[key_column]: rid
+                               for rid, record in self._records()}
+        return self._key_index
+
+    # ----- Table API -----
+
+    def get_schema(self) -> Schema:
+        """Return the schema of the table."""
+        return self.schema
+
+    def size(self) -> int:
+        """Return the number of db tuples (rows) in the table."""
+        return self.row_count
+
+    def flush(self) -> None:
+        """
+        Write back dirty pages and the header page, then push buffered writes to the OS.
+        A logged table also fsyncs the data file and empties its log (a checkpoint).
+        A read-only table has nothing to write, so flushing it does nothing.
+        """
+        if self.read_only:
+            return
+        with self._lock.write():
+            self.pool.flush_file(self)
+            self._write_header()
+            self.file.flush()
+            if self.wal is not None:
+                os.fsync(self.file.fileno())
+                self.wal.truncate()
+
+    def sync(self) -> None:
+        """Wait until every logged change is durable (the commit point under group commit)."""
+        if self.wal is not None:
+            self.wal.sync()
+
+    def close(self) -> None:
+        """Flush, release this table's cached pages and close the underlying file."""
+        with self._lock.write():
+            if self.file.closed:
+                return
+            self.flush()  # a no-op when read-only
+            self.pool.drop_file(self)
+            self.file.close()
+            if self.wal is not None:
+                self.wal.close()
+                os.remove(self._wal_path())
+
+    def __reduce__(self):
+        # pickled for process pools (see executor.py): the worker reopens the file by path,
+        # read-only, so it never replays or removes the log of the owner's open table
+        return _open_read_only, (self.path,)
+
+    def insert(self, rec: DbTuple) -> bool:
+        """
+        Insert a db tuple into the table.
+        Follows `Table.insert`: returns False if the primary key already exists.
+        """
+        if rec.get_schema() is not self.schema:
+            raise ValueError("Error: db tuple schema object does not match table schema (must reuse the same Schema instance).")
+        self._check_writable("insert")
+
+        with self._lock.write():
+            if self.schema.key is None:
+                rid = self._store(rec.serialize())
+            else:
+                key_rids = self._key_rids()
+                key = rec.get_key()
+                if key in key_rids:
+                    return False
+                rid = key_rids[key] = self._store(rec.serialize())
+
+            for col_index, tree in self._indexes.values():
+                tree.insert(rec.values[col_index], rid)
+            for col_index, bloom, _ in self._blooms.values():
+                bloom.add(rec.values[col_index])
+            self.row_count += 1
+            self._grow_blooms()
+        self._commit()
+        return True
+
+    def insert_many(self, rows: Iterable[DbTuple]) -> int:
+        """
+        Bulk-insert db tuples. Rows are encoded in one batch with the schema's
+        codec and written into the tail page while it stays pinned, so the pool is
+        visited once per page rather than once per row. A db tuple whose key
+        already exists is skipped.
+
+        :return: the number of db tuples inserted
+        """
+        self._check_writable("insert")
+        batch: List[DbTuple] = []
+        for rec in rows:
+            if rec.schema is not self.schema:
+                raise ValueError("Error: db tuple schema object does not match table schema (must reuse the same Schema instance).")
+            batch.append(rec)
+
+        with self._lock.write():
+            batch = self._new_keys(batch)
+            if not batch:
+                return 0
+            buf, offsets = self.schema.get_codec().serialize_many(batch)
+            view = memoryview(buf)
+            records = [view[offsets[n]:offsets[n + 1]] for n in range(len(batch))]
+            self._append_records(records, [rec.values for rec in batch])
+        self._commit()
+        return len(batch)
+
+    def insert_serialized(self, buf: Any, offsets: Sequence[int]) -> int:
+        """
+        Bulk-insert records already encoded with this schema's codec, as returned
+        by `RecordCodec.serialize_many` (record i spans offsets[i]:offsets[i + 1]).
+        The bytes are copied into pages as they are; only the key and indexed
+        columns are decoded. Records whose key already exists are skipped.
+
+        :return: the number of records inserted
+        """
+        self._check_writable("insert")
+        with self._lock.write():
+            view = memoryview(buf)
+            rows = [DbTupleView(self.schema, view[offsets[n]:offsets[n + 1]]) for n in range(len(offsets) - 1)]
+            rows = self._new_keys(rows)
+            if rows:
+                self._append_records([row._buf for row in rows], rows)
+        if rows:
+            self._commit()
+        return len(rows)
+
+    def _commit(self) -> None:
+        # outside the table lock, so that concurrent writers can share one log fsync
+        if self.wal is not None:
+            self.wal.commit()
+
+    def _new_keys(self, rows: List[Any]) -> List[Any]:
+        """Drop rows whose key is already stored or repeats an earlier row in `rows`."""
+        if self.schema.key is None:
+            return rows
+        key_rids = self._key_rids()
+        key_column = self.schema.get_column_index(self.schema.key)
+        seen = set()
+        kept = []
+        for row in rows:
+            key = row.values[key_column]
+            if key in key_rids or key in seen:
+                continue
+            seen.add(key)
+            kept.append(row)
+        return kept
+
+    def _append_records(self, records: List[memoryview], values: List[Sequence[Any]]) -> None:
+        """Append encoded records, keeping the tail page pinned, and index them."""
+        key_rids = self._key_rids() if self.schema.key is not None else None
+        key_column = self.schema.get_column_index(self.schema.key) if key_rids is not None else -1
+        wal = self.wal
+        blooms = [(col_index, bloom) for col_index, bloom, _ in self._blooms.values()]
+
+        page_no = self.page_count - 1
+        if page_no < 1:
+            page_no = self._allocate_page()
+        data = self.pool.fetch_page(self, page_no)
+        try:
+            for record, row in zip(records, values):
+                slot_no = SlottedPage(data).insert(record)
+                if slot_no == -1:
+                    self.pool.unpin_page(self, page_no, dirty=True)
+                    page_no = self._allocate_page()
+                    data = self.pool.fetch_page(self, page_no)
+                    slot_no = SlottedPage(data).insert(record)
+                rid = (page_no, slot_no)
+                if wal is not None:
+                    wal.append(OP_INSERT, rid, record)
+                if key_rids is not None:
+                    key_rids[row[key_column]] = rid
+                for col_index, tree in self._indexes.values():
+                    tree.insert(row[col_index], rid)
+                for col_index, bloom in blooms:
+                    bloom.add(row[col_index])
+                self.row_count += 1
+        finally:
+            self.pool.unpin_page(self, page_no, dirty=True)
+        self._grow_blooms()
+
+    def _store(self, record: bytes) -> RID:
+        """Place a record on the last data page, starting a new page when it is full."""
+        page_no = self.page_count - 1
+        slot_no = -1
+        if page_no >= 1:
+            data = self.pool.fetch_page(self, page_no)
+            slot_no = SlottedPage(data).insert(record)
+            if slot_no == -1:
+                self.pool.unpin_page(self, page_no)
+
+        if slot_no == -1:
+            page_no = self._allocate_page()
+            data = self.pool.fetch_page(self, page_no)
+            slot_no = SlottedPage(data).insert(record)
+        try:
+            # logged while the page is pinned, so the pool cannot write it back ahead of its record
+            if self.wal is not None:
+                self.wal.append(OP_INSERT, (page_no, slot_no), record)
+        finally:
+            self.pool.unpin_page(self, page_no, dirty=True)
+        return page_no, slot_no
+
+    def delete(self, key: object) -> bool:
+        """
+        Delete a db tuple given the primary key value.
+        :return: True if deletion succeeds, False if key not found
+        """
+        if self.schema.key is None:
+            raise ValueError("Error: table does not have a primary key. Cannot delete.")
+        self._check_writable("delete")
+
+        with self._lock.write():
+            rid = self._key_rids().pop(key, None)
+            if rid is None:
+                return False
+
+            if self._indexes:
+                row = self._fetch(rid)
+                for col_index, tree in self._indexes.values():
+                    tree.remove(row.values[col_index], rid)
+
+            page_no, slot_no = rid
+            with self.pool.page(self, page_no, dirty=True) as data:
+                SlottedPage(data).delete(slot_no)
+                if self.wal is not None:
+                    self.wal.append(OP_DELETE, rid)  # before the unpin, as in _store
+            self.row_count -= 1
+        self._commit()
+        return True
+
+    def lookup_by_key(self, key: object) -> Optional[DbTuple]:
+        """
+        Return the db tuple with the given primary key value, or None if no such db tuple exists.
+        """
+        if self.schema.key is None:
+            raise ValueError("Error: table does not have a primary key. Cannot lookup.")
+
+        if not self.might_contain(self.schema.key, key):
+            return None
+        with self._lock.read():
+            rid = self._key_rids().get(key)
+            return None if rid is None else self._fetch(rid)
+
+    def lookup_by_column(self, colname: str, value: object) -> Table:
+        """
+        Return an in-memory Table holding the db tuples that satisfy colname=value.
+        """
+        col_index = self.schema.get_column_index(colname)
+        if col_index < 0:
+            raise ValueError(f"Error: table does not contain column '{colname}'.")
+
+        result_table = Table(self.schema)
+        if not self.might_contain(colname, value):
+            return result_table
+        indexed = self.index_lookup(colname, value)
+        for t in indexed if indexed is not None else self:
+            if t.get(col_index) == value:
+                result_table.insert(t)
+        return result_table
+
+    def create_index(self, colname: str) -> None:
+        """
+        Build an ordered B+tree secondary index (value -> RID) on an INT or VARCHAR column.
+        The index lives in memory and is rebuilt by calling create_index after reopening.
+        """
+        col_index = self.schema.get_column_index(colname)
+        if col_index < 0:
+            raise ValueError(f"Error: table does not contain column '{colname}'.")
+        if not isinstance(self.schema.get_type(col_index), (TypeInt, TypeVarchar)):
+            raise ValueError(f"Error: column '{colname}' has a type that cannot be indexed.")
+
+        with self._lock.write():
+            if colname in self._indexes:
+                return
+
+            tree = BPlusTree()
+            for rid, record in self._records():
+                tree.insert(self._decode(record).values[col_index], rid)
+            self._indexes[colname] = (col_index, tree)
+
+    def has_index(self, colname: str) -> bool:
+        """Return True if a secondary index exists on `colname`."""
+        return colname in self._indexes
+
+    def create_bloom_filter(self, colname: Optional[str] = None, fp_rate: float = DEFAULT_FP_RATE) -> None:
+        """
+        Build a Bloom filter (see bloom.py) on `colname`, the primary key if None.
+        lookup_by_key, index_lookup and lookup_by_column then answer values the
+        filter rules out without taking the lock, walking an index or reading
+        pages. Inserts keep the filter up to date, and it is rebuilt twice as
+        large when the table outgrows it. Like indexes, filters live in memory.
+        """
+        if colname is None:
+            colname = self.schema.key
+            if colname is None:
+                raise ValueError("Error: table does not have a primary key. Give a column for the Bloom filter.")
+        col_index = self.schema.get_column_index(colname)
+        if col_index < 0:
+            raise ValueError(f"Error: table does not contain column '{colname}'.")
+
+        with self._lock.write():
+            self._blooms[colname] = (col_index, self._build_bloom(col_index, fp_rate), fp_rate)
+
+    def _build_bloom(self, col_index: int, fp_rate: float) -> BloomFilter:
+        decode_values = self.schema.get_codec().decode_values
+        return BloomFilter.of((decode_values(record)[0][col_index] for _, record in self._records()),
+                              capacity=max(1024, 2 * self.row_count), fp_rate=fp_rate)
+
+    def _grow_blooms(self) -> None:
+        """Rebuild filters that hold more values than they were sized for. Caller holds the write lock."""
+        for colname, (col_index, bloom, fp_rate) in list(self._blooms.items()):
+            if bloom.is_full():
+                self._blooms[colname] = (col_index, self._build_bloom(col_index, fp_rate), fp_rate)
+
+    def might_contain(self, colname: str, value: object) -> bool:
+        """False if the Bloom filter on `colname` rules `value` out; True otherwise, or with no filter."""
+        entry = self._blooms.get(colname)
+        return entry is None or entry[1].might_contain(value)
+
+    def index_lookup(self, colname: str, value: object) -> Optional[List[DbTuple]]:
+        """
+        Return the db tuples with colname == value using the secondary index,
+        or None if `colname` is not indexed. Only the matching records are read.
+        """
+        if colname in self._indexes and not self.might_contain(colname, value):
+            return []
+        with self._lock.read():
+            entry = self._indexes.get(colname)
+            if entry is None:
+                return None
+            try:
+                rids = entry[1].search(value)
+            except TypeError:
+                return []
+            return [self._fetch(rid) for rid in rids]
+
+    def index_range(self, colname: str, low: Any = None, high: Any = None,
+                    low_inclusive: bool = True, high_inclusive: bool = True) -> Optional[List[DbTuple]]:
+        """
+        Return the db tuples with low <= colname <= high (None bounds are open)
+        in column order using the secondary index, or None if `colname` is not
+        indexed. Only the matching records are read.
+        """
+        with self._lock.read():
+            entry = self._indexes.get(colname)
+            if entry is None:
+                return None
+            try:
+                rids = [rid for _, rid in entry[1].range(low, high, low_inclusive, high_inclusive)]
+            except TypeError:
+                return []
+            return [self._fetch(rid) for rid in rids]
+
+    def scan(self, predicate: Optional[Callable[[DbTuple], bool]] = None) -> Iterator[DbTuple]:
+        """
+        Yield the db tuples that satisfy `predicate` (every db tuple if None).
+
+        The predicate is evaluated on a DbTupleView over the record bytes in the
+        buffer pool, so only the columns it reads are decoded; a full DbTuple is
+        built only for rows that match.
+        """
+        if predicate is None:
+            yield from self
+            return
+        schema = self.schema
+        for page_no in range(1, self.page_count):
+            # decode under the read lock, then yield with no lock held
+            with self._lock.read(), self.pool.page(self, page_no) as data:
+                matches = []
+                for _, record in SlottedPage(data).records():
+                    view = DbTupleView(schema, record)
+                    if predicate(view):
+                        matches.append(view.to_tuple())
+            yield from matches
+
+    def __iter__(self) -> Iterator[DbTuple]:
+        """
+        Return an iterator over the table's db tuples, decoded from disk one
+        page at a time under the read lock.
+        """
+        decode = self._decode
+        for page_no in range(1, self.page_count):
+            with self._lock.read(), self.pool.page(self, page_no) as data:
+                rows = [decode(record) for _, record in SlottedPage(data).records()]
+            yield from rows
+
+    def __enter__(self) -> "HeapFileTable":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the table.
+        """
+        if self.row_count == 0:
+            return "Empty Table"
+        return "\n".join(str(t) for t in self)
+
+
+def _open_read_only(path: str) -> HeapFileTable:
+    return HeapFileTable(path, read_only=True)
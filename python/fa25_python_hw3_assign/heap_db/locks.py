@@ -0,0 +1,110 @@
+"""
+locks.py: a reader/writer lock for tables shared between threads.
+
+    lock = RWLock()
+    with lock.read():      # many readers at once
+        ...
+    with lock.write():     # one writer, no readers
+        ...
+
+Writers are preferred: once a writer is waiting, new readers wait behind it,
+so a steady stream of queries cannot starve inserts. Both locks are
+reentrant: a reader may take the read lock again, and the thread holding the
+write lock may take either lock, without deadlocking. A thread holding only
+the read lock must not ask for the write lock.
+"""
+
+import threading
+from typing import Any, Callable, Optional
+
+
+class RWLock:
+    """Writer-preferring reader/writer lock."""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer: Optional[int] = None  # thread id of the writer
+        self._writer_depth = 0
+        self._waiting_writers = 0
+        self._held = threading.local()  # read locks held by the current thread
+        self._read_guard = _Guard(self.acquire_read, self.release_read)
+        self._write_guard = _Guard(self.acquire_write, self.release_write)
+
+    def acquire_read(self) -> None:
+        held = getattr(self._held, "reads", 0)
+        if held:
+            self._held.reads = held + 1  # nested read: do not queue behind a waiting writer
+            return
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._writer_depth += 1  # a writer reading its own table
+                return
+            while self._writer is not None or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        self._held.reads = 1
+
+    def release_read(self) -> None:
+        held = getattr(self._held, "reads", 0)
+        if held > 1:
+            self._held.reads = held - 1
+            return
+        with self._cond:
+            if not held:
+                if self._writer != threading.get_ident():
+                    raise RuntimeError("release_read called by a thread that does not hold the read lock.")
+                self._writer_depth -= 1
+                return
+            self._held.reads = 0
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self) -> None:
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._writer_depth += 1
+                return
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._writer_depth = 1
+
+    def release_write(self) -> None:
+        with self._cond:
+            if self._writer != threading.get_ident():
+                raise RuntimeError("release_write called by a thread that does not hold the write lock.")
+            self._writer_depth -= 1
+            if self._writer_depth == 0:
+                self._writer = None
+                self._cond.notify_all()
+
+    def read(self) -> "_Guard":
+        """Context manager holding the read lock."""
+        return self._read_guard
+
+    def write(self) -> "_Guard":
+        """Context manager holding the write lock."""
+        return self._write_guard
+
+
+class _Guard:
+    # a plain class rather than @contextmanager: these are taken once per page or index probe
+    __slots__ = ("_acquire", "_release")
+
+    def __init__(self, acquire: Callable[[], None], release: Callable[[], None]):
+        self._acquire = acquire
+        self._release = release
+
+    def __enter__(self) -> None:
+        self._acquire()
+
+    def __exit__(self, *exc: Any) -> None:
+        self._release()
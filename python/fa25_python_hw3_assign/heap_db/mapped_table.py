@@ -0,0 +1,292 @@
+"""
+mapped_table.py: open a heap file read-only through mmap.
+
+    teams = MappedTable("teams.tbl")          # no pages are read here
+    for t in teams.scan(predicate): ...
+    teams.close()
+
+A MappedTable maps the whole file (see heap_file.py for the layout) instead
+of reading pages through a BufferPool. Slot directories are read with
+unpack_from straight from the mapping, rows are decoded from it in place, and
+predicates see DbTupleViews over memoryview slices of it, so scans make no
+per-page reads and no copies. Opening only reads the header. Processes that
+map the same file share the operating system's one cached copy of it.
+
+The table is read-only: insert and delete raise ValueError. The file should
+not change while it is mapped, so open it after the writer has closed (or
+flushed) its HeapFileTable. A file with a write-ahead log left behind needs
+recovery and is refused; open it once as a HeapFileTable first.
+"""
+
+import mmap
+import os
+from struct import unpack_from
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from .schema import Schema
+from .db_tuple import DbTuple
+from .table import Table
+from .btree import BPlusTree
+from .tuple_view import DbTupleView
+from .column_types import TypeInt, TypeVarchar
+from .heap_file import FILE_MAGIC, HEADER_FORMAT, HEADER_SIZE, PAGE_HEADER_SIZE, RID, SLOT_SIZE
+
+
+class MappedTable:
+    """
+    A read-only table over a memory-mapped heap file.
+
+    Exposes the read side of the `Table` API (iteration, scan, lookup_by_key,
+    lookup_by_column, secondary indexes). Indexes are built in memory as for
+    HeapFileTable.
+    """
+
+    def __init__(self, path: str, schema: Optional[Schema] = None):
+        """
+        Map the heap file at `path`. A passed schema must match the stored one
+        and is then used for the rows, as in HeapFileTable.
+        """
+        self.path = path
+        if os.path.exists(path + ".wal"):
+            raise ValueError(f"Error: '{path}' has an unrecovered write-ahead log; open it as a HeapFileTable first.")
+        self.file = open(path, "rb")
+        try:
+            if os.fstat(self.file.fileno()).st_size < HEADER_SIZE:
+                raise ValueError(f"Error: '{path}' is not a heap file (truncated header).")
+            self._map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self.file.close()
+            raise
+        self._view = memoryview(self._map)
+        self._key_index: Optional[Dict[Any, RID]] = None
+        self._indexes: Dict[str, Tuple[int, BPlusTree]] = {}
+        self.statistics: Optional[Any] = None
+        try:
+            self._read_header(schema)
+        except BaseException:
+            self.close()
+            raise
+        if os.path.exists(path + ".stats"):
+            from .statistics import AnalyzedStats  # local import: statistics imports the planner
+            self.statistics = AnalyzedStats.load(path + ".stats")
+
+    def _read_header(self, schema: Optional[Schema]) -> None:
+        magic, page_size, page_count, row_count, schema_len = unpack_from(HEADER_FORMAT, self._map, 0)
+        if magic != FILE_MAGIC:
+            raise ValueError(f"Error: '{self.path}' is not a heap file.")
+        if len(self._map) < page_count * page_size:
+            raise ValueError(f"Error: '{self.path}' is shorter than its header says; flush the table first.")
+
+        stored = Schema.deserialize(bytes(self._view[HEADER_SIZE:HEADER_SIZE + schema_len]))
+        if schema is not None:
+            if schema.serialize() != stored.serialize():
+                raise ValueError("Error: schema does not match the schema stored in the heap file.")
+            stored = schema
+
+        self.schema = stored
+        self.page_size = page_size
+        self.page_count = page_count
+        self.row_count = row_count
+
+    # ----- record access -----
+
+    def _page_records(self, page_no: int) -> Iterator[Tuple[int, int, int]]:
+        """Yield (slot_no, offset, length) for every occupied slot of a page; offsets are into the file."""
+        mapping = self._map
+        base = page_no * self.page_size
+        slot_count = unpack_from("<H", mapping, base)[0]
+        slot = base + PAGE_HEADER_SIZE
+        for slot_no in range(slot_count):
+            offset, length = unpack_from("<HH", mapping, slot + slot_no * SLOT_SIZE)
+            if offset:
+                yield slot_no, base + offset, length
+
+    def _records(self) -> Iterator[Tuple[RID, int, int]]:
+        """Yield (rid, offset, length) for every stored row, in page/slot order."""
+        for page_no in range(1, self.page_count):
+            for slot_no, offset, length in self._page_records(page_no):
+                yield (page_no, slot_no), offset, length
+
+    def _fetch(self, rid: RID) -> Optional[DbTuple]:
+        page_no, slot_no = rid
+        if not 1 <= page_no < self.page_count:
+            return None
+        base = page_no * self.page_size
+        if slot_no < 0 or slot_no >= unpack_from("<H", self._map, base)[0]:
+            return None
+        offset = unpack_from("<H", self._map, base + PAGE_HEADER_SIZE + slot_no * SLOT_SIZE)[0]
+        return None if offset == 0 else self.schema.get_codec().decode(self._map, base + offset)
+
+    def _key_rids(self) -> Dict[Any, RID]:
+        """Return the primary-key index, scanning the file once to build it if needed."""
+        if self._key_index is None:
+            key_column = self.schema.get_column_index(self.schema.key)
+            decode_values = self.schema.get_codec().decode_values
+            self._key_index = {decode_values(self._map, offset)[0][key_column]: rid
+                               for rid, offset, _ in self._records()}
+        return self._key_index
+
+    def read_page(self, page_no: int) -> bytes:
+        """Return a copy of one page."""
+        if not 0 <= page_no < self.page_count:
+            raise ValueError(f"Error: page {page_no} is out of range for '{self.path}'.")
+        return bytes(self._view[page_no * self.page_size:(page_no + 1) * self.page_size])
+
+    # ----- Table API -----
+
+    def get_schema(self) -> Schema:
+        """Return the schema of the table."""
+        return self.schema
+
+    def size(self) -> int:
+        """Return the number of db tuples (rows) in the table."""
+        return self.row_count
+
+    def flush(self) -> None:
+        """Nothing to write back; present so that code which flushes tables accepts this one."""
+
+    def close(self) -> None:
+        """Unmap and close the file. Rows already returned stay valid; they own their values."""
+        if self.file.closed:
+            return
+        self._view.release()
+        self._map.close()
+        self.file.close()
+
+    def __reduce__(self):
+        # pickled for process pools: the worker maps the file again by path
+        return MappedTable, (self.path,)
+
+    def insert(self, rec: DbTuple) -> bool:
+        raise ValueError(f"Error: '{self.path}' is mapped read-only. Cannot insert.")
+
+    def insert_many(self, rows: Iterable[DbTuple]) -> int:
+        raise ValueError(f"Error: '{self.path}' is mapped read-only. Cannot insert.")
+
+    def delete(self, key: object) -> bool:
+        raise ValueError(f"Error: '{self.path}' is mapped read-only. Cannot delete.")
+
+    def analyze(self, sample_size: Optional[int] = None) -> Any:
+        """Compute per-column statistics (see statistics.py). They are kept in memory, not saved."""
+        from .statistics import DEFAULT_SAMPLE_SIZE, analyze  # local import: statistics imports the planner
+        self.statistics = analyze(self, sample_size or DEFAULT_SAMPLE_SIZE)
+        return self.statistics
+
+    def lookup_by_key(self, key: object) -> Optional[DbTuple]:
+        """
+        Return the db tuple with the given primary key value, or None if no such db tuple exists.
+        """
+        if self.schema.key is None:
+            raise ValueError("Error: table does not have a primary key. Cannot lookup.")
+        rid = self._key_rids().get(key)
+        return None if rid is None else self._fetch(rid)
+
+    def lookup_by_column(self, colname: str, value: object) -> Table:
+        """
+        Return an in-memory Table holding the db tuples that satisfy colname=value.
+        """
+        col_index = self.schema.get_column_index(colname)
+        if col_index < 0:
+            raise ValueError(f"Error: table does not contain column '{colname}'.")
+
+        result_table = Table(self.schema)
+        indexed = self.index_lookup(colname, value)
+        for t in indexed if indexed is not None else self:
+            if t.get(col_index) == value:
+                result_table.insert(t)
+        return result_table
+
+    def create_index(self, colname: str) -> None:
+        """
+        Build an ordered B+tree secondary index (value -> RID) on an INT or VARCHAR column.
+        The index lives in memory only; the file is never written.
+        """
+        col_index = self.schema.get_column_index(colname)
+        if col_index < 0:
+            raise ValueError(f"Error: table does not contain column '{colname}'.")
+        if not isinstance(self.schema.get_type(col_index), (TypeInt, TypeVarchar)):
+            raise ValueError(f"Error: column '{colname}' has a type that cannot be indexed.")
+        if colname in self._indexes:
+            return
+
+        decode_values = self.schema.get_codec().decode_values
+        tree = BPlusTree()
+        for rid, offset, _ in self._records():
+            tree.insert(decode_values(self._map, offset)[0][col_index], rid)
+        self._indexes[colname] = (col_index, tree)
+
+    def has_index(self, colname: str) -> bool:
+        """Return True if a secondary index exists on `colname`."""
+        return colname in self._indexes
+
+    def index_lookup(self, colname: str, value: object) -> Optional[List[DbTuple]]:
+        """
+        Return the db tuples with colname == value using the secondary index,
+        or None if `colname` is not indexed.
+        """
+        entry = self._indexes.get(colname)
+        if entry is None:
+            return None
+        try:
+            rids = entry[1].search(value)
+        except TypeError:
+            return []
+        return [self._fetch(rid) for rid in rids]
+
+    def index_range(self, colname: str, low: Any = None, high: Any = None,
+                    low_inclusive: bool = True, high_inclusive: bool = True) -> Optional[List[DbTuple]]:
+        """
+        Return the db tuples with low <= colname <= high (None bounds are open)
+        in column order using the secondary index, or None if `colname` is not indexed.
+        """
+        entry = self._indexes.get(colname)
+        if entry is None:
+            return None
+        try:
+            rids = [rid for _, rid in entry[1].range(low, high, low_inclusive, high_inclusive)]
+        except TypeError:
+            return []
+        return [self._fetch(rid) for rid in rids]
+
+    def scan(self, predicate: Optional[Callable[[DbTuple], bool]] = None) -> Iterator[DbTuple]:
+        """
+        Yield the db tuples that satisfy `predicate` (every db tuple if None).
+
+        The predicate is evaluated on a DbTupleView over a slice of the mapping,
+        so only the columns it reads are decoded; a full DbTuple is built only
+        for rows that match.
+        """
+        if predicate is None:
+            yield from self
+            return
+        schema = self.schema
+        view = self._view
+        for page_no in range(1, self.page_count):
+            # collect a page of matches first, so no slice of the mapping is alive while suspended
+            matches = []
+            for _, offset, length in self._page_records(page_no):
+                row = DbTupleView(schema, view[offset:offset + length])
+                if predicate(row):
+                    matches.append(row.to_tuple())
+            row = None
+            yield from matches
+
+    def __iter__(self) -> Iterator[DbTuple]:
+        """Return an iterator over the table's db tuples, decoded straight from the mapping."""
+        decode = self.schema.get_codec().decode
+        mapping = self._map
+        for _, offset, _ in self._records():
+            yield decode(mapping, offset)
+
+    def __enter__(self) -> "MappedTable":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the table.
+        """
+        if self.row_count == 0:
+            return "Empty Table"
+        return "\n".join(str(t) for t in self)
@@ -0,0 +1,450 @@
+"""
+operators.py: pull-based (iterator) query operators.
+
+Each operator has an output `schema` and yields DbTuples when iterated,
+pulling rows from its child one at a time:
+
+    plan = Limit(Project(Filter(Scan(census), EqualsCondition("sex", "Female")), ["usid", "age"]), 20)
+    for row in plan:          # stops reading census after the 20th match
+        ...
+    result = plan.to_table()  # or materialize into a Table
+
+Nothing is computed until the plan is iterated, no intermediate result is
+materialized except the build side of a Join, and a Limit stops its input as
+soon as it has enough rows. Iterating a plan a second time runs it again.
+"""
+
+from __future__ import annotations
+import heapq
+from abc import ABC, abstractmethod
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from .schema import Schema
+from .table import Table
+from .db_tuple import DbTuple
+from .query_conditions import Condition
+from .external_sort import DEFAULT_MEMORY_BUDGET, ExternalSorter, estimate_row_bytes, sort_key
+
+# An ORDER BY term: a column name (ascending) or (column name, descending).
+SortSpec = Union[str, Tuple[str, bool]]
+
+
+class Operator(ABC):
+    """Base class for query operators: an iterable of DbTuples with an output schema."""
+
+    schema: Schema
+    # Output cardinality estimated by the planner, shown by explain().
+    estimated_rows: Optional[float] = None
+
+    def __iter__(self) -> Iterator[DbTuple]:
+        return self.rows()
+
+    @abstractmethod
+    def rows(self) -> Iterator[DbTuple]:
+        """Yield the operator's output rows."""
+        ...
+
+    def get_schema(self) -> Schema:
+        """Return the schema of the rows this operator yields."""
+        return self.schema
+
+    def children(self) -> List["Operator"]:
+        return []
+
+    def to_table(self) -> Table:
+        """Run the plan and collect its rows into an in-memory Table."""
+        result = Table(self.schema)
+        result.insert_many(self)
+        return result
+
+    def explain(self, depth: int = 0) -> str:
+        """Return the plan as an indented tree, one operator per line."""
+        line = "  " * depth + str(self)
+        if self.estimated_rows is not None:
+            line += f"  (rows={self.estimated_rows:.0f})"
+        lines = [line]
+        lines.extend(child.explain(depth + 1) for child in self.children())
+        return "\n".join(lines)
+
+
+class Scan(Operator):
+    """Yield the rows of a table (Table, ColumnarTable or HeapFileTable), optionally filtered while scanning."""
+
+    def __init__(self, table: Any, predicate: Optional[Callable[[DbTuple], bool]] = None):
+        self.table = table
+        self.schema = table.get_schema()
+        self.predicate = predicate
+
+    def rows(self) -> Iterator[DbTuple]:
+        return iter(self.table.scan(self.predicate))
+
+    def scan_columns(self, col_names: Sequence[str]) -> Optional[Iterator[Tuple[Any, ...]]]:
+        """
+        Yield just the named columns of the matching rows, as tuples, when the
+        table stores columns separately (ColumnarTable, CompressedTable) and so
+        can skip the others; return None for tables that cannot.
+        """
+        if not hasattr(self.table, "scan_columns"):
+            return None
+        return self.table.scan_columns(col_names, self.predicate)
+
+    def __str__(self) -> str:
+        return "Scan" if self.predicate is None else "Scan(filtered)"
+
+
+class IndexScan(Operator):
+    """Yield the rows with column == value, using the primary-key index or a secondary index."""
+
+    def __init__(self, table: Any, column: str, value: Any):
+        if not IndexScan.supports(table, column):
+            raise ValueError(f"Error: no index on column '{column}'.")
+        self.table = table
+        self.schema = table.get_schema()
+        self.column = column
+        self.value = value
+
+    @staticmethod
+    def supports(table: Any, column: str) -> bool:
+        """Return True if `table` can answer column == value from an index."""
+        return column == table.get_schema().get_key() or table.has_index(column)
+
+    def rows(self) -> Iterator[DbTuple]:
+        if self.column == self.schema.get_key():
+            row = self.table.lookup_by_key(self.value)
+            return iter(() if row is None else (row,))
+        return iter(self.table.index_lookup(self.column, self.value))
+
+    def __str__(self) -> str:
+        return f"IndexScan({self.column} = {self.value!r})"
+
+
+class MultiIndexScan(Operator):
+    """Yield the rows with column IN values: one index probe per distinct value, in `values` order."""
+
+    def __init__(self, table: Any, column: str, values: Iterable[Any]):
+        if not IndexScan.supports(table, column):
+            raise ValueError(f"Error: no index on column '{column}'.")
+        self.table = table
+        self.schema = table.get_schema()
+        self.column = column
+        self.values = list(dict.fromkeys(values))
+
+    def rows(self) -> Iterator[DbTuple]:
+        for value in self.values:
+            yield from IndexScan(self.table, self.column, value)
+
+    def __str__(self) -> str:
+        return f"MultiIndexScan({self.column} IN {len(self.values)} values)"
+
+
+class IndexRangeScan(Operator):
+    """
+    Yield the rows with low <= column <= high in column order, walking the
+    leaves of a secondary B+tree index. A None bound is open; the inclusive
+    flags make a bound strict.
+    """
+
+    def __init__(self, table: Any, column: str, low: Any = None, high: Any = None,
+                 low_inclusive: bool = True, high_inclusive: bool = True):
+        if not IndexRangeScan.supports(table, column):
+            raise ValueError(f"Error: no ordered index on column '{column}'.")
+        self.table = table
+        self.schema = table.get_schema()
+        self.column = column
+        self.low, self.high = low, high
+        self.low_inclusive, self.high_inclusive = low_inclusive, high_inclusive
+
+    @staticmethod
+    def supports(table: Any, column: str) -> bool:
+        """Return True if `table` has an ordered (B+tree) index on `column`."""
+        return table.has_index(column)
+
+    def rows(self) -> Iterator[DbTuple]:
+        return iter(self.table.index_range(self.column, self.low, self.high,
+                                           self.low_inclusive, self.high_inclusive))
+
+    def __str__(self) -> str:
+        low = "-inf" if self.low is None else repr(self.low)
+        high = "+inf" if self.high is None else repr(self.high)
+        return (f"IndexRangeScan({low} {'<=' if self.low_inclusive else '<'} {self.column} "
+                f"{'<=' if self.high_inclusive else '<'} {high})")
+
+
+class Filter(Operator):
+    """Yield the child's rows that satisfy a Condition (compiled once) or a plain predicate."""
+
+    def __init__(self, child: Operator, condition: Union[Condition, Callable[[DbTuple], bool]]):
+        self.child = child
+        self.schema = child.schema
+        self.condition = condition
+        if isinstance(condition, Condition):
+            self.predicate = condition.compile(self.schema)
+        else:
+            self.predicate = condition
+
+    def rows(self) -> Iterator[DbTuple]:
+        return filter(self.predicate, self.child)
+
+    def children(self) -> List[Operator]:
+        return [self.child]
+
+    def __str__(self) -> str:
+        return f"Filter({self.condition})" if isinstance(self.condition, Condition) else "Filter"
+
+
+class Project(Operator):
+    """Yield the given columns of each child row, in `col_names` order."""
+
+    def __init__(self, child: Operator, col_names: Iterable[str]):
+        self.child = child
+        self.col_names = [str(name) for name in col_names]
+        src = child.schema
+        self.schema = src.projection(self.col_names)
+        self._indexes = [src.get_column_index(name) for name in self.col_names]
+
+    def rows(self) -> Iterator[DbTuple]:
+        schema = self.schema
+        trusted = DbTuple.from_trusted_values
+        if isinstance(self.child, Scan):
+            columns = self.child.scan_columns(self.col_names)
+            if columns is not None:
+                return (trusted(schema, list(values)) for values in columns)
+        indexes = self._indexes
+        if len(indexes) == 1:
+            i = indexes[0]
+            return (trusted(schema, [row.values[i]]) for row in self.child)
+        getter = itemgetter(*indexes)
+        return (trusted(schema, list(getter(row.values))) for row in self.child)
+
+    def children(self) -> List[Operator]:
+        return [self.child]
+
+    def __str__(self) -> str:
+        return f"Project({', '.join(self.col_names)})"
+
+
+class Join(Operator):
+    """
+    Natural join as a streaming hash join: the right input is loaded into a
+    hash table keyed on the common columns, then left rows are pulled one at a
+    time and probe it. Output order is nested-loop order (left order, then
+    right order among each left row's matches), the same as
+    SelectQuery.natural_join. With no common columns it is the Cartesian product.
+    """
+
+    def __init__(self, left: Operator, right: Operator):
+        # imported here because select_query imports this module
+        from .select_query import _join_columns, _key_getter
+        self.left = left
+        self.right = right
+        self.schema = left.schema.natural_join(right.schema)
+        left_keys, right_keys, self._right_cols = _join_columns(left.schema, right.schema, self.schema)
+        self._left_key = _key_getter(left_keys) if left_keys else None
+        self._right_key = _key_getter(right_keys) if right_keys else None
+
+    def rows(self) -> Iterator[DbTuple]:
+        schema = self.schema
+        trusted = DbTuple.from_trusted_values
+        right_cols = self._right_cols
+
+        if self._left_key is None:
+            tails = [[r.values[j] for j in right_cols] for r in self.right]
+            for r1 in self.left:
+                for tail in tails:
+                    yield trusted(schema, r1.values + tail)
+            return
+
+        right_key = self._right_key
+        buckets: Dict[Any, List[List[Any]]] = {}
+        for r2 in self.right:
+            buckets.setdefault(right_key(r2.values), []).append([r2.values[j] for j in right_cols])
+        left_key = self._left_key
+        for r1 in self.left:
+            for tail in buckets.get(left_key(r1.values), ()):
+                yield trusted(schema, r1.values + tail)
+
+    def children(self) -> List[Operator]:
+        return [self.left, self.right]
+
+    def __str__(self) -> str:
+        return "HashJoin"
+
+
+class IndexNestedLoopJoin(Operator):
+    """
+    Natural join that probes an index of the inner table once per outer row
+    instead of reading the whole inner table: the primary-key index or a
+    secondary index on `column`, one of the common columns. Any other common
+    columns, and an optional `predicate` on inner rows, are checked per match.
+    Output rows have the same columns as Join(outer, Scan(table)). When the
+    inner table has a Bloom filter on `column` (see
+    HeapFileTable.create_bloom_filter), its lookups answer the outer values the
+    filter rules out without touching the index.
+    """
+
+    def __init__(self, outer: Operator, table: Any, column: str,
+                 predicate: Optional[Callable[[DbTuple], bool]] = None):
+        # imported here because select_query imports this module
+        from .select_query import _join_columns
+        if not IndexScan.supports(table, column):
+            raise ValueError(f"Error: no index on column '{column}'.")
+        self.outer = outer
+        self.table = table
+        self.column = column
+        self.predicate = predicate
+        inner_schema = table.get_schema()
+        self.schema = outer.schema.natural_join(inner_schema)
+        left_keys, right_keys, self._right_cols = _join_columns(outer.schema, inner_schema, self.schema)
+        probe = inner_schema.get_column_index(column)
+        if probe not in right_keys:
+            raise ValueError(f"Error: '{column}' is not a join column.")
+        self._outer_probe = left_keys[right_keys.index(probe)]
+        self._checks = [(l, r) for l, r in zip(left_keys, right_keys) if r != probe]
+        self._by_key = column == inner_schema.get_key()
+
+    def _matches(self, value: Any) -> List[DbTuple]:
+        if self._by_key:
+            row = self.table.lookup_by_key(value)
+            return [] if row is None else [row]
+        return self.table.index_lookup(self.column, value)
+
+    def rows(self) -> Iterator[DbTuple]:
+        schema = self.schema
+        trusted = DbTuple.from_trusted_values
+        right_cols, checks, predicate = self._right_cols, self._checks, self.predicate
+        probe = self._outer_probe
+        for r1 in self.outer:
+            v1 = r1.values
+            for r2 in self._matches(v1[probe]):
+                v2 = r2.values
+                if any(v1[l] != v2[r] for l, r in checks):
+                    continue
+                if predicate is not None and not predicate(r2):
+                    continue
+                yield trusted(schema, v1 + [v2[j] for j in right_cols])
+
+    def children(self) -> List[Operator]:
+        return [self.outer]
+
+    def __str__(self) -> str:
+        return f"IndexNestedLoopJoin({self.column})"
+
+
+class MergeJoin(Operator):
+    """
+    Natural join that sorts both inputs on the common columns with
+    ExternalSorter (spilling past `memory_budget`) and merges them, so neither
+    input has to fit in memory. Output comes out in join-key order, with the
+    same columns as Join(left, right).
+    """
+
+    def __init__(self, left: Operator, right: Operator,
+                 memory_budget: int = DEFAULT_MEMORY_BUDGET, temp_dir: Optional[str] = None):
+        # imported here because select_query imports this module
+        from .select_query import _join_columns
+        self.left = left
+        self.right = right
+        self.schema = left.schema.natural_join(right.schema)
+        self._left_keys, self._right_keys, self._right_cols = _join_columns(left.schema, right.schema, self.schema)
+        if not self._left_keys:
+            raise ValueError("Error: merge join needs at least one common column.")
+        self.memory_budget = memory_budget
+        self.temp_dir = temp_dir
+
+    def rows(self) -> Iterator[DbTuple]:
+        from .select_query import _merge_join
+        schema = self.schema
+        trusted = DbTuple.from_trusted_values
+        right_cols = self._right_cols
+        left_key, right_key = sort_key(self._left_keys), sort_key(self._right_keys)
+        left = ExternalSorter(self.left.schema, left_key, self.memory_budget, self.temp_dir).sort(self.left)
+        right = ExternalSorter(self.right.schema, right_key, self.memory_budget, self.temp_dir).sort(self.right)
+        for r1, r2 in _merge_join(left, right, left_key, right_key):
+            yield trusted(schema, r1.values + [r2.values[j] for j in right_cols])
+
+    def children(self) -> List[Operator]:
+        return [self.left, self.right]
+
+    def __str__(self) -> str:
+        return "MergeJoin"
+
+
+class Limit(Operator):
+    """Yield at most `count` rows of the child, then stop pulling from it."""
+
+    def __init__(self, child: Operator, count: int):
+        if count < 0:
+            raise ValueError("Limit count must be >= 0.")
+        self.child = child
+        self.schema = child.schema
+        self.count = count
+
+    def rows(self) -> Iterator[DbTuple]:
+        if self.count == 0:
+            return
+        it = iter(self.child)
+        try:
+            for row in islice(it, self.count):
+                yield row
+        finally:
+            # release the input now (e.g. a page pinned by a heap file scan)
+            close = getattr(it, "close", None)
+            if close is not None:
+                close()
+
+    def children(self) -> List[Operator]:
+        return [self.child]
+
+    def __str__(self) -> str:
+        return f"Limit({self.count})"
+
+
+class OrderBy(Operator):
+    """
+    Yield the child's rows sorted on `keys` (ORDER BY), optionally only the first `limit`.
+
+    - with a limit whose rows fit the memory budget: a bounded heap keeps the
+      best `limit` rows seen so far (O(n log limit), one pass, no full sort)
+    - otherwise: ExternalSorter, which sorts in memory when the input fits
+      and spills sorted runs to temporary files when it does not
+
+    Column names are resolved to indexes once, here. The sort is stable, and
+    NULLs sort last ascending and first descending.
+    """
+
+    def __init__(self, child: Operator, keys: Sequence[SortSpec], limit: Optional[int] = None,
+                 memory_budget: int = DEFAULT_MEMORY_BUDGET, temp_dir: Optional[str] = None):
+        if not keys:
+            raise ValueError("ORDER BY needs at least one column.")
+        if limit is not None and limit < 0:
+            raise ValueError("Limit count must be >= 0.")
+        self.child = child
+        self.schema = child.schema
+        self.keys = [(key, False) if isinstance(key, str) else (key[0], bool(key[1])) for key in keys]
+        indexes = []
+        for name, _ in self.keys:
+            index = self.schema.get_column_index(name)
+            if index == -1:
+                raise ValueError(f"Column '{name}' not found.")
+            indexes.append(index)
+        self.key = sort_key(indexes, [desc for _, desc in self.keys])
+        self.limit = limit
+        self.memory_budget = memory_budget
+        self.temp_dir = temp_dir
+
+    def rows(self) -> Iterator[DbTuple]:
+        limit = self.limit
+        if limit == 0:
+            return iter(())
+        if limit is not None and limit * estimate_row_bytes(self.schema) <= self.memory_budget:
+            return iter(heapq.nsmallest(limit, self.child, key=self.key))
+        rows = ExternalSorter(self.schema, self.key, self.memory_budget, self.temp_dir).sort(self.child)
+        return rows if limit is None else islice(rows, limit)
+
+    def children(self) -> List[Operator]:
+        return [self.child]
+
+    def __str__(self) -> str:
+        terms = ", ".join(f"{name} DESC" if desc else name for name, desc in self.keys)
+        return f"TopK({self.limit}; {terms})" if self.limit is not None else f"OrderBy({terms})"
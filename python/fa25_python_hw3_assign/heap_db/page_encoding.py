@@ -0,0 +1,222 @@
+"""
+page_encoding.py: compact encodings for the values of one column in one page.
+
+A record stores every INT in 4 bytes and every VARCHAR as a 4-byte length plus
+its bytes. Within a page, a column usually needs far less:
+
+- bitpack: INTs stored as (value - min) in just enough bits for max - min
+  (frame of reference), so ages 17..90 take 7 bits each
+- rle: runs of equal values stored as (value, run length) pairs, both bit-packed
+- dict: the distinct values stored once, and each row stored as the bit-packed
+  (or run-length encoded) index of its value, for low-cardinality columns
+  such as sex, race or workclass
+- plain: VARCHARs with bit-packed lengths followed by their UTF-8 bytes
+
+`encode_column` tries the encodings that can pay off for the values at hand and
+keeps the smallest; `decode_column` reverses it. A column block is
+
+    flags <B> | null bitmap (1 bit per row, if flags & HAS_NULLS) | value block
+
+and a value block is an encoding byte followed by that encoding's body. The
+row count is not stored; the caller keeps it (see compressed_table.py).
+"""
+
+import sys
+from array import array
+from itertools import groupby, repeat
+from struct import Struct
+from typing import Any, List, Sequence, Tuple
+
+BITPACK = 1
+RLE = 2
+DICT = 3
+PLAIN = 4  # VARCHAR only
+
+ENCODING_NAMES = {BITPACK: "bitpack", RLE: "rle", DICT: "dict", PLAIN: "plain"}
+
+HAS_NULLS = 1
+
+_FRAME = Struct("<iB")  # base (the minimum) | bit width
+_COUNT = Struct("<I")
+# widths that fall on byte boundaries are packed with array instead of bit by bit
+_ALIGNED = {8: "B", 16: "H", 32: "I"}
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+# ----- bit packing -----
+
+def _pack_bits(values: Sequence[int], width: int) -> bytes:
+    """Pack non-negative ints of at most `width` bits, value i at bit i * width (little-endian)."""
+    if width == 0 or not values:
+        return b""
+    code = _ALIGNED.get(width)
+    if code is not None:
+        packed = array(code, values)
+        if _BIG_ENDIAN:
+            packed.byteswap()
+        return packed.tobytes()
+    # one big int built from a bit string: linear, unlike shifting values in one at a time
+    bits = "".join(format(v, f"0{width}b") for v in reversed(values))
+    return int(bits, 2).to_bytes((len(values) * width + 7) // 8, "little")
+
+
+def _unpack_bits(buf: Any, offset: int, n: int, width: int) -> Tuple[List[int], int]:
+    if width == 0:
+        return [0] * n, offset
+    end = offset + (n * width + 7) // 8
+    code = _ALIGNED.get(width)
+    if code is not None:
+        unpacked = array(code)
+        unpacked.frombytes(buf[offset:end])
+        if _BIG_ENDIAN:
+            unpacked.byteswap()
+        return unpacked.tolist(), end
+    bits = format(int.from_bytes(buf[offset:end], "little"), f"0{n * width}b")
+    # value i sits `width` bits left of value i - 1, so walk the string from its right end
+    return [int(bits[i:i + width], 2) for i in range(len(bits) - width, -1, -width)], end
+
+
+def _encode_frame(values: Sequence[int]) -> bytes:
+    base = min(values) if values else 0
+    width = (max(values) - base).bit_length() if values else 0
+    offsets = [v - base for v in values] if base else values
+    return _FRAME.pack(base, width) + _pack_bits(offsets, width)
+
+
+def _decode_frame(buf: Any, offset: int, n: int) -> Tuple[List[int], int]:
+    base, width = _FRAME.unpack_from(buf, offset)
+    values, offset = _unpack_bits(buf, offset + _FRAME.size, n, width)
+    if base:
+        values = [v + base for v in values]
+    return values, offset
+
+
+# ----- value blocks -----
+
+def _runs(values: Sequence[Any]) -> Tuple[List[Any], List[int]]:
+    run_values: List[Any] = []
+    run_lengths: List[int] = []
+    for value, run in groupby(values):
+        run_values.append(value)
+        run_lengths.append(sum(1 for _ in run))
+    return run_values, run_lengths
+
+
+def _dictionary(values: Sequence[Any]) -> Tuple[List[Any], List[int]]:
+    distinct = sorted(set(values))
+    code_of = {value: code for code, value in enumerate(distinct)}
+    return distinct, [code_of[v] for v in values]
+
+
+def _encode_ints(values: Sequence[int], allow_dict: bool = True) -> bytes:
+    candidates = [bytes([BITPACK]) + _encode_frame(values)]
+    run_values, run_lengths = _runs(values)
+    if len(run_values) * 2 <= len(values):
+        candidates.append(bytes([RLE]) + _COUNT.pack(len(run_values))
+                          + _encode_frame(run_values) + _encode_frame(run_lengths))
+    if allow_dict and len(set(values)) * 2 <= len(values):
+        distinct, codes = _dictionary(values)
+        candidates.append(bytes([DICT]) + _COUNT.pack(len(distinct))
+                          + _encode_frame(distinct) + _encode_ints(codes, allow_dict=False))
+    return min(candidates, key=len)
+
+
+def _decode_ints(buf: Any, offset: int, n: int) -> Tuple[List[int], int]:
+    encoding = buf[offset]
+    offset += 1
+    if encoding == BITPACK:
+        return _decode_frame(buf, offset, n)
+    (count,) = _COUNT.unpack_from(buf, offset)
+    offset += _COUNT.size
+    if encoding == RLE:
+        run_values, offset = _decode_frame(buf, offset, count)
+        run_lengths, offset = _decode_frame(buf, offset, count)
+        values: List[int] = []
+        for value, length in zip(run_values, run_lengths):
+            values.extend(repeat(value, length))
+        return values, offset
+    if encoding == DICT:
+        distinct, offset = _decode_frame(buf, offset, count)
+        codes, offset = _decode_ints(buf, offset, n)
+        return [distinct[code] for code in codes], offset
+    raise ValueError(f"Error: unknown INT encoding {encoding}.")
+
+
+def _encode_plain_strings(values: Sequence[str]) -> bytes:
+    encoded = [v.encode("utf-8") for v in values]
+    return _encode_frame([len(b) for b in encoded]) + b"".join(encoded)
+
+
+def _decode_plain_strings(buf: Any, offset: int, n: int) -> Tuple[List[str], int]:
+    lengths, offset = _decode_frame(buf, offset, n)
+    end = offset + sum(lengths)
+    data = bytes(buf[offset:end])
+    text = data.decode("utf-8")
+    # ASCII text has one character per byte, so the byte lengths can slice the str directly
+    source: Any = text if len(text) == len(data) else data
+    values = []
+    start = 0
+    for length in lengths:
+        values.append(source[start:start + length])
+        start += length
+    if source is data:
+        values = [v.decode("utf-8") for v in values]
+    return values, end
+
+
+def _encode_strings(values: Sequence[str]) -> bytes:
+    plain = bytes([PLAIN]) + _encode_plain_strings(values)
+    if len(set(values)) * 2 > len(values):
+        return plain
+    distinct, codes = _dictionary(values)
+    dictionary = (bytes([DICT]) + _COUNT.pack(len(distinct))
+                  + _encode_plain_strings(distinct) + _encode_ints(codes, allow_dict=False))
+    return min(plain, dictionary, key=len)
+
+
+def _decode_strings(buf: Any, offset: int, n: int) -> Tuple[List[str], int]:
+    encoding = buf[offset]
+    offset += 1
+    if encoding == PLAIN:
+        return _decode_plain_strings(buf, offset, n)
+    if encoding == DICT:
+        (count,) = _COUNT.unpack_from(buf, offset)
+        distinct, offset = _decode_plain_strings(buf, offset + _COUNT.size, count)
+        codes, offset = _decode_ints(buf, offset, n)
+        return [distinct[code] for code in codes], offset
+    raise ValueError(f"Error: unknown VARCHAR encoding {encoding}.")
+
+
+# ----- column blocks -----
+
+def encode_column(values: Sequence[Any], is_int: bool) -> bytes:
+    """Encode one page's values of a column (None is NULL) with the smallest fitting encoding."""
+    if any(v is None for v in values):
+        nulls = _pack_bits([v is None for v in values], 1)
+        present = [v for v in values if v is not None]
+        fill = (min(present) if present else 0) if is_int else ""
+        values = [fill if v is None else v for v in values]
+        head = bytes([HAS_NULLS]) + nulls
+    else:
+        head = bytes([0])
+    return head + (_encode_ints(values) if is_int else _encode_strings(values))
+
+
+def decode_column(buf: Any, offset: int, n: int, is_int: bool) -> Tuple[List[Any], int]:
+    """Decode the `n` values of the column block at `offset`. Returns the values and the offset past the block."""
+    flags = buf[offset]
+    offset += 1
+    nulls = None
+    if flags & HAS_NULLS:
+        nulls, offset = _unpack_bits(buf, offset, n, 1)
+    values, offset = (_decode_ints if is_int else _decode_strings)(buf, offset, n)
+    if nulls is not None:
+        values = [None if null else v for v, null in zip(values, nulls)]
+    return values, offset
+
+
+def column_encoding(buf: Any, offset: int, n: int) -> str:
+    """Return the name of the encoding used by the column block at `offset`."""
+    if buf[offset] & HAS_NULLS:
+        offset += (n + 7) // 8
+    return ENCODING_NAMES[buf[offset + 1]]
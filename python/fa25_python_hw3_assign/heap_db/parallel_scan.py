@@ -0,0 +1,171 @@
+"""
+parallel_scan.py: filter a table on several cores.
+
+    op = ParallelScan(table, condition, workers=4)        # an Operator
+    result = SelectQuery(cols, condition).select(table, workers=4)
+
+The table is split into partitions and a process pool evaluates the compiled
+Condition on each one (conditions are frozen dataclasses, so they pickle):
+
+- HeapFileTable and MappedTable: partitions are page ranges. The parent
+  flushes the table, then each worker reads its pages straight from the file,
+  evaluates the predicate on DbTupleViews and sends back the matching
+  records' bytes, which the parent decodes in one batch.
+- in-memory tables: partitions are row ranges and workers send back the
+  positions of the matching rows. Where processes are forked, workers inherit
+  the parent's rows and nothing is copied to them; elsewhere each partition is
+  sent encoded with the schema's codec, or as marshalled value lists when the
+  codec cannot encode it (a NULL INT, for example).
+
+Results are yielded partition by partition in table order, as soon as each one
+is ready, so the output matches a serial Scan. Tables smaller than
+MIN_PARALLEL_ROWS, and conditions that cannot be pickled (such as a Condition
+subclass defined inside a function), are scanned serially. The scan reads the
+table as it is when the scan starts; heap file writes made meanwhile may or
+may not be seen.
+"""
+
+import marshal
+import multiprocessing
+import os
+import pickle
+from array import array
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Iterator, List, Optional, Tuple
+from .schema import Schema
+from .db_tuple import DbTuple
+from .query_conditions import Condition
+from .operators import Operator
+from .tuple_view import DbTupleView
+
+MIN_PARALLEL_ROWS = 20000
+PARTITIONS_PER_WORKER = 4  # more partitions than workers evens out skewed partitions
+
+# In a forked worker: the rows of the scan whose pool started it (see _share_rows).
+_shared_rows: Optional[List[DbTuple]] = None
+
+
+def _share_rows(rows: List[DbTuple]) -> None:
+    # pool initializer; under fork the worker inherits `rows` and nothing is pickled
+    global _shared_rows
+    _shared_rows = rows
+
+
+def _filter_shared(condition: Condition, start: int, end: int) -> array:
+    rows = _shared_rows
+    predicate = condition.compile(rows[start].schema)
+    return array("q", (pos for pos in range(start, end) if predicate(rows[pos])))
+
+
+def _filter_encoded(schema_bytes: bytes, condition: Condition, buf: bytes, offsets: array, start: int) -> array:
+    schema = Schema.deserialize(schema_bytes)
+    predicate = condition.compile(schema)
+    view = memoryview(buf)
+    return array("q", (start + n for n in range(len(offsets) - 1)
+                       if predicate(DbTupleView(schema, view[offsets[n]:offsets[n + 1]]))))
+
+
+def _filter_values(schema_bytes: bytes, condition: Condition, data: bytes, start: int) -> array:
+    schema = Schema.deserialize(schema_bytes)
+    predicate = condition.compile(schema)
+    trusted = DbTuple.from_trusted_values
+    return array("q", (start + n for n, values in enumerate(marshal.loads(data))
+                       if predicate(trusted(schema, values))))
+
+
+def _filter_pages(path: str, page_size: int, schema_bytes: bytes, condition: Condition,
+                  first_page: int, end_page: int) -> Tuple[bytes, array]:
+    # imported here: heap_file is only needed by workers of heap-file scans
+    from .heap_file import SlottedPage
+    schema = Schema.deserialize(schema_bytes)
+    predicate = condition.compile(schema)
+    out = bytearray()
+    offsets = array("q", [0])
+    with open(path, "rb") as f:
+        f.seek(first_page * page_size)
+        for _ in range(first_page, end_page):
+            page = SlottedPage(bytearray(f.read(page_size)))
+            for _, record in page.records():
+                if predicate(DbTupleView(schema, record)):
+                    out += record
+                    offsets.append(len(out))
+    return bytes(out), offsets
+
+
+def _ranges(total: int, parts: int, first: int = 0) -> List[Tuple[int, int]]:
+    size = -(-total // parts) if total else 1
+    return [(start, min(start + size, first + total)) for start in range(first, first + total, size)]
+
+
+def _can_fork() -> bool:
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+class ParallelScan(Operator):
+    """Yield the rows of `table` that satisfy `condition`, filtering partitions in worker processes."""
+
+    def __init__(self, table: Any, condition: Condition, workers: Optional[int] = None):
+        self.table = table
+        self.schema = table.get_schema()
+        self.condition = condition
+        self.workers = workers or os.cpu_count() or 1
+
+    def _parallel(self) -> bool:
+        if self.workers < 2 or self.table.size() < MIN_PARALLEL_ROWS:
+            return False
+        try:
+            pickle.dumps(self.condition)
+        except (pickle.PicklingError, AttributeError, TypeError):
+            return False
+        return True
+
+    def rows(self) -> Iterator[DbTuple]:
+        if not self._parallel():
+            return iter(self.table.scan(self.condition.compile(self.schema)))
+        if hasattr(self.table, "read_page"):
+            return self._scan_heap_file()
+        return self._scan_rows()
+
+    def _scan_heap_file(self) -> Iterator[DbTuple]:
+        table = self.table
+        table.flush()  # workers read the file, not the buffer pool
+        codec = self.schema.get_codec()
+        schema_bytes = self.schema.serialize()
+        data_pages = table.page_count - 1
+        parts = _ranges(data_pages, self.workers * PARTITIONS_PER_WORKER, first=1)
+        with ProcessPoolExecutor(self.workers) as pool:
+            futures = [pool.submit(_filter_pages, table.path, table.page_size, schema_bytes,
+                                   self.condition, first, end) for first, end in parts]
+            for future in futures:
+                buf, offsets = future.result()
+                yield from codec.deserialize_many(buf, offsets)
+
+    def _scan_rows(self) -> Iterator[DbTuple]:
+        rows = list(self.table)  # a snapshot for Table; every worker partitions the same list
+        parts = _ranges(len(rows), self.workers * PARTITIONS_PER_WORKER)
+        if _can_fork():
+            # the rows travel as this pool's initializer argument, so concurrent scans never share them
+            pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("fork"),
+                                       initializer=_share_rows, initargs=(rows,))
+            futures: List[Future] = [pool.submit(_filter_shared, self.condition, start, end)
+                                     for start, end in parts]
+        else:
+            codec = self.schema.get_codec()
+            schema_bytes = self.schema.serialize()
+            pool = ProcessPoolExecutor(self.workers)
+            futures = []
+            for start, end in parts:
+                try:
+                    buf, offsets = codec.serialize_many(rows[start:end])
+                except ValueError:  # e.g. a NULL INT, which the codec has no encoding for
+                    data = marshal.dumps([row.values for row in rows[start:end]])
+                    futures.append(pool.submit(_filter_values, schema_bytes, self.condition, data, start))
+                    continue
+                futures.append(pool.submit(_filter_encoded, schema_bytes, self.condition, bytes(buf), offsets, start))
+        with pool:
+            for future in futures:
+                for pos in future.result():
+                    yield rows[pos]
+
+    def __str__(self) -> str:
+        return f"ParallelScan(workers={self.workers})"
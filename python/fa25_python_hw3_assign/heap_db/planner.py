@@ -0,0 +1,499 @@
+"""
+planner.py: turn a logical query into a physical operator plan.
+
+Access paths
+------------
+
+`access_path(table, condition)` looks at the conjuncts of a WHERE condition
+(the terms of a top-level AND) and returns an index operator that yields every
+row that can satisfy it, or None when no index applies and the table has to be
+scanned. The caller still filters the index's rows with the full condition, so
+the access path only has to return a superset of the answer.
+
+    salary = 50000                  -> IndexScan (primary key or secondary index)
+    dept_name IN ('CS', 'EE')       -> MultiIndexScan
+    salary < 50000                  -> IndexRangeScan(-inf < salary < 50000)
+    tot_cred >= 98 AND tot_cred < 120
+                                    -> IndexRangeScan(98 <= tot_cred < 120)
+
+Range predicates need an ordered (B+tree) secondary index; the primary-key
+index is a hash table and only answers equality. Conjuncts on the same column
+are combined into one range. When several columns could be used, equality is
+preferred over IN, and IN over ranges, with two-sided ranges ahead of one-sided
+ones.
+
+Cost-based planning
+-------------------
+
+`Planner.plan(LogicalQuery(tables, condition, columns, order_by, limit))`
+chooses the physical plan from cardinality estimates:
+
+- each conjunct of the condition is pushed down to every table that has all of
+  its columns; the rest is applied after the joins
+- for each table, an index access path is used only when its estimated cost
+  (matching rows times a random-fetch cost) beats a sequential scan
+- natural joins are ordered by dynamic programming over left-deep plans
+  (greedily for more than MAX_DP_TABLES tables), avoiding Cartesian products
+  whenever a connected table is available
+- each join runs as an index nested-loop join (probing the inner table's key or
+  a secondary index), a hash join built on the smaller input, or a merge join
+  when the smaller input would not fit the memory budget
+
+Estimates come from TableStats: row counts and distinct-value counts, with the
+classic System R default selectivities where nothing better is known. Natural
+join output size is |L| * |R| / max(distinct(L.c), distinct(R.c)) per common
+column c. When one side's distinct count is unknown, its values are assumed
+to come from the other side (the foreign-key case); when both are unknown, the
+smaller side's values are assumed distinct. The result's columns are always in the order the tables
+were given, whatever join order is chosen.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+from .schema import Schema
+from .table import Table
+from .query_conditions import (AndCondition, BetweenCondition, Condition, EqualsCondition,
+                               GreaterThanCondition, InCondition, LessThanCondition,
+                               NotCondition, OrCondition)
+from .operators import (DEFAULT_MEMORY_BUDGET, Filter, IndexNestedLoopJoin, IndexRangeScan, IndexScan,
+                        Join, Limit, MergeJoin, MultiIndexScan, Operator, OrderBy, Project, Scan, SortSpec)
+from .external_sort import estimate_row_bytes
+
+# (value, inclusive); value None means unbounded
+_Bound = Tuple[Any, bool]
+
+
+def conjuncts(condition: Condition) -> List[Condition]:
+    """Flatten nested ANDs into the list of their terms."""
+    if isinstance(condition, AndCondition):
+        return conjuncts(condition.left) + conjuncts(condition.right)
+    return [condition]
+
+
+class _Range:
+    """Tightest bounds on one column collected from range conjuncts."""
+
+    def __init__(self):
+        self.low: _Bound = (None, True)
+        self.high: _Bound = (None, True)
+
+    def add_low(self, value: Any, inclusive: bool) -> None:
+        self.low = _tighter(self.low, (value, inclusive), lambda a, b: a > b)
+
+    def add_high(self, value: Any, inclusive: bool) -> None:
+        self.high = _tighter(self.high, (value, inclusive), lambda a, b: a < b)
+
+    def sides(self) -> int:
+        return (self.low[0] is not None) + (self.high[0] is not None)
+
+
+def _tighter(current: _Bound, new: _Bound, stricter: Any) -> _Bound:
+    if new[0] is None:
+        return current
+    if current[0] is None:
+        return new
+    try:
+        if stricter(new[0], current[0]):
+            return new
+        if new[0] == current[0]:
+            return current[0], current[1] and new[1]
+    except TypeError:
+        # incomparable bounds: keep the first, the residual filter decides
+        pass
+    return current
+
+
+def access_path(table: Any, condition: Condition) -> Optional[Operator]:
+    """
+    Return the best index operator for `condition` on `table`, or None when the
+    table must be scanned. Rows it yields still need to be filtered by `condition`.
+    """
+    best_in: Optional[Operator] = None
+    ranges: Dict[str, _Range] = {}
+    for term in conjuncts(condition):
+        if isinstance(term, EqualsCondition):
+            if IndexScan.supports(table, term.column_name):
+                return IndexScan(table, term.column_name, term.value)
+        elif isinstance(term, InCondition):
+            if best_in is None and IndexScan.supports(table, term.column_name):
+                best_in = MultiIndexScan(table, term.column_name, term.values)
+        elif isinstance(term, (LessThanCondition, GreaterThanCondition, BetweenCondition)):
+            if not IndexRangeScan.supports(table, term.column_name):
+                continue
+            bounds = ranges.setdefault(term.column_name, _Range())
+            if isinstance(term, LessThanCondition):
+                bounds.add_high(term.value, term.inclusive)
+            elif isinstance(term, GreaterThanCondition):
+                bounds.add_low(term.value, term.inclusive)
+            else:
+                bounds.add_low(term.low, True)
+                bounds.add_high(term.high, True)
+
+    if best_in is not None:
+        return best_in
+    if not ranges:
+        return None
+    column, bounds = max(ranges.items(), key=lambda item: item[1].sides())
+    (low, low_inclusive), (high, high_inclusive) = bounds.low, bounds.high
+    return IndexRangeScan(table, column, low, high, low_inclusive, high_inclusive)
+
+
+# ----- statistics and selectivity -----
+
+# System R default selectivities, used when statistics do not say better.
+DEFAULT_EQ_SELECTIVITY = 0.1
+DEFAULT_RANGE_SELECTIVITY = 1 / 3
+DEFAULT_BETWEEN_SELECTIVITY = 0.25
+DEFAULT_SELECTIVITY = 0.25  # conditions the planner cannot look inside
+
+
+class TableStats:
+    """
+    What the planner knows about a table: its row count and, for some columns,
+    the number of distinct values. `TableStats.basic(table)` knows the row count
+    and that the primary key is unique.
+    """
+
+    def __init__(self, row_count: int, distinct: Optional[Dict[str, int]] = None):
+        self.row_count = row_count
+        self.distinct: Dict[str, int] = dict(distinct or {})
+
+    @classmethod
+    def basic(cls, table: Any) -> "TableStats":
+        rows = table.size()
+        key = table.get_schema().get_key()
+        return cls(rows, {key: rows} if key is not None else {})
+
+    def distinct_values(self, column: str) -> Optional[int]:
+        """Return the number of distinct values in `column`, or None if unknown."""
+        d = self.distinct.get(column)
+        return None if d is None else max(1, d)
+
+    def eq_selectivity(self, column: str, value: Any) -> float:
+        """Estimated fraction of rows with column == value."""
+        d = self.distinct_values(column)
+        return 1.0 / d if d else DEFAULT_EQ_SELECTIVITY
+
+    def range_selectivity(self, column: str, low: Any, high: Any,
+                          low_inclusive: bool = True, high_inclusive: bool = True) -> float:
+        """Estimated fraction of rows with low <= column <= high (None bounds are open)."""
+        if low is None and high is None:
+            return 1.0
+        if low is None or high is None:
+            return DEFAULT_RANGE_SELECTIVITY
+        return DEFAULT_BETWEEN_SELECTIVITY
+
+
+def selectivity(condition: Optional[Condition], stats: TableStats) -> float:
+    """Estimate the fraction of a table's rows that satisfy `condition`."""
+    if condition is None:
+        return 1.0
+    if isinstance(condition, AndCondition):
+        return selectivity(condition.left, stats) * selectivity(condition.right, stats)
+    if isinstance(condition, OrCondition):
+        a, b = selectivity(condition.left, stats), selectivity(condition.right, stats)
+        return a + b - a * b
+    if isinstance(condition, NotCondition):
+        return 1.0 - selectivity(condition.inner, stats)
+    if isinstance(condition, EqualsCondition):
+        return stats.eq_selectivity(condition.column_name, condition.value)
+    if isinstance(condition, InCondition):
+        return min(1.0, sum(stats.eq_selectivity(condition.column_name, v) for v in condition.values))
+    if isinstance(condition, LessThanCondition):
+        return stats.range_selectivity(condition.column_name, None, condition.value, True, condition.inclusive)
+    if isinstance(condition, GreaterThanCondition):
+        return stats.range_selectivity(condition.column_name, condition.value, None, condition.inclusive, True)
+    if isinstance(condition, BetweenCondition):
+        return stats.range_selectivity(condition.column_name, condition.low, condition.high)
+    return DEFAULT_SELECTIVITY
+
+
+def _path_selectivity(path: Operator, stats: TableStats) -> float:
+    """Estimated fraction of the table an index access path reads."""
+    if isinstance(path, IndexScan):
+        return stats.eq_selectivity(path.column, path.value)
+    if isinstance(path, MultiIndexScan):
+        return min(1.0, sum(stats.eq_selectivity(path.column, v) for v in path.values))
+    if isinstance(path, IndexRangeScan):
+        return stats.range_selectivity(path.column, path.low, path.high, path.low_inclusive, path.high_inclusive)
+    return 1.0
+
+
+def condition_columns(condition: Condition) -> Optional[Set[str]]:
+    """Return the column names a condition reads, or None for conditions the planner cannot inspect."""
+    if isinstance(condition, (AndCondition, OrCondition)):
+        left, right = condition_columns(condition.left), condition_columns(condition.right)
+        return None if left is None or right is None else left | right
+    if isinstance(condition, NotCondition):
+        return condition_columns(condition.inner)
+    column = getattr(condition, "column_name", None)
+    if isinstance(condition, (EqualsCondition, InCondition, LessThanCondition,
+                              GreaterThanCondition, BetweenCondition)) and column is not None:
+        return {column}
+    return None
+
+
+def _and_all(terms: Sequence[Condition]) -> Optional[Condition]:
+    result: Optional[Condition] = None
+    for term in terms:
+        result = term if result is None else AndCondition(result, term)
+    return result
+
+
+def _names(schema: Schema) -> List[str]:
+    return [schema.get_name(i) for i in range(schema.size())]
+
+
+# ----- cost-based planner -----
+
+# Relative cost units: reading one row sequentially costs 1.
+SCAN_ROW_COST = 1.0
+INDEX_ROW_COST = 2.0      # fetching one row through an index (random access)
+INDEX_PROBE_COST = 2.0    # one index descent
+HASH_BUILD_COST = 1.5     # inserting one row into a join hash table
+HASH_PROBE_COST = 1.0
+SORT_ROW_COST = 4.0       # external sort, per row (write and read back a run)
+OUTPUT_ROW_COST = 0.1     # building one joined row
+
+MAX_DP_TABLES = 8
+
+
+@dataclass
+class LogicalQuery:
+    """
+    What to compute, not how: the natural join of `tables` (one table is just a
+    selection), filtered by `condition`, sorted by `order_by`, projected to
+    `columns` (None keeps every column) and cut to `limit` rows.
+    """
+    tables: Sequence[Any]
+    condition: Optional[Condition] = None
+    columns: Optional[Sequence[str]] = None
+    order_by: Optional[Sequence[SortSpec]] = None
+    limit: Optional[int] = None
+
+
+@dataclass
+class _SubPlan:
+    op: Operator
+    tables: frozenset
+    rows: float
+    cost: float
+    names: Set[str]
+    # estimated distinct values per column in this result (None: unknown)
+    distinct: Dict[str, Optional[float]] = field(default_factory=dict)
+    # distinct values per column before any filtering: the column's value domain
+    domain: Dict[str, Optional[float]] = field(default_factory=dict)
+
+
+class Planner:
+    """
+    Cost-based planner. `stats` maps tables to TableStats (for example from
+    statistics.analyze); tables without an entry use the statistics saved by
+    their analyze() method, or TableStats.basic if they were never analyzed.
+    """
+
+    def __init__(self, stats: Optional[Dict[Any, TableStats]] = None,
+                 memory_budget: int = DEFAULT_MEMORY_BUDGET, temp_dir: Optional[str] = None):
+        self.stats: Dict[Any, TableStats] = dict(stats or {})
+        self.memory_budget = memory_budget
+        self.temp_dir = temp_dir
+
+    def stats_for(self, table: Any) -> TableStats:
+        stats = self.stats.get(table)
+        if stats is None:
+            # prefer statistics from Table.analyze() over the row count alone
+            stats = getattr(table, "statistics", None) or TableStats.basic(table)
+            self.stats[table] = stats
+        return stats
+
+    # ----- single table -----
+
+    def access(self, table: Any, condition: Optional[Condition]) -> Operator:
+        """
+        Return the cheaper of a filtered scan and an index access path plus
+        residual filter, for reading the rows of `table` that satisfy `condition`.
+        """
+        stats = self.stats_for(table)
+        rows = stats.row_count
+        if condition is None:
+            op: Operator = Scan(table)
+            op.estimated_rows = rows
+            return op
+
+        predicate = condition.compile(table.get_schema())
+        path = access_path(table, condition)
+        if path is not None:
+            index_cost = INDEX_PROBE_COST + rows * _path_selectivity(path, stats) * INDEX_ROW_COST
+            if index_cost < rows * SCAN_ROW_COST:
+                path.estimated_rows = rows * _path_selectivity(path, stats)
+                op = Filter(path, predicate)
+            else:
+                op = Scan(table, predicate)
+        else:
+            op = Scan(table, predicate)
+        op.estimated_rows = rows * selectivity(condition, stats)
+        return op
+
+    # ----- joins -----
+
+    def plan(self, query: LogicalQuery) -> Operator:
+        """Return an operator plan for `query`."""
+        tables = list(query.tables)
+        if not tables:
+            raise ValueError("A query needs at least one table.")
+        schemas = [t.get_schema() for t in tables]
+        canonical = schemas[0]
+        for schema in schemas[1:]:
+            canonical = canonical.natural_join(schema)
+
+        # push each conjunct down to every table that has all of its columns
+        pushed: List[List[Condition]] = [[] for _ in tables]
+        residual: List[Condition] = []
+        for term in (conjuncts(query.condition) if query.condition is not None else []):
+            columns = condition_columns(term)
+            owners = [] if not columns else [i for i, s in enumerate(schemas) if columns <= set(_names(s))]
+            for i in owners:
+                pushed[i].append(term)
+            if not owners:
+                residual.append(term)
+
+        bases = [self._base(i, t, _and_all(pushed[i])) for i, t in enumerate(tables)]
+        if len(tables) <= MAX_DP_TABLES:
+            best = self._join_dp(tables, bases, pushed)
+        else:
+            best = self._join_greedy(tables, bases, pushed)
+
+        op, rows = best.op, best.rows
+        if residual:
+            cond = _and_all(residual)
+            op = Filter(op, cond)
+            rows *= DEFAULT_SELECTIVITY ** len(residual)
+            op.estimated_rows = rows
+
+        if query.order_by:
+            op = OrderBy(op, query.order_by, query.limit, self.memory_budget, self.temp_dir)
+            op.estimated_rows = rows if query.limit is None else min(rows, query.limit)
+        elif query.limit is not None:
+            op = Limit(op, query.limit)
+            op.estimated_rows = min(rows, query.limit)
+
+        columns = list(query.columns) if query.columns is not None else _names(canonical)
+        if _names(op.schema) != columns:
+            estimate = op.estimated_rows
+            op = Project(op, columns)
+            op.estimated_rows = estimate
+        return op
+
+    def execute(self, query: LogicalQuery) -> Table:
+        """Plan and run `query`, returning the result as a Table."""
+        return self.plan(query).to_table()
+
+    def _base(self, i: int, table: Any, condition: Optional[Condition]) -> _SubPlan:
+        op = self.access(table, condition)
+        stats = self.stats_for(table)
+        rows = op.estimated_rows or 0.0
+        names = set(_names(table.get_schema()))
+        distinct: Dict[str, Optional[float]] = {}
+        domain: Dict[str, Optional[float]] = {}
+        for name in names:
+            d = stats.distinct_values(name)
+            domain[name] = d
+            distinct[name] = None if d is None else min(d, max(rows, 1.0))
+        # an index path reads fewer rows than a scan; Filter over it costs its input
+        cost = stats.row_count * SCAN_ROW_COST
+        if isinstance(op, Filter):
+            cost = INDEX_PROBE_COST + (op.child.estimated_rows or 0.0) * INDEX_ROW_COST
+        return _SubPlan(op, frozenset([i]), rows, cost, names, distinct, domain)
+
+    def _join_rows(self, left: _SubPlan, right: _SubPlan, common: Set[str]) -> float:
+        rows = left.rows * right.rows
+        for name in common:
+            dl, dr = left.distinct.get(name), right.distinct.get(name)
+            if dl is None and dr is None:
+                # assume the smaller side's values are distinct and all found in the larger
+                d = min(left.rows, right.rows)
+            elif dl is None or dr is None:
+                # assume the unknown side holds values from the known column's
+                # whole domain (a foreign key), even if that side was filtered
+                d = left.domain.get(name) if dr is None else right.domain.get(name)
+            else:
+                d = max(dl, dr)
+            rows /= max(d, 1.0)
+        return rows
+
+    def _join(self, left: _SubPlan, i: int, table: Any, base: _SubPlan,
+              condition: Optional[Condition]) -> _SubPlan:
+        """Cheapest way to join `left` with base table `i`."""
+        common = left.names & base.names
+        rows = self._join_rows(left, base, common)
+        options: List[Tuple[float, Callable[[], Operator]]] = []
+
+        if common:
+            small = min(left.rows, base.rows)
+            large = max(left.rows, base.rows)
+            width = max(estimate_row_bytes(left.op.schema), estimate_row_bytes(table.get_schema()))
+            if small * width <= self.memory_budget:
+                cost = left.cost + base.cost + small * HASH_BUILD_COST + large * HASH_PROBE_COST
+                if left.rows <= base.rows:
+                    options.append((cost, lambda: Join(base.op, left.op)))
+                else:
+                    options.append((cost, lambda: Join(left.op, base.op)))
+            else:
+                cost = left.cost + base.cost + (left.rows + base.rows) * SORT_ROW_COST
+                options.append((cost, lambda: MergeJoin(left.op, base.op, self.memory_budget, self.temp_dir)))
+
+            stats = self.stats_for(table)
+            for name in sorted(common):
+                if not IndexScan.supports(table, name):
+                    continue
+                d = stats.distinct_values(name)
+                per_probe = stats.row_count / d if d else stats.row_count * DEFAULT_EQ_SELECTIVITY
+                cost = left.cost + left.rows * (INDEX_PROBE_COST + per_probe * INDEX_ROW_COST)
+                predicate = None if condition is None else condition.compile(table.get_schema())
+                options.append((cost, lambda name=name, predicate=predicate:
+                                IndexNestedLoopJoin(left.op, table, name, predicate)))
+        else:
+            cost = left.cost + base.cost + left.rows * base.rows * SCAN_ROW_COST
+            options.append((cost, lambda: Join(left.op, base.op)))
+
+        cost, build = min(options, key=lambda option: option[0])
+        op = build()
+        op.estimated_rows = rows
+        distinct: Dict[str, Optional[float]] = {}
+        domain: Dict[str, Optional[float]] = {}
+        for name in left.names | base.names:
+            ds = [d for d in (left.distinct.get(name), base.distinct.get(name)) if d is not None]
+            distinct[name] = min(ds + [max(rows, 1.0)]) if ds else None
+            domains = [d for d in (left.domain.get(name), base.domain.get(name)) if d is not None]
+            domain[name] = min(domains) if domains else None
+        return _SubPlan(op, left.tables | {i}, rows, cost + rows * OUTPUT_ROW_COST,
+                        left.names | base.names, distinct, domain)
+
+    def _extensions(self, sub: _SubPlan, tables: List[Any], bases: List[_SubPlan]) -> List[int]:
+        """Tables that can join `sub` next: those sharing a column with it, or any if none do."""
+        rest = [i for i in range(len(tables)) if i not in sub.tables]
+        connected = [i for i in rest if sub.names & bases[i].names]
+        return connected or rest
+
+    def _join_dp(self, tables: List[Any], bases: List[_SubPlan], pushed: List[List[Condition]]) -> _SubPlan:
+        best: Dict[frozenset, _SubPlan] = {b.tables: b for b in bases}
+        for size in range(2, len(tables) + 1):
+            candidates: Dict[frozenset, _SubPlan] = {}
+            for key, sub in best.items():
+                if len(key) != size - 1:
+                    continue
+                for i in self._extensions(sub, tables, bases):
+                    joined = self._join(sub, i, tables[i], bases[i], _and_all(pushed[i]))
+                    current = candidates.get(joined.tables)
+                    if current is None or joined.cost < current.cost:
+                        candidates[joined.tables] = joined
+            best.update(candidates)
+        return best[frozenset(range(len(tables)))]
+
+    def _join_greedy(self, tables: List[Any], bases: List[_SubPlan], pushed: List[List[Condition]]) -> _SubPlan:
+        sub = min(bases, key=lambda b: b.rows)
+        while len(sub.tables) < len(tables):
+            options = [self._join(sub, i, tables[i], bases[i], _and_all(pushed[i]))
+                       for i in self._extensions(sub, tables, bases)]
+            sub = min(options, key=lambda option: option.cost)
+        return sub
@@ -1,7 +1,11 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
+from typing import Any, Callable, Dict, Tuple
 from .db_tuple import DbTuple
+from .schema import Schema
+
+Predicate = Callable[[DbTuple], bool]
 
 
 class Condition(ABC):
@@ -22,6 +26,42 @@ class Condition(ABC):
     def evaluate(self, row: DbTuple) -> bool:
         ...
 
+    def compile(self, schema: Schema) -> Predicate:
+        """
+        Compile the condition tree into one flat predicate for rows of `schema`.
+
+        Column names are resolved to indexes here, once, and the whole tree is
+        emitted as a single Python expression over the row's value list, e.g.
+        `(v[2] == _k0 and not v[3] == _k1)`. Scans then pay one function call per
+        row instead of a name lookup and a method call per tree node.
+        """
+        env: Dict[str, Any] = {}
+        source = f"def predicate(row):\n    v = row.values\n    return {self._expression(schema, env)}\n"
+        exec(compile(source, f"<compiled {type(self).__name__}>", "exec"), env)
+        return env["predicate"]
+
+    def _expression(self, schema: Schema, env: Dict[str, Any]) -> str:
+        """
+        Return a Python expression for this condition over `v` (the row's values)
+        and `row`, binding any constants it needs into `env`. Conditions without
+        their own translation fall back to calling evaluate().
+        """
+        return f"{_bind(env, self)}.evaluate(row)"
+
+
+def _bind(env: Dict[str, Any], value: Any) -> str:
+    """Store a constant in the compiled function's globals and return its name."""
+    name = f"_k{len(env)}"
+    env[name] = value
+    return name
+
+
+def _column_index(schema: Schema, column_name: str) -> int:
+    index = schema.get_column_index(column_name)
+    if index == -1:
+        raise ValueError(f"Column '{column_name}' not found.")
+    return index
+
 
 @dataclass(frozen=True)
 class EqualsCondition(Condition):
@@ -38,6 +78,9 @@ class EqualsCondition(Condition):
         """
         return row.get(self.column_name) == self.value
 
+    def _expression(self, schema: Schema, env: Dict[str, Any]) -> str:
+        return f"v[{_column_index(schema, self.column_name)}] == {_bind(env, self.value)}"
+
         
 @dataclass(frozen=True)
 class AndCondition(Condition):
@@ -54,6 +97,9 @@ class AndCondition(Condition):
         """
         return self.left.evaluate(row) and self.right.evaluate(row)
 
+    def _expression(self, schema: Schema, env: Dict[str, Any]) -> str:
+        return f"({self.left._expression(schema, env)} and {self.right._expression(schema, env)})"
+
 @dataclass(frozen=True)
 class OrCondition(Condition):
     """
@@ -72,6 +118,9 @@ class OrCondition(Condition):
             return True
         return self.right.evaluate(row)
 
+    def _expression(self, schema: Schema, env: Dict[str, Any]) -> str:
+        return f"({self.left._expression(schema, env)} or {self.right._expression(schema, env)})"
+
 
 
 @dataclass(frozen=True)
@@ -79,4 +128,91 @@ class NotCondition(Condition):
     inner: Condition
 
     def evaluate(self, row: DbTuple) -> bool:
-        return not self.inner.evaluate(row)
\ No newline at end of file
+        return not self.inner.evaluate(row)
+
+    def _expression(self, schema: Schema, env: Dict[str, Any]) -> str:
+        return f"(not {self.inner._expression(schema, env)})"
+
+
+# ----- comparison conditions -----
+# A NULL column value never satisfies a comparison, as in SQL.
+
+@dataclass(frozen=True)
+class LessThanCondition(Condition):
+    """
+    Represents column < value (column <= value when inclusive).
+    """
+    column_name: str
+    value: Any
+    inclusive: bool = False
+
+    def evaluate(self, row: DbTuple) -> bool:
+        v = row.get(self.column_name)
+        if v is None:
+            return False
+        return v <= self.value if self.inclusive else v < self.value
+
+    def _expression(self, schema: Schema, env: Dict[str, Any]) -> str:
+        i = _column_index(schema, self.column_name)
+        op = "<=" if self.inclusive else "<"
+        return f"(v[{i}] is not None and v[{i}] {op} {_bind(env, self.value)})"
+
+
+@dataclass(frozen=True)
+class GreaterThanCondition(Condition):
+    """
+    Represents column > value (column >= value when inclusive).
+    """
+    column_name: str
+    value: Any
+    inclusive: bool = False
+
+    def evaluate(self, row: DbTuple) -> bool:
+        v = row.get(self.column_name)
+        if v is None:
+            return False
+        return v >= self.value if self.inclusive else v > self.value
+
+    def _expression(self, schema: Schema, env: Dict[str, Any]) -> str:
+        i = _column_index(schema, self.column_name)
+        op = ">=" if self.inclusive else ">"
+        return f"(v[{i}] is not None and v[{i}] {op} {_bind(env, self.value)})"
+
+
+@dataclass(frozen=True)
+class BetweenCondition(Condition):
+    """
+    Represents column BETWEEN low AND high (both bounds inclusive, as in SQL).
+    """
+    column_name: str
+    low: Any
+    high: Any
+
+    def evaluate(self, row: DbTuple) -> bool:
+        v = row.get(self.column_name)
+        return v is not None and self.low <= v <= self.high
+
+    def _expression(self, schema: Schema, env: Dict[str, Any]) -> str:
+        i = _column_index(schema, self.column_name)
+        return f"(v[{i}] is not None and {_bind(env, self.low)} <= v[{i}] <= {_bind(env, self.high)})"
+
+
+@dataclass(frozen=True)
+class InCondition(Condition):
+    """
+    Represents column IN (value, ...). NULLs in the list never match.
+    """
+    column_name: str
+    values: Tuple[Any, ...]
+
+    def __post_init__(self):
+        # accept any iterable; keep the distinct non-NULL values in their given order
+        object.__setattr__(self, "values", tuple(dict.fromkeys(v for v in self.values if v is not None)))
+
+    def evaluate(self, row: DbTuple) -> bool:
+        v = row.get(self.column_name)
+        return v is not None and v in self.values
+
+    def _expression(self, schema: Schema, env: Dict[str, Any]) -> str:
+        i = _column_index(schema, self.column_name)
+        return f"(v[{i}] is not None and v[{i}] in {_bind(env, frozenset(self.values))})"
@@ -0,0 +1,204 @@
+"""
+record_codec.py: precompiled encoder/decoder for one schema's record format.
+
+The byte format is the one `DbTuple.serialize` has always produced: INT columns
+as 4-byte little-endian signed ints, VARCHAR columns as a 4-byte length followed
+by UTF-8 bytes. What changes is how it is produced. The codec splits a schema
+into segments, each a run of INT columns optionally ending with one VARCHAR's
+length prefix, and compiles every segment into a single `struct.Struct`:
+
+    id INT, age INT, name VARCHAR(20), dept VARCHAR(10), salary INT
+    -> Struct("<iiI") + name bytes, Struct("<I") + dept bytes, Struct("<i")
+
+and generates straight-line pack/unpack functions over those structs, so a row
+costs one pack_into/unpack_from per segment instead of one pack and
+bytearray.extend per column. `serialize_many` encodes a batch into one
+preallocated buffer, and the decode paths build DbTuples without re-running
+DbTuple.__init__ validation, since data read back from storage was validated
+when it was written.
+
+Use `schema.get_codec()` rather than constructing a codec directly; it is built
+once and cached on the schema.
+"""
+
+from array import array
+from struct import Struct, error as StructError
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from .column_types import TypeInt, TypeVarchar
+from .db_tuple import DbTuple
+from .schema import Schema
+
+# (struct for the fixed-width part, INT column indexes in the run, trailing VARCHAR index or -1)
+_Segment = Tuple[Struct, Tuple[int, ...], int]
+
+
+class RecordCodec:
+    """Encodes and decodes rows of one schema using precompiled structs."""
+
+    def __init__(self, schema: Schema):
+        self.schema = schema
+        self.schema_size = schema.size()
+        self.segments: List[_Segment] = []
+        self.fixed_size = 0  # bytes per row excluding VARCHAR payloads
+
+        ints: List[int] = []
+        for i in range(schema.size()):
+            col_type = schema.get_type(i)
+            if isinstance(col_type, TypeInt):
+                ints.append(i)
+            elif isinstance(col_type, TypeVarchar):
+                self._add_segment(ints, i)
+                ints = []
+            else:
+                raise ValueError(f"Unsupported column type {col_type!r}.")
+        if ints:
+            self._add_segment(ints, -1)
+
+        self.varchars = [varchar for _, _, varchar in self.segments if varchar >= 0]
+        # Where each column lives: (segment number, position in the segment's struct).
+        # A VARCHAR's position is its length prefix, the struct's last field.
+        self.locations: List[Tuple[int, int]] = [(0, 0)] * self.schema_size
+        for n, (st, ints, varchar) in enumerate(self.segments):
+            for pos, i in enumerate(ints):
+                self.locations[i] = (n, pos)
+            if varchar >= 0:
+                self.locations[varchar] = (n, len(ints))
+        self.all_fixed = not self.varchars
+        self._pack, self._unpack, self._strings = self._generate()
+
+    def _add_segment(self, ints: List[int], varchar: int) -> None:
+        fmt = "<" + "i" * len(ints) + ("I" if varchar >= 0 else "")
+        st = Struct(fmt)
+        self.segments.append((st, tuple(ints), varchar))
+        self.fixed_size += st.size
+
+    def _generate(self) -> Tuple[Callable, Callable, Callable]:
+        """
+        Generate straight-line pack/unpack functions for this schema, one statement
+        per segment, so that no per-column loop runs for each row:
+
+            def pack(buf, off, v, s):
+                p = s[0]; n = len(p)
+                _st0.pack_into(buf, off, v[0], v[1], n); off += 12
+                buf[off:off + n] = p; off += n
+                _st1.pack_into(buf, off, v[3]); off += 4
+                return off
+        """
+        env: Dict[str, Any] = {}
+        pack = ["def pack(buf, off, v, s):"]
+        unpack = ["def unpack(buf, off):"]
+        names = [f"c{i}" for i in range(self.schema_size)]
+        for n, (st, ints, varchar) in enumerate(self.segments):
+            env[f"_st{n}"] = st
+            args = [f"v[{i}]" for i in ints]
+            targets = [names[i] for i in ints]
+            if varchar >= 0:
+                pack.append(f"    p = s[{self.varchars.index(varchar)}]; n = len(p)")
+                pack.append(f"    _st{n}.pack_into(buf, off, {', '.join(args + ['n'])}); off += {st.size}")
+                pack.append("    buf[off:off + n] = p; off += n")
+                unpack.append(f"    {', '.join(targets + ['n'])}, = _st{n}.unpack_from(buf, off); off += {st.size}")
+                unpack.append(f"    {names[varchar]} = str(buf[off:off + n], 'utf-8'); off += n")
+            else:
+                pack.append(f"    _st{n}.pack_into(buf, off, {', '.join(args)}); off += {st.size}")
+                unpack.append(f"    {', '.join(targets)}, = _st{n}.unpack_from(buf, off); off += {st.size}")
+        pack.append("    return off")
+        unpack.append(f"    return [{', '.join(names)}], off")
+        strings = ["def strings(v):",
+                   f"    return [{', '.join(f'v[{i}].encode()' for i in self.varchars)}]"]
+
+        source = "\n".join(pack + unpack + strings) + "\n"
+        exec(compile(source, f"<record codec {self.schema!r}>", "exec"), env)
+        return env["pack"], env["unpack"], env["strings"]
+
+    # ----- encoding -----
+
+    def _null_error(self, values: Sequence[Any]) -> ValueError:
+        for i, v in enumerate(values):
+            if v is None:
+                return ValueError(f"Cannot serialize NULL at column {i} without null encoding")
+        return ValueError("Value does not fit its column type")
+
+    def _encode_strings(self, values: Sequence[Any]) -> List[bytes]:
+        try:
+            return self._strings(values)
+        except AttributeError:
+            raise self._null_error(values) from None
+
+    def record_size(self, values: Sequence[Any]) -> int:
+        """Return the encoded size of a row in bytes."""
+        return self.fixed_size + sum(len(b) for b in self._encode_strings(values))
+
+    def _pack_into(self, buf: bytearray, offset: int, values: Sequence[Any], strings: List[bytes]) -> int:
+        try:
+            return self._pack(buf, offset, values, strings)
+        except StructError:
+            raise self._null_error(values) from None
+
+    def encode(self, values: Sequence[Any]) -> bytes:
+        """Encode one row's values."""
+        strings = self._encode_strings(values)
+        buf = bytearray(self.fixed_size + sum(len(b) for b in strings))
+        self._pack_into(buf, 0, values, strings)
+        return bytes(buf)
+
+    def encode_into(self, buf: bytearray, offset: int, values: Sequence[Any]) -> int:
+        """Encode one row into `buf` at `offset` (which must have room) and return the end offset."""
+        return self._pack_into(buf, offset, values, self._encode_strings(values))
+
+    def serialize_many(self, rows: Iterable[Any]) -> Tuple[bytearray, array]:
+        """
+        Encode a batch of rows (DbTuples or value sequences) into one buffer.
+        Returns (buffer, offsets) where record i spans offsets[i]:offsets[i + 1].
+        """
+        batch = [row.values if isinstance(row, DbTuple) else row for row in rows]
+        if self.all_fixed:
+            encoded: List[List[bytes]] = [[]] * len(batch)
+            total = self.fixed_size * len(batch)
+        else:
+            encode_strings = self._encode_strings
+            encoded = [encode_strings(values) for values in batch]
+            total = self.fixed_size * len(batch) + sum(len(b) for strings in encoded for b in strings)
+
+        buf = bytearray(total)
+        offsets = array("q", [0])
+        append = offsets.append
+        pack = self._pack
+        offset = 0
+        try:
+            for values, strings in zip(batch, encoded):
+                offset = pack(buf, offset, values, strings)
+                append(offset)
+        except StructError:
+            raise self._null_error(batch[len(offsets) - 1]) from None
+        return buf, offsets
+
+    # ----- decoding -----
+
+    def decode_values(self, buf: Any, offset: int = 0) -> Tuple[List[Any], int]:
+        """
+        Decode one record starting at `offset` in `buf` (bytes, bytearray or memoryview).
+        Returns the row's values in column order and the offset just past the record.
+        """
+        return self._unpack(buf, offset)
+
+    def decode(self, buf: Any, offset: int = 0) -> DbTuple:
+        """Decode one trusted record (e.g. read back from storage) into a DbTuple."""
+        return DbTuple.from_trusted_values(self.schema, self._unpack(buf, offset)[0])
+
+    def deserialize_many(self, buf: Any, offsets: Optional[Sequence[int]] = None) -> List[DbTuple]:
+        """
+        Decode a batch produced by `serialize_many`. Without `offsets` the records
+        are assumed to be packed back to back and are walked in order.
+        """
+        schema = self.schema
+        trusted = DbTuple.from_trusted_values
+        unpack = self._unpack
+        if offsets is not None:
+            return [trusted(schema, unpack(buf, start)[0]) for start in offsets[:-1]]
+
+        rows: List[DbTuple] = []
+        offset, end = 0, len(buf)
+        while offset < end:
+            values, offset = unpack(buf, offset)
+            rows.append(trusted(schema, values))
+        return rows
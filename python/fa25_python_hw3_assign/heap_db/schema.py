@@ -35,6 +35,7 @@ class Schema:
     def __init__(self):
         self.columns: List[Any] = []  # List of column objects
         self.key: Optional[str] = None  # Primary key (None if no key)
+        self._codec: Any = None  # RecordCodec, built on first use by get_codec()
 
 
     def _ensure_unique(self, name: str) -> None:
@@ -110,6 +111,17 @@ class Schema:
         """Return the maximum SQL size of the column at the given index."""
         return self.columns[index].get_max_sql_length()
 
+    def get_codec(self) -> Any:
+        """
+        Return the RecordCodec for this schema's row format.
+        It is compiled once and cached; adding columns invalidates the cache.
+        """
+        # imported here because record_codec depends on this module
+        from .record_codec import RecordCodec
+        if self._codec is None or self._codec.schema_size != len(self.columns):
+            self._codec = RecordCodec(self)
+        return self._codec
+
     def size(self) -> int:
         """Return the number of columns in the schema."""
         return len(self.columns)
@@ -147,6 +159,12 @@ class Schema:
 
         return joined_schema
 
+    def __getstate__(self) -> dict:
+        # the codec holds generated code and Struct objects; rebuild it on first use instead
+        state = self.__dict__.copy()
+        state["_codec"] = None
+        return state
+
     def serialize(self) -> bytes:
         """Serialize schema to bytes for storage."""
         buffer = bytearray()
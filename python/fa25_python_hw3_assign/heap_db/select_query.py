@@ -1,8 +1,14 @@
 from __future__ import annotations
-from typing import Optional, Iterable
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Iterable, Sequence, Tuple
+from .schema import Schema
 from .table import Table
 from .db_tuple import DbTuple
-from .query_conditions import Condition 
+from .query_conditions import Condition
+from .external_sort import DEFAULT_MEMORY_BUDGET, ExternalSorter, is_sorted, sort_key
+from .operators import Limit, Operator, OrderBy, Project, Scan, SortSpec
+from .parallel_scan import ParallelScan
+from .planner import Planner
 
 class SelectQuery:
     def __init__(self, col_names: Optional[Iterable[str]], condition: Condition):
@@ -17,69 +23,183 @@ class SelectQuery:
         
         self.condition = condition
 
-    def select(self, table: Table) -> Table:
-        src_schema = table.get_schema()
-
-        
-        # Determine the output schema:
-        # - If no column list was provided, use the source schema (select *).
-        # - Otherwise, build a projection schema in that column order.
-        
-        if self.col_names is None:
-            proj_schema = src_schema
-        else:
-            proj_schema = src_schema.projection(self.col_names)
-    
-        result = Table(proj_schema)
-        needs_projection = proj_schema is not src_schema
-
-        for row in table:
-            if self.condition.evaluate(row):  # Condition takes only the row
-                # Insert either the original row (schemas identical) or a projected copy.
-                insert_row = row.projection(proj_schema) if needs_projection else row
-                result.insert(insert_row)
+    def select(self, table: Table, workers: Optional[int] = None) -> Table:
+        """
+        Run the query against `table` and return the result as a new Table.
+        With `workers`, a full-table filter runs in that many processes (see parallel_scan.py).
+        """
+        return self.plan(table, workers=workers).to_table()
 
-        return result
+    def plan(self, table: Table, limit: Optional[int] = None,
+             order_by: Optional[Sequence[SortSpec]] = None, workers: Optional[int] = None) -> Operator:
+        """
+        Return the query as a lazy operator pipeline over `table`:
+        index access path or Scan (see Planner.access) -> Filter -> OrderBy
+        -> Project -> Limit. Iterating it streams the result rows; with `limit`
+        and no `order_by` the scan stops after that many matches, and with both
+        the sort keeps only the top `limit` rows. With `workers` > 1, a filtered
+        Scan becomes a ParallelScan.
+        """
+        # The planner compiles the condition once and picks a scan or an index path by cost.
+        op = Planner().access(table, self.condition)
+        if workers and workers > 1 and self.condition is not None and type(op) is Scan:
+            estimated_rows = op.estimated_rows
+            op = ParallelScan(table, self.condition, workers)
+            op.estimated_rows = estimated_rows
 
+        # Sort before projecting, so ORDER BY may use columns that are not selected.
+        if order_by:
+            op = OrderBy(op, order_by, limit)
+        elif limit is not None:
+            op = Limit(op, limit)
+        # Project unless no column list was provided (select *).
+        if self.col_names is not None:
+            op = Project(op, self.col_names)
+        return op
 
     @staticmethod
     def natural_join(table1: Table, table2: Table) -> Table:
+        """
+        ⨝ Natural join on all common columns, evaluated as a hash join.
+
+        The smaller input is loaded into a hash table keyed on the join columns and
+        the larger one probes it, so the cost is O(|table1| + |table2| + |output|).
+        Output rows come out in nested-loop order: table1 order, then table2 order
+        among the matches of each table1 row. With no common columns the result is
+        the Cartesian product.
+        """
         s1 = table1.get_schema()
         s2 = table2.get_schema()
         joined_schema = s1.natural_join(s2)
         result = Table(joined_schema)
 
-        # === TODO 1: Determine join column names (use ONLY public Schema API) ===
-        # Build column name lists and intersect them to get natural-join columns.
-        names1 = [s1.get_name(i) for i in range(s1.size())]
-        names2 = [s2.get_name(i) for i in range(s2.size())]
-        join_cols = list(set(names1) & set(names2))
+        left_keys, right_keys, right_cols = _join_columns(s1, s2, joined_schema)
 
-        # === TODO 2: Special case — NO common columns => Cartesian product ===
-        if not join_cols:
+        # Special case — NO common columns => Cartesian product
+        if not left_keys:
             joined_schema.key = None
+            right_rows = [[r2.values[j] for j in right_cols] for r2 in table2]
             for r1 in table1:
-                for r2 in table2:
-                    joined_row = DbTuple.join_db_tuple(joined_schema, r1, r2)
-                    result.insert(joined_row)
+                for tail in right_rows:
+                    result.insert(DbTuple.from_trusted_values(joined_schema, r1.values + tail))
             return result
 
-        # === TODO 3: Nested-loop natural join on ALL common columns ===
-        for r1 in table1:
-            for r2 in table2:
-                if all(r1.get_by_name(c) == r2.get_by_name(c) for c in join_cols):
-                    joined_row = DbTuple.join_db_tuple(joined_schema, r1, r2)
-                    result.insert(joined_row)
+        left_key = _key_getter(left_keys)
+        right_key = _key_getter(right_keys)
 
-        # === TODO 4 (optional, extra credit): PK fast path ===
-        # If s2.get_key() is in join_cols, you can look up the matching right row in O(n)
-        # per left row using: table2.lookup_by_key(r1.get_by_name(s2.get_key())).
-        # This is an optimization; not required for correctness.
+        if table2.size() <= table1.size():
+            # build on table2, probe with table1: matches are produced in output order
+            buckets: Dict[Any, List[DbTuple]] = {}
+            for r2 in table2:
+                buckets.setdefault(right_key(r2.values), []).append(r2)
+            for r1 in table1:
+                for r2 in buckets.get(left_key(r1.values), ()):
+                    result.insert(DbTuple.from_trusted_values(joined_schema, r1.values + [r2.values[j] for j in right_cols]))
+            return result
 
-        # Finally:
+        # build on table1, probe with table2, then emit grouped by table1 row
+        left_rows: List[DbTuple] = []
+        positions: Dict[Any, List[int]] = {}
+        for r1 in table1:
+            positions.setdefault(left_key(r1.values), []).append(len(left_rows))
+            left_rows.append(r1)
+        matches: List[List[DbTuple]] = [[] for _ in left_rows]
+        for r2 in table2:
+            for pos in positions.get(right_key(r2.values), ()):
+                matches[pos].append(r2)
+        for r1, partners in zip(left_rows, matches):
+            for r2 in partners:
+                result.insert(DbTuple.from_trusted_values(joined_schema, r1.values + [r2.values[j] for j in right_cols]))
         return result
 
 
+    @staticmethod
+    def sort_merge_join(table1: Table, table2: Table,
+                        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                        temp_dir: Optional[str] = None) -> Table:
+        """
+        ⨝ Natural join evaluated as a sort-merge join.
+
+        Each input is sorted on the join columns with an external merge sort that
+        spills sorted runs to temporary files once `memory_budget` bytes are used,
+        so inputs larger than memory are read sequentially. An input that is
+        already in join-key order (checked with one sequential pass) is not sorted.
+        Output rows come out in join-key order. Same result set and schema as
+        `natural_join`; with no common columns this falls back to `natural_join`.
+        """
+        s1 = table1.get_schema()
+        s2 = table2.get_schema()
+        joined_schema = s1.natural_join(s2)
+        left_keys, right_keys, right_cols = _join_columns(s1, s2, joined_schema)
+        if not left_keys:
+            return SelectQuery.natural_join(table1, table2)
+
+        result = Table(joined_schema)
+        left = _sorted_rows(table1, left_keys, memory_budget, temp_dir)
+        right = _sorted_rows(table2, right_keys, memory_budget, temp_dir)
+        for r1, r2 in _merge_join(left, right, sort_key(left_keys), sort_key(right_keys)):
+            result.insert(DbTuple.from_trusted_values(joined_schema, r1.values + [r2.values[j] for j in right_cols]))
+        return result
+
     def __str__(self):
         proj_columns = ",".join(self.col_names) if self.col_names is not None else "*"
         return f"select {proj_columns} where {self.condition}"
+
+
+def _join_columns(s1: Schema, s2: Schema, joined_schema: Schema) -> Tuple[List[int], List[int], List[int]]:
+    """
+    Resolve a natural join's column positions once, up front.
+    Returns (join column indexes in s1, the same columns' indexes in s2,
+    indexes in s2 of the columns appended after s1's in `joined_schema`).
+    """
+    names2 = {s2.get_name(i) for i in range(s2.size())}
+    join_cols = [s1.get_name(i) for i in range(s1.size()) if s1.get_name(i) in names2]
+    left_keys = [s1.get_column_index(c) for c in join_cols]
+    right_keys = [s2.get_column_index(c) for c in join_cols]
+    right_cols = [s2.get_column_index(joined_schema.get_name(i))
+                  for i in range(s1.size(), joined_schema.size())]
+    return left_keys, right_keys, right_cols
+
+
+def _key_getter(indexes: Sequence[int]) -> Callable[[List[Any]], Any]:
+    """Return a function extracting the join key (a value, or a tuple for composite keys) from a row's values."""
+    if len(indexes) == 1:
+        return itemgetter(indexes[0])
+    return itemgetter(*indexes)
+
+
+def _sorted_rows(table: Table, key_indexes: List[int], memory_budget: int,
+                 temp_dir: Optional[str]) -> Iterator[DbTuple]:
+    """Return the table's rows in join-key order, sorting externally only if needed."""
+    key = sort_key(key_indexes)
+    if is_sorted(table, key):
+        return iter(table)
+    sorter = ExternalSorter(table.get_schema(), key, memory_budget, temp_dir)
+    return sorter.sort(table)
+
+
+def _merge_join(left: Iterator[DbTuple], right: Iterator[DbTuple],
+                left_key: Callable[[DbTuple], Any],
+                right_key: Callable[[DbTuple], Any]) -> Iterator[Tuple[DbTuple, DbTuple]]:
+    """
+    Merge two key-ordered row streams, yielding every (left, right) pair with equal keys.
+    Only the right-hand rows sharing the current key are buffered.
+    """
+    r1 = next(left, None)
+    r2 = next(right, None)
+    while r1 is not None and r2 is not None:
+        k1, k2 = left_key(r1), right_key(r2)
+        if k1 < k2:
+            r1 = next(left, None)
+        elif k2 < k1:
+            r2 = next(right, None)
+        else:
+            group = [r2]
+            r2 = next(right, None)
+            while r2 is not None and right_key(r2) == k1:
+                group.append(r2)
+                r2 = next(right, None)
+            while r1 is not None and left_key(r1) == k1:
+                for match in group:
+                    yield r1, match
+                r1 = next(left, None)
@@ -0,0 +1,295 @@
+"""
+statistics.py: ANALYZE, per-column statistics for the cost-based planner.
+
+    stats = table.analyze()         # or analyze(table)
+    stats.columns["salary"].ndv     # distinct values
+    Planner().plan(...)             # picks up table.statistics automatically
+
+One streaming pass over the table collects, per column:
+
+- row count, NULL count, min and max
+- the number of distinct values (NDV): counted exactly while a column has few
+  distinct values, then estimated with a HyperLogLog sketch in fixed memory
+- most-common values (MCVs) and their frequencies
+- for INT columns, an equi-depth histogram: bucket bounds chosen so that each
+  bucket holds about the same number of rows
+
+MCVs and histograms are computed from a reservoir sample of `sample_size`
+rows, so their cost does not grow with the table. Statistics are a snapshot:
+run analyze again after large changes. A HeapFileTable stores them in a JSON
+sidecar file next to the table file ("<path>.stats") and reloads them when
+the table is reopened.
+"""
+
+from __future__ import annotations
+import json
+import math
+import random
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from .column_types import TypeInt
+from .planner import TableStats
+
+DEFAULT_SAMPLE_SIZE = 30000
+DEFAULT_MCV_COUNT = 10
+DEFAULT_HISTOGRAM_BUCKETS = 32
+
+# Distinct values are counted exactly up to this many per column, then sketched.
+EXACT_NDV_LIMIT = 4096
+HLL_PRECISION = 12  # 4096 registers, about 1.6% standard error
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix64(h: int) -> int:
+    """splitmix64 finalizer: spreads Python's hash() (the identity for small ints) over 64 bits."""
+    z = (h + 0x9E3779B97F4A7C15) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct-count sketch with 2**precision one-byte registers.
+    Values are hashed with hash(), so a sketch is only meaningful within one
+    process; persist its estimate, not its registers.
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        if not 4 <= precision <= 16:
+            raise ValueError("HyperLogLog precision must be between 4 and 16.")
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+
+    def add(self, value: Any) -> None:
+        x = _mix64(hash(value))
+        p = self.precision
+        index = x >> (64 - p)
+        rest = x & ((1 << (64 - p)) - 1)
+        rank = (64 - p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision.")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def estimate(self) -> float:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)  # linear counting for small cardinalities
+        return raw
+
+
+@dataclass
+class ColumnStats:
+    """Statistics for one column. Frequencies are fractions of all rows."""
+    name: str
+    row_count: int = 0
+    null_count: int = 0
+    min: Any = None
+    max: Any = None
+    ndv: int = 0
+    mcv: List[Tuple[Any, float]] = field(default_factory=list)
+    histogram: List[Any] = field(default_factory=list)  # equi-depth bucket bounds, INT columns only
+
+    @property
+    def null_fraction(self) -> float:
+        return self.null_count / self.row_count if self.row_count else 0.0
+
+    def eq_selectivity(self, value: Any) -> float:
+        if self.row_count == 0:
+            return 0.0
+        if value is None:
+            return self.null_fraction
+        for v, freq in self.mcv:
+            if v == value:
+                return freq
+        try:
+            if self.min is not None and (value < self.min or value > self.max):
+                return 0.0
+        except TypeError:
+            return 0.0
+        rest = 1.0 - self.null_fraction - sum(freq for _, freq in self.mcv)
+        return max(rest, 0.0) / max(1, self.ndv - len(self.mcv))
+
+    def fraction_below(self, value: Any) -> Optional[float]:
+        """Estimated fraction of non-NULL values < value, from the histogram (None without one)."""
+        bounds = self.histogram
+        if len(bounds) < 2:
+            return None
+        if value <= bounds[0]:
+            return 0.0
+        if value > bounds[-1]:
+            return 1.0
+        buckets = len(bounds) - 1
+        i = bisect_left(bounds, value) - 1  # value lies in (bounds[i], bounds[i + 1]]
+        lo, hi = bounds[i], bounds[i + 1]
+        within = (value - lo) / (hi - lo) if hi > lo else 1.0
+        return (i + within) / buckets
+
+    def range_selectivity(self, low: Any, high: Any, low_inclusive: bool, high_inclusive: bool) -> Optional[float]:
+        try:
+            below_high = 1.0 if high is None else self.fraction_below(high)
+            below_low = 0.0 if low is None else self.fraction_below(low)
+        except TypeError:
+            return 0.0
+        if below_high is None or below_low is None:
+            return None
+        fraction = max(below_high - below_low, 0.0) * (1.0 - self.null_fraction)
+        # fraction_below counts value < bound: adjust for the bounds' own rows
+        if high is not None and high_inclusive:
+            fraction += self.eq_selectivity(high)
+        if low is not None and not low_inclusive:
+            fraction -= self.eq_selectivity(low)
+        return min(max(fraction, 0.0), 1.0)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"name": self.name, "row_count": self.row_count, "null_count": self.null_count,
+                "min": self.min, "max": self.max, "ndv": self.ndv,
+                "mcv": [[v, f] for v, f in self.mcv], "histogram": self.histogram}
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "ColumnStats":
+        stats = cls(**{k: v for k, v in data.items() if k != "mcv"})
+        stats.mcv = [(v, f) for v, f in data.get("mcv", [])]
+        return stats
+
+
+class AnalyzedStats(TableStats):
+    """TableStats backed by ANALYZE results: MCVs and histograms refine the planner's estimates."""
+
+    def __init__(self, row_count: int, columns: Dict[str, ColumnStats]):
+        super().__init__(row_count, {name: c.ndv for name, c in columns.items()})
+        self.columns = columns
+
+    def eq_selectivity(self, column: str, value: Any) -> float:
+        stats = self.columns.get(column)
+        if stats is None:
+            return super().eq_selectivity(column, value)
+        return stats.eq_selectivity(value)
+
+    def range_selectivity(self, column: str, low: Any, high: Any,
+                          low_inclusive: bool = True, high_inclusive: bool = True) -> float:
+        stats = self.columns.get(column)
+        estimate = None if stats is None else stats.range_selectivity(low, high, low_inclusive, high_inclusive)
+        if estimate is None:
+            return super().range_selectivity(column, low, high, low_inclusive, high_inclusive)
+        return estimate
+
+    # ----- persistence -----
+
+    def to_json(self) -> str:
+        return json.dumps({"row_count": self.row_count,
+                           "columns": [c.to_json() for c in self.columns.values()]})
+
+    @classmethod
+    def from_json(cls, text: str) -> "AnalyzedStats":
+        data = json.loads(text)
+        columns = [ColumnStats.from_json(c) for c in data["columns"]]
+        return cls(data["row_count"], {c.name: c for c in columns})
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_json())
+
+    @classmethod
+    def load(cls, path: str) -> "AnalyzedStats":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_json(f.read())
+
+
+class _ColumnAccumulator:
+    __slots__ = ("nulls", "low", "high", "exact", "sketch")
+
+    def __init__(self):
+        self.nulls = 0
+        self.low: Any = None
+        self.high: Any = None
+        self.exact: Optional[set] = set()
+        self.sketch: Optional[HyperLogLog] = None
+
+    def add(self, v: Any) -> None:
+        if v is None:
+            self.nulls += 1
+            return
+        if self.low is None or v < self.low:
+            self.low = v
+        if self.high is None or v > self.high:
+            self.high = v
+        if self.exact is not None:
+            self.exact.add(v)
+            if len(self.exact) > EXACT_NDV_LIMIT:
+                self.sketch = HyperLogLog()
+                for value in self.exact:
+                    self.sketch.add(value)
+                self.exact = None
+        else:
+            self.sketch.add(v)
+
+    def ndv(self) -> int:
+        if self.exact is not None:
+            return len(self.exact)
+        return int(round(self.sketch.estimate()))
+
+
+def _histogram(values: List[Any], buckets: int) -> List[Any]:
+    """Equi-depth bucket bounds (buckets + 1 of them, deduplicated) over sorted `values`."""
+    if not values:
+        return []
+    n = len(values)
+    bounds = [values[(n - 1) * b // buckets] for b in range(buckets + 1)]
+    return [b for i, b in enumerate(bounds) if i == 0 or b != bounds[i - 1]]
+
+
+def analyze(table: Any, sample_size: int = DEFAULT_SAMPLE_SIZE, mcv_count: int = DEFAULT_MCV_COUNT,
+            buckets: int = DEFAULT_HISTOGRAM_BUCKETS, seed: int = 0) -> AnalyzedStats:
+    """
+    Compute statistics for every column of `table` (a Table, ColumnarTable,
+    HeapFileTable or any iterable with get_schema()) in one streaming pass.
+    MCVs and histograms come from a reservoir sample of `sample_size` rows.
+    """
+    if sample_size <= 0:
+        raise ValueError("sample_size must be > 0.")
+    schema = table.get_schema()
+    width = schema.size()
+    accumulators = [_ColumnAccumulator() for _ in range(width)]
+    adders = [acc.add for acc in accumulators]
+    rng = random.Random(seed)
+    sample: List[List[Any]] = []
+    rows = 0
+    for row in table:
+        values = row.values
+        for add, v in zip(adders, values):
+            add(v)
+        rows += 1
+        if len(sample) < sample_size:
+            sample.append(list(values))
+        else:
+            j = rng.randrange(rows)
+            if j < sample_size:
+                sample[j] = list(values)
+
+    columns: Dict[str, ColumnStats] = {}
+    for i, acc in enumerate(accumulators):
+        name = schema.get_name(i)
+        stats = ColumnStats(name, rows, acc.nulls, acc.low, acc.high, acc.ndv())
+        sampled = [values[i] for values in sample if values[i] is not None]
+        if sampled:
+            scale = (rows - acc.nulls) / rows / len(sampled)
+            counts = Counter(sampled)
+            # a value is common if it appears more often than an average value would
+            average = len(sampled) / max(1, len(counts))
+            stats.mcv = [(v, c * scale) for v, c in counts.most_common(mcv_count) if c > 1 and c > average]
+            if isinstance(schema.get_type(i), TypeInt):
+                stats.histogram = _histogram(sorted(sampled), buckets)
+        columns[name] = stats
+    return AnalyzedStats(rows, columns)
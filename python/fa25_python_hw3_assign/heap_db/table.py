@@ -1,16 +1,103 @@
-from typing import List, Iterator, Optional
+import threading
+from itertools import chain, islice
+from typing import Any, Callable, Dict, Iterable, List, Iterator, Optional, Tuple
 from .schema import Schema
 from .db_tuple import DbTuple 
+from .column_types import TypeInt, TypeVarchar
+from .btree import BPlusTree
+from .locks import RWLock
+
+
+class _Versions:
+    """
+    The row versions of a Table. Versions are appended in commit order, so a
+    version's position doubles as its begin stamp; `ended` records the stamp of
+    the delete that ended a version. Vacuum never edits a _Versions in place: it
+    builds a new one without the dead versions, so readers still holding the
+    old one are undisturbed.
+    """
+    __slots__ = ("rows", "ended", "key_index")
+
+    def __init__(self, rows: Optional[List[DbTuple]] = None, key_index: Optional[Dict[Any, int]] = None):
+        self.rows: List[DbTuple] = rows if rows is not None else []
+        self.ended: Dict[int, int] = {}  # position -> stamp of the delete
+        # Primary-key hash index: key value -> position of the key's live version.
+        self.key_index: Dict[Any, int] = key_index if key_index is not None else {}
+
+
+class Snapshot:
+    """
+    A read-only view of a Table as of one moment: the rows committed before it
+    was taken, including rows deleted since. Taking and reading a snapshot takes
+    no locks, and writers never wait for it.
+
+        snap = table.snapshot()
+        total = sum(t.get(2) for t in snap)
+        count = snap.size()                  # agrees with the sum, whatever writers did meanwhile
+    """
+
+    def __init__(self, table: "Table"):
+        self.schema = table.schema
+        self._versions, self.stamp, self._visible, self._live = table._head
+
+    def __iter__(self) -> Iterator[DbTuple]:
+        rows = self._versions.rows
+        ended = self._versions.ended.copy()  # dict.copy is atomic with respect to writers
+        stamp = self.stamp
+        hidden = sorted(pos for pos, end in ended.items() if end <= stamp)
+        if not hidden:
+            return islice(rows, self._visible)
+        # copy out the runs of visible rows between the hidden ones
+        starts = [0] + [pos + 1 for pos in hidden]
+        ends = hidden + [self._visible]
+        return chain.from_iterable(rows[start:end] for start, end in zip(starts, ends))
+
+    def scan(self, predicate: Optional[Callable[[DbTuple], bool]] = None) -> Iterator[DbTuple]:
+        """Yield the snapshot's db tuples that satisfy `predicate` (every db tuple if None)."""
+        if predicate is None:
+            return iter(self)
+        return (t for t in self if predicate(t))
+
+    def size(self) -> int:
+        """Return the number of db tuples visible in the snapshot."""
+        return self._live
+
+    def get_schema(self) -> Schema:
+        return self.schema
+
 
 class Table:
-    """Represents a table in a relational database."""
+    """
+    Represents a table in a relational database.
+
+    Rows are multi-versioned: a delete stamps the row's version as ended instead
+    of removing it, so iteration and scan read a consistent snapshot without
+    locks while other threads insert and delete. Writers take a lock among
+    themselves only. Dead versions are reclaimed by vacuum(), run during delete
+    once they make up half the table, or every few seconds by start_vacuum().
+
+    The B+tree secondary indexes are shared structures: index probes take the
+    read side of a reader/writer lock and writers take the write side while
+    they update the trees, so many probes run at once but never see a tree
+    half-way through a split.
+    """
 
     def __init__(self, schema: Schema):
         """
         Initialize an empty table with a given schema.
         """
         self.schema = schema
-        self.db_tuples: List[DbTuple] = []  # List to store db tuples
+        # Everything a snapshot needs, published in one assignment after each write:
+        # (versions, stamp of the last delete, committed versions, live rows).
+        self._head: Tuple[_Versions, int, int, int] = (_Versions(), 0, 0, 0)
+        self._write_lock = threading.Lock()
+        self._index_lock = RWLock()
+        self._key_column = -1 if schema.get_key() is None else schema.get_column_index(schema.get_key())
+        # Secondary B+tree indexes: column name -> (column index, tree of value -> db tuples).
+        self._indexes: Dict[str, Tuple[int, BPlusTree]] = {}
+        # Column statistics from the last analyze(), used by the planner.
+        self.statistics: Optional[Any] = None
+        self._vacuum_stop: Optional[threading.Event] = None
 
     def get_schema(self) -> Schema:
         """
@@ -22,14 +109,27 @@ class Table:
         """
         Return the number of db tuples (rows) in the table.
         """
-        return len(self.db_tuples)  # Already implemented
+        return self._head[3]
 
     def close(self) -> None:
         """
         Close the table (for file-backed implementations).
-        Currently does nothing.
+        Stops a background vacuum started with start_vacuum.
+        """
+        self.stop_vacuum()
+
+    def snapshot(self) -> Snapshot:
+        """Return a consistent read-only view of the rows committed so far."""
+        return Snapshot(self)
+
+    def analyze(self, sample_size: Optional[int] = None) -> Any:
+        """
+        Compute per-column statistics (see statistics.py) in one pass, keep them
+        in self.statistics for the planner and return them.
         """
-        pass  # Already implemented (no-op)
+        from .statistics import DEFAULT_SAMPLE_SIZE, analyze  # local import: statistics imports the planner
+        self.statistics = analyze(self, sample_size or DEFAULT_SAMPLE_SIZE)
+        return self.statistics
 
     def insert(self, rec: DbTuple) -> bool:
         """
@@ -43,32 +143,62 @@ class Table:
         if rec.get_schema() is not self.schema:
             raise ValueError("Error: db tuple schema object does not match table schema (must reuse the same Schema instance).")
 
-        # - If the table has no primary key, append the db tuple to self.db_tuples.
-        # - If the table has a primary key, check for duplicates.
-        # - If a duplicate key is found, return False.
-        # - Otherwise, append the db tuple and return True.
-
-        key = self.schema.get_key()
-        
-        # no primary key, just insert and return True
-        if key is None:
-            self.db_tuples.append(rec)
-            return True
-
-        # get index of key
-        key_index = self.schema.get_column_index(key)
-
-        # check for duplicate, if found return False
-        for t in self.db_tuples:
-            if t.get(key_index) == rec.get(key_index):
-                return False
-        
-        # insert and return True (no duplicates allowed)
-        self.db_tuples.append(rec)
+        with self._write_lock:
+            versions, stamp, visible, live = self._head
+            # with a primary key, the duplicate check is a single hash probe on the key index
+            if self._key_column >= 0:
+                key = rec.values[self._key_column]
+                if key in versions.key_index:
+                    return False
+
+            # the row is appended before its key is published, so a key never points past the rows
+            versions.rows.append(rec)
+            if self._key_column >= 0:
+                versions.key_index[key] = visible
+            if self._indexes:
+                with self._index_lock.write():
+                    for col_index, tree in self._indexes.values():
+                        tree.insert(rec.values[col_index], rec)
+            self._head = (versions, stamp, visible + 1, live + 1)
         return True
 
+    def insert_many(self, rows: Iterable[DbTuple]) -> int:
+        """
+        Insert many db tuples with the same rules as insert (a db tuple whose key
+        already exists is skipped), keeping the per-row work to one hash probe
+        and one append.
 
-
+        :return: the number of db tuples inserted
+        """
+        with self._write_lock:
+            versions, stamp, visible, live = self._head
+            db_tuples = versions.rows
+            key_index = versions.key_index
+            indexes = list(self._indexes.values())
+            before = len(db_tuples)
+            if indexes:
+                self._index_lock.acquire_write()
+            try:
+                for rec in rows:
+                    if rec.schema is not self.schema:
+                        raise ValueError("Error: db tuple schema object does not match table schema (must reuse the same Schema instance).")
+                    if self._key_column >= 0:
+                        key = rec.values[self._key_column]
+                        if key in key_index:
+                            continue
+                        db_tuples.append(rec)
+                        key_index[key] = len(db_tuples) - 1
+                    else:
+                        db_tuples.append(rec)
+                    for col_index, tree in indexes:
+                        tree.insert(rec.values[col_index], rec)
+            finally:
+                if indexes:
+                    self._index_lock.release_write()
+                # readers see the whole batch at once
+                added = len(db_tuples) - before
+                self._head = (versions, stamp, len(db_tuples), live + added)
+        return added
 
     def delete(self, key: object) -> bool:
         """
@@ -82,23 +212,67 @@ class Table:
         if self.schema.key is None:
             raise ValueError("Error: table does not have a primary key. Cannot delete.")
 
-        # - Iterate over self.db_tuples.
-        # - If a db_tuple with the matching key is found, remove it from self.db_tuples and return True.
-        # - If no match is found, return False.
+        with self._write_lock:
+            versions, stamp, visible, live = self._head
+            pos = versions.key_index.pop(key, None)
+            if pos is None:
+                return False
 
-        if self.schema.key is None:
-            raise ValueError("Error: table does not have a primary key. Cannot delete.")
-        
-        key_column = self.schema.get_key()
+            rec = versions.rows[pos]
+            if self._indexes:
+                with self._index_lock.write():
+                    for col_index, tree in self._indexes.values():
+                        tree.remove(rec.values[col_index], rec)
+
+            # end the version instead of removing it: older snapshots still see it
+            versions.ended[pos] = stamp + 1
+            self._head = (versions, stamp + 1, visible, live - 1)
+            dead = len(versions.ended)
+            if self._vacuum_stop is None and dead > 32 and dead * 2 > visible:
+                self._vacuum()
+        return True
 
-        for t in self.db_tuples:
-            if t.get(key_column) == key:
-                self.db_tuples.remove(t)
-                return True
+    def vacuum(self) -> int:
+        """
+        Reclaim the versions ended by deletes and return how many were dropped.
+        Snapshots taken earlier keep reading the versions they started with.
+        """
+        with self._write_lock:
+            return self._vacuum()
+
+    def _vacuum(self) -> int:
+        versions, stamp, visible, live = self._head
+        if not versions.ended:
+            return 0
+        ended = versions.ended
+        rows = [t for pos, t in enumerate(versions.rows) if pos not in ended]
+        key_index = None
+        if self._key_column >= 0:
+            key_index = {t.values[self._key_column]: pos for pos, t in enumerate(rows)}
+        self._head = (_Versions(rows, key_index), stamp, len(rows), live)
+        return visible - len(rows)
+
+    def start_vacuum(self, interval: float = 1.0) -> None:
+        """
+        Vacuum from a daemon thread every `interval` seconds, whenever there are
+        dead versions, instead of during delete. close() stops it.
+        """
+        if self._vacuum_stop is not None:
+            return
+        stop = self._vacuum_stop = threading.Event()
 
-        return False
+        def run() -> None:
+            while not stop.wait(interval):
+                if self._head[0].ended:
+                    self.vacuum()
 
+        threading.Thread(target=run, name="table-vacuum", daemon=True).start()
 
+    def stop_vacuum(self) -> None:
+        """Stop a background vacuum started with start_vacuum."""
+        if self._vacuum_stop is not None:
+            self._vacuum_stop.set()
+            self._vacuum_stop = None
 
     def lookup_by_key(self, key: object) -> Optional[DbTuple]:
         """
@@ -113,23 +287,10 @@ class Table:
         if self.schema.key is None:
             raise ValueError("Error: table does not have a primary key. Cannot lookup.")
 
-        # - Iterate over self.db_tuples.
-        # - If a db tuple with the matching primary key is found, return it.
-        # - If no match is found, return None.
-
-
-        if self.schema.key is None:
-            raise ValueError("Error: table does not have a primary key. Cannot lookup.")
-
-        key_column = self.schema.key
-
-        for t in self.db_tuples:
-            if t.get(key_column) == key:
-                return t
-
-        return None
-
-
+        versions, _, visible, _ = self._head
+        pos = versions.key_index.get(key)
+        # rows of an insert still in progress are past `visible` until it publishes them
+        return None if pos is None or pos >= visible else versions.rows[pos]
 
     def lookup_by_column(self, colname: str, value: object) -> "Table":
         """
@@ -140,38 +301,115 @@ class Table:
         :param value: Value to match
         :return: A new Table containing matching db tuples
         """
-        if self.schema.get_column_index(colname) < 0:
+        col_index = self.schema.get_column_index(colname)
+        if col_index < 0:
             raise ValueError(f"Error: table does not contain column '{colname}'.")
 
         result_table = Table(self.schema)
 
-        # - Iterate over self.db_tuples.
-        # - If a db tuple has colname == value, insert it into result_table.
-        # - Return result_table.
+        if col_index == self._key_column:
+            match = self.lookup_by_key(value)
+            if match is not None:
+                result_table.insert(match)
+            return result_table
 
-        if self.schema.get_column_index(colname) < 0:
-            raise ValueError(f"Error: table does not contain column '{colname}'.")
+        indexed = self.index_lookup(colname, value)
+        if indexed is not None:
+            for t in indexed:
+                result_table.insert(t)
+            return result_table
 
-        result_table = Table(self.schema)
-    
-        for t in self.db_tuples:
-            if t.get_by_name(colname) == value:
+        for t in self:
+            if t.values[col_index] == value:
                 result_table.insert(t)
 
         return result_table
 
-
+    def create_index(self, colname: str) -> None:
+        """
+        Build an ordered B+tree secondary index on an INT or VARCHAR column.
+        The index is kept up to date by insert/delete and is used automatically by
+        lookup_by_column and SelectQuery. Creating an existing index is a no-op.
+        """
+        col_index = self.schema.get_column_index(colname)
+        if col_index < 0:
+            raise ValueError(f"Error: table does not contain column '{colname}'.")
+        if not isinstance(self.schema.get_type(col_index), (TypeInt, TypeVarchar)):
+            raise ValueError(f"Error: column '{colname}' has a type that cannot be indexed.")
+        with self._write_lock:
+            if colname in self._indexes:
+                return
+            tree = BPlusTree()
+            for t in self:
+                tree.insert(t.values[col_index], t)
+            with self._index_lock.write():
+                self._indexes[colname] = (col_index, tree)
+
+    def has_index(self, colname: str) -> bool:
+        """Return True if a secondary index exists on `colname`."""
+        return colname in self._indexes
+
+    def index_lookup(self, colname: str, value: object) -> Optional[List[DbTuple]]:
+        """
+        Return the db tuples with colname == value using the secondary index,
+        or None if `colname` is not indexed.
+        """
+        entry = self._indexes.get(colname)
+        if entry is None:
+            return None
+        try:
+            with self._index_lock.read():
+                return entry[1].search(value)
+        except TypeError:
+            # a value that cannot be ordered against the column's keys matches nothing
+            return []
+
+    def index_range(self, colname: str, low: Any = None, high: Any = None,
+                    low_inclusive: bool = True, high_inclusive: bool = True) -> Optional[List[DbTuple]]:
+        """
+        Return the db tuples with low <= colname <= high (a None bound is open;
+        the inclusive flags make a bound strict) in column order, using the
+        secondary index, or None if `colname` is not indexed. NULLs never match.
+        """
+        entry = self._indexes.get(colname)
+        if entry is None:
+            return None
+        try:
+            with self._index_lock.read():
+                return [rec for _, rec in entry[1].range(low, high, low_inclusive, high_inclusive)]
+        except TypeError:
+            return []
+
+    def scan(self, predicate: Optional[Callable[[DbTuple], bool]] = None) -> Iterator[DbTuple]:
+        """
+        Yield the db tuples that satisfy `predicate` (every db tuple if None),
+        typically a predicate produced by Condition.compile.
+        """
+        return Snapshot(self).scan(predicate)
 
     def __iter__(self) -> Iterator[DbTuple]:
         """
-        Return an iterator over the table's db tuples.
+        Return an iterator over the table's db tuples, as of a snapshot taken now.
         """
-        return iter(self.db_tuples)  # Already implemented
+        return iter(Snapshot(self))
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # pickled for process pools (see executor.py): locks and the vacuum thread stay behind
+        state = self.__dict__.copy()
+        for name in ("_write_lock", "_index_lock", "_vacuum_stop"):
+            del state[name]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._write_lock = threading.Lock()
+        self._index_lock = RWLock()
+        self._vacuum_stop = None
 
     def __str__(self) -> str:
         """
         Return a string representation of the table.
         """
-        if not self.db_tuples:
+        if self.size() == 0:
             return "Empty Table"
-        return "\n".join(str(t) for t in self.db_tuples)
\ No newline at end of file
+        return "\n".join(str(t) for t in self)
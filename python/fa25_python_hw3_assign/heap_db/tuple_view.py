@@ -0,0 +1,220 @@
+"""
+tuple_view.py: read-only, lazily decoded row over serialized record bytes.
+
+A DbTupleView wraps a memoryview of one record (typically a slice of a page in
+the buffer pool) without copying it. A column is decoded the first time it is
+read and then cached, so a scan that filters on one INT column never decodes
+the row's VARCHARs. `to_tuple()` produces an owned DbTuple for rows that are
+kept.
+
+Column offsets come from the schema's RecordCodec: columns before the first
+VARCHAR sit at fixed offsets, later ones are found by following the VARCHAR
+length prefixes, and segment start offsets are remembered once computed.
+
+A ColumnRowView does the same for column-major storage (ColumnarTable, the
+pages of a CompressedTable): it reads row `row` of column i as
+columns[i][row] only when the column is asked for, so a predicate over one
+column never touches the others.
+"""
+
+from struct import Struct
+from typing import Any, Iterator, List, Optional, Sequence, Union
+from .schema import Schema
+from .db_tuple import DbTuple
+from .column_types import TypeInt, TypeVarchar
+
+_INT = Struct("<i")
+_LENGTH = Struct("<I")
+_MISSING = object()
+
+
+class DbTupleView:
+    """Lazy view of one serialized row. Supports the read side of the DbTuple API."""
+
+    __slots__ = ("schema", "_buf", "_codec", "_cache", "_starts")
+
+    def __init__(self, schema: Schema, buf: Union[memoryview, bytes, bytearray]):
+        self.schema = schema
+        self._buf = buf if isinstance(buf, memoryview) else memoryview(buf)
+        self._codec = schema.get_codec()
+        self._cache: List[Any] = [_MISSING] * self._codec.schema_size
+        # start offset of each codec segment, filled in as they are discovered
+        self._starts: List[int] = [0]
+
+    def _segment_start(self, n: int) -> int:
+        starts = self._starts
+        segments = self._codec.segments
+        while len(starts) <= n:
+            k = len(starts) - 1
+            st, _, varchar = segments[k]
+            end = starts[k] + st.size
+            if varchar >= 0:
+                end += _LENGTH.unpack_from(self._buf, end - 4)[0]
+            starts.append(end)
+        return starts[n]
+
+    def _decode(self, i: int) -> Any:
+        n, pos = self._codec.locations[i]
+        start = self._segment_start(n)
+        st, ints, varchar = self._codec.segments[n]
+        if pos < len(ints):
+            return _INT.unpack_from(self._buf, start + 4 * pos)[0]
+        payload = start + st.size
+        strlen = _LENGTH.unpack_from(self._buf, payload - 4)[0]
+        return str(self._buf[payload:payload + strlen], "utf-8")
+
+    # ----- DbTuple read API -----
+
+    def get_schema(self) -> Schema:
+        """Return the schema of this db tuple."""
+        return self.schema
+
+    def get(self, i: Union[int, str]) -> Any:
+        """Return the value of the ith column (index or name), decoding it on first access."""
+        if isinstance(i, str):
+            col_index = self.schema.get_column_index(i)
+            if col_index == -1:
+                raise ValueError(f"Column '{i}' not found.")
+            i = col_index
+
+        if i < 0 or i >= self._codec.schema_size:
+            raise ValueError(f"Invalid column index {i}.")
+
+        value = self._cache[i]
+        if value is _MISSING:
+            value = self._cache[i] = self._decode(i)
+        return value
+
+    def get_int(self, i: int) -> int:
+        """Return the integer value of the ith column."""
+        if not isinstance(self.schema.get_type(i), TypeInt):
+            raise ValueError(f"Column {i} is not an integer.")
+        return int(self.get(i))
+
+    def get_string(self, i: int) -> str:
+        """Return the string value of the ith column."""
+        if not isinstance(self.schema.get_type(i), TypeVarchar):
+            raise ValueError(f"Column {i} is not a string.")
+        return str(self.get(i))
+
+    def get_by_name(self, name: str) -> Any:
+        """Return the value of a column by its name."""
+        index = self.schema.get_column_index(name)
+        if index == -1:
+            raise ValueError(f"Invalid column name '{name}'.")
+        return self.get(index)
+
+    def get_key(self) -> Optional[Any]:
+        """Return the value of the primary key column, if one exists."""
+        key_column = self.schema.get_key()
+        if key_column is None:
+            return None
+        return self.get_by_name(key_column)
+
+    @property
+    def values(self) -> "DbTupleView":
+        """
+        Index-addressable stand-in for DbTuple.values, so compiled predicates
+        (which read `row.values[i]`) work on views and decode only what they touch.
+        """
+        return self
+
+    def decoded_columns(self) -> int:
+        """Return how many columns have been decoded so far."""
+        return sum(1 for v in self._cache if v is not _MISSING)
+
+    def to_tuple(self) -> DbTuple:
+        """Return an owned DbTuple with every column decoded (no reference to the page is kept)."""
+        cache = self._cache
+        if _MISSING not in cache:
+            return DbTuple.from_trusted_values(self.schema, list(cache))
+        if not any(v is not _MISSING for v in cache):
+            return self._codec.decode(self._buf)
+        return DbTuple.from_trusted_values(self.schema, [self.get(i) for i in range(len(cache))])
+
+    def __len__(self) -> int:
+        return self._codec.schema_size
+
+    def __iter__(self) -> Iterator[Any]:
+        return (self.get(i) for i in range(self._codec.schema_size))
+
+    def __getitem__(self, i: Union[int, str]) -> Any:
+        return self.get(i)
+
+    def __repr__(self) -> str:
+        return f"[{', '.join(map(repr, self))}]"
+
+
+class ColumnRowView:
+    """Lazy view of row `row` of column-major storage. Supports the read side of the DbTuple API."""
+
+    __slots__ = ("schema", "_columns", "_row")
+
+    def __init__(self, schema: Schema, columns: Sequence[Any], row: int):
+        self.schema = schema
+        self._columns = columns
+        self._row = row
+
+    def get_schema(self) -> Schema:
+        """Return the schema of this db tuple."""
+        return self.schema
+
+    def get(self, i: Union[int, str]) -> Any:
+        """Return the value of the ith column (index or name)."""
+        if isinstance(i, str):
+            col_index = self.schema.get_column_index(i)
+            if col_index == -1:
+                raise ValueError(f"Column '{i}' not found.")
+            i = col_index
+        if i < 0 or i >= self.schema.size():
+            raise ValueError(f"Invalid column index {i}.")
+        return self._columns[i][self._row]
+
+    def get_int(self, i: int) -> int:
+        """Return the integer value of the ith column."""
+        if not isinstance(self.schema.get_type(i), TypeInt):
+            raise ValueError(f"Column {i} is not an integer.")
+        return int(self.get(i))
+
+    def get_string(self, i: int) -> str:
+        """Return the string value of the ith column."""
+        if not isinstance(self.schema.get_type(i), TypeVarchar):
+            raise ValueError(f"Column {i} is not a string.")
+        return str(self.get(i))
+
+    def get_by_name(self, name: str) -> Any:
+        """Return the value of a column by its name."""
+        index = self.schema.get_column_index(name)
+        if index == -1:
+            raise ValueError(f"Invalid column name '{name}'.")
+        return self.get(index)
+
+    def get_key(self) -> Optional[Any]:
+        """Return the value of the primary key column, if one exists."""
+        key_column = self.schema.get_key()
+        if key_column is None:
+            return None
+        return self.get_by_name(key_column)
+
+    @property
+    def values(self) -> "ColumnRowView":
+        """Index-addressable stand-in for DbTuple.values, as on DbTupleView."""
+        return self
+
+    def to_tuple(self) -> DbTuple:
+        """Return an owned DbTuple with every column read."""
+        return DbTuple.from_trusted_values(self.schema, [column[self._row] for column in self._columns])
+
+    def __len__(self) -> int:
+        return self.schema.size()
+
+    def __iter__(self) -> Iterator[Any]:
+        return (column[self._row] for column in self._columns)
+
+    def __getitem__(self, i: Union[int, str]) -> Any:
+        if type(i) is int and i >= 0:
+            return self._columns[i][self._row]  # compiled predicates index by position: skip get()'s checks
+        return self.get(i)
+
+    def __repr__(self) -> str:
+        return f"[{', '.join(map(repr, self))}]"
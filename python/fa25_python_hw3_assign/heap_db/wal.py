@@ -0,0 +1,144 @@
+"""
+wal.py: write-ahead log (WAL) for HeapFileTable.
+
+    table = HeapFileTable("players.tbl", schema, wal=True)                      # fsync per commit
+    table = HeapFileTable("players.tbl", schema, wal=True, flush_interval=0.01)  # group commit
+
+Every insert and delete on a logged table appends a redo record to
+"<path>.wal" as soon as the page in the buffer pool changes:
+
+    op <B | page_no <I | slot_no <H | length <I | crc32 <I | record bytes
+
+INSERT records carry the row image (the DbTuple.serialize() bytes stored in
+the page); DELETE records carry none. Records are collected in memory and
+written with one fsync per group:
+
+- flush_interval == 0: each commit (one insert, delete or insert_many call)
+  waits for an fsync. Commits from several threads that arrive while an fsync
+  is running are covered by the next one, instead of one fsync each.
+- flush_interval > 0: commits return at once and a background thread fsyncs
+  the log every flush_interval seconds. A crash loses at most the last
+  interval of changes; HeapFileTable.sync() waits until everything is durable.
+
+The WAL rule: before the buffer pool writes a data page, the table forces the
+whole log, so no change reaches the data file without its log record.
+HeapFileTable.flush() is a checkpoint: once all pages and the header are on
+disk, the log is emptied. Reopening a table whose log is not empty replays it
+(see HeapFileTable._recover); the CRC stops replay at a torn final record.
+"""
+
+import os
+import threading
+import zlib
+from struct import Struct
+from typing import Iterator, Optional, Tuple
+
+OP_INSERT = 1
+OP_DELETE = 2
+
+RECORD_HEADER = Struct("<BIHII")  # op | page_no | slot_no | length | crc32
+
+DEFAULT_FLUSH_INTERVAL = 0.0
+
+
+class WriteAheadLog:
+    """
+    An append-only redo log with group commit. Positions in the log (LSNs) are
+    byte counts since the log was opened and keep growing across truncations.
+    """
+
+    def __init__(self, path: str, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        if flush_interval < 0:
+            raise ValueError("flush_interval must be >= 0.")
+        self.path = path
+        self.flush_interval = flush_interval
+        self.file = open(path, "ab")
+        self._buffer = bytearray()
+        self._appended = 0  # LSN after the last appended record
+        self._durable = 0   # LSN up to which the log has been fsynced
+        self._lock = threading.Lock()       # guards the buffer and _appended
+        self._sync_lock = threading.Lock()  # one fsync at a time
+        self.syncs = 0
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if flush_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name="wal-flusher", daemon=True)
+            self._flusher.start()
+
+    def append(self, op: int, rid: Tuple[int, int], record: bytes = b"") -> int:
+        """Buffer one log record and return its LSN (the log position after it)."""
+        header = RECORD_HEADER.pack(op, rid[0], rid[1], len(record), zlib.crc32(record))
+        with self._lock:
+            self._buffer += header
+            self._buffer += record
+            self._appended += len(header) + len(record)
+            return self._appended
+
+    def commit(self) -> None:
+        """End of a change: wait for it to be durable unless a background flusher will be."""
+        if self._flusher is None:
+            self.sync()
+
+    def sync(self, lsn: Optional[int] = None) -> None:
+        """Block until the log is durable up to `lsn` (everything appended so far if None)."""
+        target = self._appended if lsn is None else lsn
+        with self._sync_lock:
+            if self._durable >= target:
+                return  # an fsync started by another committer already covered it
+            with self._lock:
+                data = bytes(self._buffer)
+                self._buffer.clear()
+                end = self._appended
+            self.file.write(data)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self._durable = end
+            self.syncs += 1
+
+    def pending(self) -> bool:
+        """Return True if some appended records are not durable yet."""
+        return self._appended > self._durable
+
+    def truncate(self) -> None:
+        """Empty the log; call only once every logged change is in the data file."""
+        with self._sync_lock, self._lock:
+            self._buffer.clear()
+            self.file.truncate(0)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self._durable = self._appended
+
+    def close(self) -> None:
+        """Stop the background flusher, make the log durable and close it."""
+        if self.file.closed:
+            return
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.sync()
+        self.file.close()
+
+    def _flush_loop(self) -> None:
+        while not self._closed.wait(self.flush_interval):
+            if self.pending():
+                self.sync()
+
+
+def read_log(path: str) -> Iterator[Tuple[int, Tuple[int, int], Optional[bytes]]]:
+    """
+    Yield (op, rid, record) for each complete record in the log at `path`
+    (record is None for deletes). Stops at the first truncated or corrupt record.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        data = f.read()
+    pos = 0
+    while pos + RECORD_HEADER.size <= len(data):
+        op, page_no, slot_no, length, crc = RECORD_HEADER.unpack_from(data, pos)
+        start = pos + RECORD_HEADER.size
+        record = data[start:start + length]
+        if op not in (OP_INSERT, OP_DELETE) or len(record) != length or zlib.crc32(record) != crc:
+            return
+        yield op, (page_no, slot_no), record if op == OP_INSERT else None
+        pos = start + length
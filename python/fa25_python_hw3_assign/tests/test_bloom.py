@@ -0,0 +1,104 @@
+import os
+import subprocess
+import sys
+import pytest
+from heap_db.schema import Schema
+from heap_db.db_tuple import DbTuple
+from heap_db.heap_file import HeapFileTable
+from heap_db.compressed_table import CompressedTable
+from heap_db.bloom import BloomFilter
+from heap_db.operators import IndexNestedLoopJoin, Scan
+from heap_db.table import Table
+
+PACKAGE_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+
+def make_schema():
+    s = Schema()
+    s.add_key_int_type("ID")
+    s.add_varchar_type("dept_name", 15)
+    s.add_int_type("salary")
+    return s
+
+
+def test_no_false_negatives_and_bounded_false_positives():
+    bloom = BloomFilter.of(range(0, 20000, 2), capacity=10000, fp_rate=0.01)
+    assert all(v in bloom for v in range(0, 20000, 2))
+    false_positives = sum(v in bloom for v in range(1, 200000, 2))
+    assert false_positives < 0.02 * 100000
+    assert "CS" not in BloomFilter(100) and None not in BloomFilter(100)
+    bloom.add(None)
+    bloom.add("Comp. Sci.")
+    assert None in bloom and "Comp. Sci." in bloom and 4.0 in bloom
+
+
+def test_serialized_filters_do_not_depend_on_the_process():
+    bloom = BloomFilter.of(["CS", "EE", 7, None], capacity=100)
+    copy = BloomFilter.from_bytes(bloom.to_bytes())
+    assert copy.bits == bloom.bits and copy.num_hashes == bloom.num_hashes and copy.count == 4
+    script = ("from heap_db.bloom import BloomFilter; "
+              "print(BloomFilter.of(['CS', 'EE', 7, None], capacity=100).to_bytes().hex())")
+    out = subprocess.run([sys.executable, "-c", script], cwd=PACKAGE_DIR, capture_output=True, text=True,
+                         env=dict(os.environ, PYTHONHASHSEED="123"), check=True).stdout.strip()
+    assert bytes.fromhex(out) == bloom.to_bytes()
+
+
+def test_heap_file_filters_answer_misses_and_grow(tmp_path):
+    s = make_schema()
+    with HeapFileTable(str(tmp_path / "inst.tbl"), s) as table:
+        table.insert_many(DbTuple(s, i * 2, "CS" if i % 2 else "EE", i) for i in range(500))
+        table.create_index("salary")
+        table.create_bloom_filter()
+        table.create_bloom_filter("salary")
+        table.create_bloom_filter("dept_name")
+        assert not table.might_contain("ID", 1) and table.might_contain("ID", 2)
+        assert table.lookup_by_key(3) is None and table.lookup_by_key(4).get(2) == 2
+        assert table.index_lookup("salary", 10 ** 6) == []
+        assert table.lookup_by_column("dept_name", "Math").size() == 0
+        assert table.lookup_by_column("dept_name", "EE").size() == 250
+
+        # past the 1024 values it was sized for, the key filter is rebuilt larger
+        table.insert_many(DbTuple(s, i * 2, "Math", i) for i in range(500, 3000))
+        table.insert(DbTuple(s, 1, "Math", 1))
+        assert table._blooms["ID"][1].capacity >= 6000
+        assert all(table.lookup_by_key(k) is not None for k in [1] + list(range(0, 6000, 2)))
+        assert table.delete(4) and table.lookup_by_key(4) is None
+        assert table.lookup_by_column("dept_name", "Math").size() == 2501
+        with pytest.raises(ValueError):
+            table.create_bloom_filter("nope")
+
+
+def test_index_join_skips_missing_keys(tmp_path):
+    s = make_schema()
+    players = Table(s)
+    players.insert_many(DbTuple(s, i, "CS", i) for i in range(200))
+    with HeapFileTable(str(tmp_path / "perf.tbl"), s) as perf:
+        perf.insert_many(DbTuple(s, i, "CS", i) for i in range(0, 200, 10))
+        expected = [t.values for t in IndexNestedLoopJoin(Scan(players), perf, "ID")]
+        perf.create_bloom_filter()
+        probes = []
+        key_rids = perf._key_rids
+        perf._key_rids = lambda: probes.append(1) or key_rids()
+        assert [t.values for t in IndexNestedLoopJoin(Scan(players), perf, "ID")] == expected
+        assert len(expected) == 20 and len(probes) < 30  # the 180 missing keys are (almost all) never probed
+
+
+def test_compressed_pages_read_only_candidate_pages(tmp_path):
+    path = str(tmp_path / "inst.tblz")
+    s = make_schema()
+    with CompressedTable(path, s, rows_per_page=100, bloom_columns=["ID", "dept_name"]) as table:
+        table.insert_many(DbTuple(s, i, ["CS", "EE"][i // 500], i) for i in range(1000))
+
+    table = CompressedTable(path)
+    reads = []
+    decode = table._decode_columns
+    table._decode_columns = lambda page_no, cols: reads.append(page_no) or decode(page_no, cols)
+    assert table.lookup_by_key(777).values == [777, "EE", 777]
+    assert 7 in reads and len(set(reads)) <= 2
+    reads.clear()
+    assert table.lookup_by_key(5000) is None and len(reads) <= 1
+    assert not table.might_contain("dept_name", "Math") and table.might_contain("dept_name", "CS")
+    reads.clear()
+    assert table.lookup_by_column("dept_name", "CS").size() == 500
+    assert set(range(5)) <= set(reads) and len(set(reads)) <= 6  # pages 5-9 hold only "EE"
+    table.close()
@@ -0,0 +1,51 @@
+import random
+from heap_db.btree import BPlusTree
+
+
+def test_search_with_duplicates_and_splits():
+    tree = BPlusTree(order=4)
+    keys = list(range(200)) * 2
+    random.Random(7).shuffle(keys)
+    for k in keys:
+        tree.insert(k, f"v{k}")
+    assert len(tree) == 400
+    assert tree.search(42) == ["v42", "v42"]
+    assert tree.search(1000) == []
+    assert list(tree.keys()) == list(range(200))
+
+
+def test_range_bounds():
+    tree = BPlusTree(order=4)
+    for k in range(50):
+        tree.insert(k, k)
+    assert [k for k, _ in tree.range(10, 15)] == [10, 11, 12, 13, 14, 15]
+    assert [k for k, _ in tree.range(10, 15, low_inclusive=False, high_inclusive=False)] == [11, 12, 13, 14]
+    assert [k for k, _ in tree.range(high=2)] == [0, 1, 2]
+    assert [k for k, _ in tree.range(low=48)] == [48, 49]
+
+
+def test_remove_matches_identity_first():
+    tree = BPlusTree(order=3)
+    a, b = ["same"], ["same"]
+    tree.insert("x", a)
+    tree.insert("x", b)
+    assert tree.remove("x", b)
+    assert tree.search("x")[0] is a
+    assert tree.remove("x", a)
+    assert tree.search("x") == []
+    assert not tree.remove("x", a)
+
+
+def test_null_keys_kept_out_of_ranges():
+    tree = BPlusTree()
+    tree.insert(None, "n")
+    tree.insert(1, "one")
+    assert tree.search(None) == ["n"]
+    assert list(tree.range()) == [(1, "one")]
+
+
+def test_string_keys_in_order():
+    tree = BPlusTree(order=3)
+    for name in ["Physics", "Biology", "Comp. Sci.", "History", "Finance"]:
+        tree.insert(name, name)
+    assert list(tree.keys()) == sorted(["Physics", "Biology", "Comp. Sci.", "History", "Finance"])
@@ -0,0 +1,145 @@
+import threading
+import pytest
+from heap_db.schema import Schema
+from heap_db.db_tuple import DbTuple
+from heap_db.buffer_pool import BufferPool
+from heap_db.heap_file import HeapFileTable
+
+
+class FakeSource:
+    """Page source that records disk traffic."""
+    def __init__(self, page_size=100):
+        self.page_size = page_size
+        self.disk = {}
+        self.reads = 0
+        self.writes = 0
+
+    def read_page(self, page_no):
+        self.reads += 1
+        return bytearray(self.disk.get(page_no, bytes(self.page_size)))
+
+    def write_page(self, page_no, data):
+        self.writes += 1
+        self.disk[page_no] = bytes(data)
+
+
+def test_hits_and_misses():
+    pool = BufferPool(memory_budget=1000)
+    src = FakeSource()
+    with pool.page(src, 1):
+        pass
+    with pool.page(src, 1):
+        pass
+    assert (pool.stats.hits, pool.stats.misses) == (1, 1)
+    assert src.reads == 1
+
+
+def test_lru_eviction_writes_back_dirty_pages():
+    pool = BufferPool(memory_budget=300)  # three 100-byte pages
+    src = FakeSource()
+    with pool.page(src, 1, dirty=True) as data:
+        data[0] = 7
+    for page_no in (2, 3, 4):  # page 1 is least recently used
+        with pool.page(src, page_no):
+            pass
+    assert pool.stats.evictions == 1
+    assert pool.used_bytes <= pool.memory_budget
+    assert src.disk[1][0] == 7
+    assert pool.cached_pages(src) == 3
+
+
+def test_pinned_pages_are_not_evicted():
+    pool = BufferPool(memory_budget=200)
+    src = FakeSource()
+    pool.fetch_page(src, 1)
+    pool.fetch_page(src, 2)
+    with pytest.raises(RuntimeError):
+        pool.fetch_page(src, 3)
+    pool.unpin_page(src, 1)
+    pool.fetch_page(src, 3)
+    assert pool.cached_pages(src) == 2
+
+
+def test_unpin_without_pin_raises():
+    pool = BufferPool()
+    with pytest.raises(ValueError):
+        pool.unpin_page(FakeSource(), 1)
+
+
+class SlowSource(FakeSource):
+    """Page source whose reads wait until `readers` of them are in flight at once."""
+    def __init__(self, readers):
+        super().__init__()
+        self.barrier = threading.Barrier(readers, timeout=2)
+
+    def read_page(self, page_no):
+        self.barrier.wait()
+        return super().read_page(page_no)
+
+
+def run_fetches(pool, src, page_numbers):
+    errors = []
+
+    def fetch(page_no):
+        try:
+            with pool.page(src, page_no):
+                pass
+        except Exception as e:  # surfaced below
+            errors.append(repr(e))
+
+    threads = [threading.Thread(target=fetch, args=(n,)) for n in page_numbers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return errors
+
+
+def test_misses_on_different_pages_read_concurrently():
+    pool = BufferPool(memory_budget=1000)
+    src = SlowSource(readers=3)
+    assert run_fetches(pool, src, [1, 2, 3]) == []  # each read waits for the other two
+    assert src.reads == 3 and pool.cached_pages(src) == 3
+
+
+def test_misses_on_one_page_share_a_read():
+    pool = BufferPool(memory_budget=1000)
+    src = SlowSource(readers=1)
+    assert run_fetches(pool, src, [1] * 8) == []
+    assert src.reads == 1 and pool.stats.misses == 1 and pool.stats.hits == 7
+    assert pool.cached_pages(src) == 1 and pool.used_bytes == 100
+
+
+def test_heap_file_lookups_served_from_pool(tmp_path):
+    schema = Schema()
+    schema.add_key_int_type("id")
+    schema.add_varchar_type("name", 20)
+    pool = BufferPool(memory_budget=64 * 1024)
+    table = HeapFileTable(str(tmp_path / "t.tbl"), schema, page_size=1024, buffer_pool=pool)
+    for i in range(300):
+        table.insert(DbTuple(schema, i, f"player{i}"))
+
+    list(table)  # warm the pool
+    pool.reset_stats()
+    for i in range(0, 300, 10):
+        assert table.lookup_by_key(i).get("name") == f"player{i}"
+    assert pool.stats.misses == 0 and pool.stats.hits > 0
+
+    table.close()
+    assert pool.cached_pages(table) == 0
+    reopened = HeapFileTable(str(tmp_path / "t.tbl"), buffer_pool=pool)
+    assert reopened.size() == 300
+    reopened.close()
+
+
+def test_heap_file_scan_stays_within_budget(tmp_path):
+    schema = Schema()
+    schema.add_int_type("n")
+    pool = BufferPool(memory_budget=4 * 512)
+    table = HeapFileTable(str(tmp_path / "big.tbl"), schema, page_size=512, buffer_pool=pool)
+    for i in range(2000):
+        table.insert(DbTuple(schema, i))
+    assert sum(r.get(0) for r in table) == sum(range(2000))
+    assert pool.used_bytes <= pool.memory_budget
+    assert pool.stats.evictions > 0
+    table.close()
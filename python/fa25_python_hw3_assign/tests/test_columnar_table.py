@@ -0,0 +1,115 @@
+import sys
+from heap_db.schema import Schema
+from heap_db.db_tuple import DbTuple
+from heap_db.table import Table
+from heap_db.columnar_table import ColumnarTable
+from heap_db.select_query import SelectQuery
+from heap_db.group_by import Aggregate, GroupByQuery
+from heap_db.query_conditions import EqualsCondition
+
+
+def make_census():
+    s = Schema()
+    s.add_key_int_type("usid")
+    s.add_int_type("age")
+    s.add_varchar_type("workclass", 20)
+    s.add_varchar_type("native_country", 30)
+    return s
+
+
+def fill(table, n):
+    s = table.get_schema()
+    for i in range(n):
+        table.insert(DbTuple(s, i, 20 + i % 50, ["Private", "State_gov", "Never_worked"][i % 3], "United_States"))
+
+
+def test_same_api_as_table():
+    s = make_census()
+    t = ColumnarTable(s)
+    fill(t, 30)
+    assert t.size() == 30
+    assert not t.insert(DbTuple(s, 5, 1, "x", "y"))
+    assert t.lookup_by_key(8).get("workclass") == "Never_worked"
+    assert t.lookup_by_column("workclass", "Private").size() == 10
+    assert t.delete(0) and not t.delete(0)
+    assert t.lookup_by_column("workclass", "Private").size() == 9
+    assert [r.get(0) for r in t] == list(range(1, 30))
+
+
+def test_rows_round_trip_with_nulls_and_unicode():
+    s = Schema()
+    s.add_int_type("n")
+    s.add_varchar_type("name", 20)
+    t = ColumnarTable(s)
+    rows = [(1, "Zoë"), (None, ""), (-5, "Ωmega")]
+    for r in rows:
+        t.insert(DbTuple(s, *r))
+    assert [tuple(r) for r in t] == rows
+    assert list(t.column_values("n")) == [1, None, -5]
+
+
+def test_scan_columns_reads_only_requested_columns():
+    s = make_census()
+    t = ColumnarTable(s)
+    fill(t, 10)
+    t.delete(3)
+    ages = list(t.scan_columns(["age", "usid"]))
+    assert ages[:3] == [(20, 0), (21, 1), (22, 2)]
+    assert len(ages) == 9
+
+
+class CountingColumn:
+    """Wraps a column and counts the values read from it."""
+    def __init__(self, column):
+        self.column = column
+        self.reads = 0
+
+    def get(self, row_id):
+        self.reads += 1
+        return self.column.get(row_id)
+
+    __getitem__ = get
+
+    def __iter__(self):
+        for value in self.column:
+            self.reads += 1
+            yield value
+
+
+def test_queries_read_only_the_columns_they_use():
+    s = make_census()
+    t = ColumnarTable(s)
+    fill(t, 300)
+    rows = Table(s)
+    fill(rows, 300)
+    country = t._columns[3] = CountingColumn(t._columns[3])
+
+    query = SelectQuery(["usid"], EqualsCondition("age", 21))
+    assert [r.values for r in query.select(t)] == [r.values for r in query.select(rows)]
+    by_workclass = GroupByQuery(["workclass"], [Aggregate("count"), Aggregate("max", "age")])
+    assert sorted(r.values for r in by_workclass.select(t)) == sorted(r.values for r in by_workclass.select(rows))
+    assert country.reads == 0
+
+    matches = list(t.scan(EqualsCondition("workclass", "Never_worked").compile(s)))
+    assert len(matches) == 100 and country.reads == 100  # read only to build the matching rows
+
+
+def test_compaction_keeps_indexes_consistent():
+    s = make_census()
+    t = ColumnarTable(s)
+    fill(t, 300)
+    t.create_index("age")
+    for i in range(0, 300, 2):
+        assert t.delete(i)
+    assert t.size() == 150
+    assert {r.get(0) for r in t.index_lookup("age", 21)} == {i for i in range(1, 300, 2) if i % 50 == 1}
+    assert t.lookup_by_key(299).get("age") == 20 + 299 % 50
+
+
+def test_uses_less_memory_than_row_table():
+    s = make_census()
+    columnar, rows = ColumnarTable(s), Table(s)
+    fill(columnar, 2000)
+    fill(rows, 2000)
+    row_bytes = sum(sys.getsizeof(t.values) + sum(sys.getsizeof(v) for v in t.values) for t in rows)
+    assert columnar.memory_bytes() * 3 < row_bytes
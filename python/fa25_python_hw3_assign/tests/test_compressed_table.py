@@ -0,0 +1,184 @@
+import os
+import pickle
+import random
+import pytest
+from heap_db.schema import Schema
+from heap_db.db_tuple import DbTuple
+from heap_db.heap_file import HeapFileTable
+from heap_db import compressed_table
+from heap_db.compressed_table import CompressedTable
+from heap_db.page_encoding import column_encoding, decode_column, encode_column
+from heap_db.csv_loader import load_csv
+from heap_db.select_query import SelectQuery
+from heap_db.query_conditions import EqualsCondition
+
+CENSUS = os.path.join(os.path.dirname(__file__), "..", "..", "..", "csvs", "1994-census-summary.csv")
+
+
+def make_schema():
+    s = Schema()
+    s.add_key_int_type("ID")
+    s.add_varchar_type("dept_name", 15)
+    s.add_int_type("salary")
+    return s
+
+
+def make_rows(s, n):
+    return [DbTuple(s, i, ["CS", "EE", "Math", "Bio"][i % 4], 1000 + i * 7 % 5000) for i in range(n)]
+
+
+@pytest.mark.parametrize("values, encoding", [
+    ([17 + i % 70 for i in range(1000)], "bitpack"),
+    ([5] * 600 + [9] * 400, "rle"),
+    ([-2 ** 31, 2 ** 31 - 1] * 500, "dict"),
+    ([(-2 ** 31) + i * 4099 for i in range(1000)], "bitpack"),
+    ([3, None, 5, None] * 10, "bitpack"),
+    ([None] * 7, "bitpack"),  # NULLs are filled in, so the values are one width-0 frame
+])
+def test_int_encodings_round_trip(values, encoding):
+    block = encode_column(values, is_int=True)
+    assert column_encoding(block, 0, len(values)) == encoding
+    assert decode_column(block, 0, len(values), is_int=True) == (values, len(block))
+
+
+@pytest.mark.parametrize("values, encoding", [
+    (["Private", "State_gov", "Self_emp"] * 300, "dict"),
+    ([f"name{i}" for i in range(300)], "plain"),
+    (["café", "naïve", ""] * 20 + [f"é{i}" for i in range(100)], "plain"),
+    (["Ünïcode"] * 50, "dict"),
+])
+def test_string_encodings_round_trip(values, encoding):
+    block = encode_column(values, is_int=False)
+    assert column_encoding(block, 0, len(values)) == encoding
+    assert decode_column(block, 0, len(values), is_int=False) == (values, len(block))
+
+
+def test_random_ints_round_trip():
+    rng = random.Random(7)
+    for width in range(0, 33):
+        values = [rng.randrange(0, 2 ** width) - 2 ** 31 if width else 0 for _ in range(rng.randrange(1, 300))]
+        block = encode_column(values, is_int=True)
+        assert decode_column(block, 0, len(values), is_int=True)[0] == values
+
+
+def test_insert_reopen_and_lookup(tmp_path):
+    path = str(tmp_path / "inst.tblz")
+    s = make_schema()
+    table = CompressedTable(path, s, rows_per_page=256)
+    rows = make_rows(s, 1000)
+    assert table.insert_many(rows) == 1000
+    assert not table.insert(DbTuple(s, 5, "CS", 1))
+    assert table.page_count() == 3  # 232 rows are still in the open page
+    assert table.lookup_by_key(999).values == rows[999].values
+    assert [t.values for t in table] == [t.values for t in rows]
+    table.close()
+
+    table = CompressedTable(path)
+    assert table.page_count() == 4 and table.size() == 1000
+    assert table.lookup_by_key(300).values == rows[300].values
+    assert table.lookup_by_key(1000) is None
+    assert table.insert(DbTuple(table.get_schema(), 1000, "EE", 7))
+    assert not table.insert(DbTuple(table.get_schema(), 10, "EE", 7))
+    assert table.size() == 1001
+    assert list(table.column_values("ID")) == list(range(1001))
+    assert list(table.scan_columns(["salary", "ID"]))[:2] == [(1000, 0), (1007, 1)]
+    assert [t.get(0) for t in table.lookup_by_column("dept_name", "EE")] == list(range(1, 1001, 4)) + [1000]
+    table.close()
+
+
+def test_append_only_and_errors(tmp_path):
+    path = str(tmp_path / "inst.tblz")
+    s = make_schema()
+    with CompressedTable(path, s) as table:
+        table.insert_many(make_rows(s, 10))
+        with pytest.raises(ValueError):
+            table.delete(3)
+        with pytest.raises(ValueError):
+            table.insert(DbTuple(make_schema(), 11, "CS", 1))
+        with pytest.raises(ValueError):  # the first row goes in before the second one is rejected
+            table.insert_many([DbTuple(s, 100, "CS", 1), DbTuple(make_schema(), 11, "CS", 1)])
+        assert table.size() == 11 == len(list(table))
+    with pytest.raises(ValueError):
+        CompressedTable(str(tmp_path / "missing.tblz"))
+    size = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(b"\x40\x00\x00\x00\x01\x00")  # a page header with no body, or one still being appended
+    with CompressedTable(path, read_only=True) as reader:
+        assert reader.size() == 11
+        with pytest.raises(ValueError):
+            reader.insert(DbTuple(reader.get_schema(), 10, "CS", 1))
+        pickle.loads(pickle.dumps(reader)).close()
+    with CompressedTable(path) as table:
+        assert table.size() == 11 and os.path.getsize(path) == size + 6  # readers leave the tail alone
+        assert table.insert(DbTuple(table.get_schema(), 10, "CS", 1))
+    with CompressedTable(path) as table:
+        assert list(table.column_values("ID")) == list(range(10)) + [100, 10]
+
+
+def test_reads_see_rows_open_when_they_started(tmp_path):
+    s = make_schema()
+    with CompressedTable(str(tmp_path / "inst.tblz"), s, rows_per_page=100) as table:
+        table.insert_many(make_rows(s, 250))
+        ids = table.column_values("ID")
+        assert next(ids) == 0
+        table.insert_many(DbTuple(s, i, "CS", 1) for i in range(250, 300))  # seals the open page
+        assert [0] + list(ids) == list(range(250))
+
+        candidates = table._candidate_pages
+        def seal_first(*args):
+            table.insert_many(DbTuple(s, i, "EE", 1) for i in range(300, 400))
+            return candidates(*args)
+        table._candidate_pages = seal_first
+        assert sorted(t.get(0) for t in table.lookup_by_column("dept_name", "EE")) == list(range(1, 250, 4))
+
+
+def test_files_of_the_older_format_are_rejected(tmp_path):
+    path = str(tmp_path / "old.tblz")
+    schema_bytes = make_schema().serialize()
+    with open(path, "wb") as f:  # header of the format without Bloom filters, then no pages
+        f.write(b"HDBZ" + len(schema_bytes).to_bytes(4, "little") + schema_bytes)
+    with pytest.raises(ValueError, match="older format"):
+        CompressedTable(path)
+
+
+def test_filtered_scans_decode_only_the_columns_they_use(tmp_path, monkeypatch):
+    s = make_schema()
+    with CompressedTable(str(tmp_path / "inst.tblz"), s, rows_per_page=100) as table:
+        table.insert_many(make_rows(s, 500))
+        table.flush()
+        decoded = []
+        decode = compressed_table.decode_column
+        monkeypatch.setattr(compressed_table, "decode_column",
+                            lambda body, offset, rows, is_int: decoded.append(offset) or decode(body, offset, rows, is_int))
+        query = SelectQuery(["ID"], EqualsCondition("salary", 1000 + 250 * 7))
+        assert [t.get(0) for t in query.select(table)] == [250]
+        assert len(decoded) == 5 + 1  # salary of every page, then ID of the one page that matched
+
+
+def test_select_and_pickle(tmp_path):
+    s = make_schema()
+    with CompressedTable(str(tmp_path / "inst.tblz"), s, rows_per_page=100) as table:
+        table.insert_many(make_rows(s, 500))
+        query = SelectQuery(["ID"], EqualsCondition("dept_name", "Bio"))
+        assert [t.get(0) for t in query.select(table)] == list(range(3, 500, 4))
+        table.flush()
+        copy = pickle.loads(pickle.dumps(table))
+        assert copy.size() == 500 and copy.lookup_by_key(42).get(1) == "Math"
+        copy.close()
+
+
+@pytest.mark.skipif(not os.path.exists(CENSUS), reason="census csv not available")
+def test_census_is_an_order_of_magnitude_smaller(tmp_path):
+    rows = load_csv(CENSUS)
+    s = rows.get_schema()
+    with CompressedTable(str(tmp_path / "census.tblz"), s) as compressed:
+        compressed.insert_many(rows)
+        compressed_bytes = compressed.file_bytes()
+        encodings = dict(zip((s.get_type(i).get_column_name() for i in range(s.size())),
+                             compressed.column_encodings(0)))
+        assert [t.values for t in compressed] == [t.values for t in rows]
+    with HeapFileTable(str(tmp_path / "census.tbl"), s) as heap:
+        heap.insert_many(rows)
+    assert os.path.getsize(str(tmp_path / "census.tbl")) > 10 * compressed_bytes
+    assert encodings["sex"] == encodings["race"] == "dict"
+    assert encodings["age"] == "bitpack"
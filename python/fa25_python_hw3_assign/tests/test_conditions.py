@@ -45,4 +45,52 @@ def test_or_condition_short_circuit_left_true():
     row = object()
     left, right = TrueCond(), FalseCond()
     (left | right).evaluate(row)
-    assert left.calls == 1 and right.calls == 0  # right must not be evaluated
\ No newline at end of file
+    assert left.calls == 1 and right.calls == 0  # right must not be evaluated
+
+def test_compiled_condition_matches_evaluate():
+    from heap_db.query_conditions import AndCondition, OrCondition, NotCondition
+    s = Schema()
+    s.add_key_int_type("id")
+    s.add_varchar_type("dept", 20)
+    s.add_int_type("age")
+    rows = [DbTuple(s, i, ["CS", "EE", "Math"][i % 3], 20 + i % 5) for i in range(30)]
+    cond = (EqualsCondition("dept", "CS") & ~EqualsCondition("age", 21)) | EqualsCondition("id", 7)
+    assert isinstance(cond, OrCondition) and isinstance(cond.left, AndCondition)
+    assert isinstance(cond.left.right, NotCondition)
+    pred = cond.compile(s)
+    assert [pred(r) for r in rows] == [cond.evaluate(r) for r in rows]
+
+
+def test_compile_resolves_missing_column_up_front():
+    s = make_row().get_schema()
+    with pytest.raises(ValueError):
+        EqualsCondition("nope", "x").compile(s)
+
+
+def test_compile_falls_back_to_evaluate_for_custom_conditions():
+    row = make_row()
+    left, right = TrueCond(), FalseCond()
+    pred = (left | right).compile(row.get_schema())
+    assert pred(row) is True
+    assert left.calls == 1 and right.calls == 0
+    assert (EqualsCondition("name", "Ada") & FalseCond()).compile(row.get_schema())(row) is False
+
+
+def test_comparison_conditions_compile_and_skip_nulls():
+    from heap_db.query_conditions import LessThanCondition, GreaterThanCondition, BetweenCondition, InCondition
+    s = Schema()
+    s.add_key_int_type("id")
+    s.add_int_type("salary")
+    rows = [DbTuple(s, i, v) for i, v in enumerate([40000, 50000, 60000, None])]
+    conds = [
+        (LessThanCondition("salary", 50000), [0]),
+        (LessThanCondition("salary", 50000, inclusive=True), [0, 1]),
+        (GreaterThanCondition("salary", 50000), [2]),
+        (GreaterThanCondition("salary", 50000, inclusive=True), [1, 2]),
+        (BetweenCondition("salary", 45000, 60000), [1, 2]),
+        (InCondition("salary", [60000, None, 40000]), [0, 2]),
+    ]
+    for cond, expected in conds:
+        predicate = cond.compile(s)
+        assert [r.get(0) for r in rows if cond.evaluate(r)] == expected
+        assert [r.get(0) for r in rows if predicate(r)] == expected
@@ -0,0 +1,153 @@
+import os
+import pytest
+import heap_db
+from heap_db.schema import Schema
+from heap_db.db_tuple import DbTuple
+from heap_db.table import Table
+from heap_db.columnar_table import ColumnarTable
+from heap_db.heap_file import HeapFileTable
+from heap_db.column_types import TypeInt, TypeVarchar
+from heap_db.csv_loader import LoadProgress, infer_schema, load_csv, load_csv_parallel, split_csv
+
+CENSUS = os.path.join(os.path.dirname(__file__), "..", "..", "..", "csvs", "1994-census-summary.csv")
+
+TEAMS = (
+    "id,year,name,park\n"
+    "1,1884,\"Altoona Mountain City\",\n"
+    "2,2001,\"Anaheim Angels\",\"Edison International Field\"\n"
+    "3,,\"Boston, Red Sox\",Fenway\n"
+)
+
+
+@pytest.fixture
+def teams_csv(tmp_path):
+    path = tmp_path / "teams.csv"
+    path.write_text(TEAMS)
+    return str(path)
+
+
+def test_infer_schema(teams_csv):
+    schema = infer_schema(teams_csv, key="id")
+    assert schema.get_key() == "id"
+    assert [type(schema.get_type(i)) for i in range(4)] == [TypeInt, TypeInt, TypeVarchar, TypeVarchar]
+    assert schema.get_max_sql_size(2) >= len("Altoona Mountain City")
+
+
+def test_load_csv_into_table(teams_csv):
+    table = heap_db.load_csv(teams_csv, key="id")
+    assert table.size() == 3
+    assert table.lookup_by_key(3).values == [3, None, "Boston, Red Sox", "Fenway"]
+    assert table.lookup_by_key(1).get("park") == ""
+
+
+def test_duplicate_keys_are_skipped_and_reported(teams_csv, tmp_path):
+    path = tmp_path / "dups.csv"
+    path.write_text(TEAMS + "2,1999,Again,Nowhere\n")
+    seen = []
+    table = load_csv(str(path), key="id", chunk_size=2, progress=lambda p: seen.append((p.rows, p.skipped)))
+    assert table.size() == 3
+    assert seen == [(2, 0), (3, 1), (3, 1)]
+
+
+def test_value_that_breaks_inferred_type_names_line(tmp_path):
+    path = tmp_path / "late.csv"
+    path.write_text("id,n\n1,2\n2,3\n3,three\n")
+    with pytest.raises(ValueError, match="line 4"):
+        load_csv(str(path), sample_size=2)
+
+
+def test_header_must_match_schema(teams_csv):
+    schema = Schema()
+    schema.add_int_type("id")
+    with pytest.raises(ValueError):
+        load_csv(teams_csv, schema=schema)
+
+
+@pytest.mark.parametrize("make", [Table, ColumnarTable])
+def test_load_into_existing_table(teams_csv, make):
+    table = make(infer_schema(teams_csv, key="id"))
+    table.insert(DbTuple(table.get_schema(), 1, 1900, "Existing", "Park"))
+    load_csv(teams_csv, table=table)
+    assert table.size() == 3
+    assert table.lookup_by_key(1).get("name") == "Existing"
+
+
+def test_load_into_heap_file(tmp_path):
+    # heap file records have no NULL encoding, so every year is filled in here
+    teams_csv = tmp_path / "teams.csv"
+    teams_csv.write_text(TEAMS.replace("3,,", "3,1901,"))
+    schema = infer_schema(str(teams_csv), key="id")
+    with HeapFileTable(str(tmp_path / "teams.tbl"), schema, page_size=256) as table:
+        load_csv(str(teams_csv), table=table)
+        assert sorted(r.get(0) for r in table) == [1, 2, 3]
+    with HeapFileTable(str(tmp_path / "teams.tbl")) as reopened:
+        assert reopened.lookup_by_key(2).get("park") == "Edison International Field"
+
+
+def test_insert_many_matches_insert(tmp_path):
+    schema = Schema()
+    schema.add_key_int_type("id")
+    schema.add_varchar_type("name", 10)
+    rows = [DbTuple(schema, i % 50, f"n{i}") for i in range(80)]
+    for table in (Table(schema), ColumnarTable(schema), HeapFileTable(str(tmp_path / "t.tbl"), schema, page_size=256)):
+        assert table.insert_many(rows) == 50
+        assert sorted(tuple(r) for r in table) == [(i, f"n{i}") for i in range(50)]
+        table.close()
+
+
+@pytest.mark.skipif(not os.path.exists(CENSUS), reason="census csv not available")
+def test_load_census():
+    progress = []
+    table = load_csv(CENSUS, key="usid", progress=progress.append)
+    assert table.size() == progress[-1].rows > 30000
+    assert table.lookup_by_key(1).get("workclass") == "State_gov"
+    assert isinstance(progress[-1], LoadProgress)
+
+
+QUAKES = (
+    "time,mag,place\n"
+    "t1,5,\"12 km ENE of Yujing, Taiwan\"\n"
+    "t2,6,\"a \"\"quoted\"\"\nmultiline, place\"\n"
+    "t3,,plain\n"
+)
+
+
+def test_split_csv_respects_quoted_fields(tmp_path):
+    path = tmp_path / "quakes.csv"
+    path.write_bytes(QUAKES.encode() + b"".join(f"t{i},{i},\"x, {i}\"\n".encode() for i in range(4, 200)))
+    data = path.read_bytes()
+    for chunk_bytes in (1, 7, 50, 1 << 20):
+        chunks = split_csv(str(path), chunk_bytes)
+        assert chunks[0][0] == len("time,mag,place\n")
+        assert chunks[-1][1] == len(data)
+        for (_, end, _), (start, _, _) in zip(chunks, chunks[1:]):
+            assert end == start and data[end - 1:end] == b"\n"
+            assert data[:end].count(b'"') % 2 == 0
+
+
+@pytest.mark.parametrize("make", [Table, ColumnarTable])
+def test_parallel_load_matches_serial(tmp_path, make):
+    path = tmp_path / "quakes.csv"
+    path.write_text(QUAKES + "".join(f"t{i},{i % 7 or ''},\"x, {i}\"\n" for i in range(4, 500)))
+    schema = infer_schema(str(path), key="time")
+    expected = load_csv(str(path), table=make(schema))
+    seen = []
+    table = load_csv_parallel(str(path), table=make(schema), workers=2, chunk_bytes=512, progress=seen.append)
+    assert [tuple(r) for r in table] == [tuple(r) for r in expected]
+    assert table.lookup_by_key("t2").get("place") == 'a "quoted"\nmultiline, place'
+    assert seen[-1].rows == 499 and seen[-1].skipped == 0
+
+
+def test_parallel_load_into_heap_file_reports_line(tmp_path):
+    path = tmp_path / "nums.csv"
+    path.write_text("id,n\n" + "".join(f"{i},{i * 2}\n" for i in range(1000)))
+    schema = infer_schema(str(path), key="id")
+    with HeapFileTable(str(tmp_path / "nums.tbl"), schema) as table:
+        load_csv_parallel(str(path), table=table, workers=2, chunk_bytes=1000)
+        assert table.size() == 1000
+        assert table.lookup_by_key(999).get("n") == 1998
+
+    with open(path, "a") as f:
+        f.write("1000,oops\n")
+    with pytest.raises(ValueError, match="line 1002"):
+        load_csv_parallel(str(path), schema=schema, workers=2, chunk_bytes=1000)
@@ -0,0 +1,169 @@
+import os
+import pickle
+import threading
+import time
+import pytest
+from heap_db.schema import Schema
+from heap_db.table import Table
+from heap_db.columnar_table import ColumnarTable
+from heap_db.heap_file import HeapFileTable
+from heap_db.buffer_pool import BufferPool
+from heap_db.db_tuple import DbTuple
+from heap_db.locks import RWLock
+from heap_db.executor import QueryExecutor
+from heap_db.select_query import SelectQuery
+from heap_db.group_by import Aggregate, GroupByQuery
+from heap_db.query_conditions import EqualsCondition, LessThanCondition
+
+
+def make_schema():
+    s = Schema()
+    s.add_key_int_type("ID")
+    s.add_varchar_type("dept_name", 15)
+    s.add_int_type("salary")
+    return s
+
+
+def fill(table, n=1000):
+    s = table.get_schema()
+    table.insert_many(DbTuple(s, i, ["CS", "EE", "Math", "Bio"][i % 4], 1000 + i) for i in range(n))
+    return table
+
+
+def ids(table):
+    return sorted(t.get(0) for t in table)
+
+
+def test_rwlock_readers_share_writers_exclude():
+    lock = RWLock()
+    inside = []
+    entered = threading.Event()
+
+    def reader():
+        with lock.read():
+            inside.append("r")
+            entered.wait(1)
+
+    readers = [threading.Thread(target=reader) for _ in range(3)]
+    for r in readers:
+        r.start()
+    deadline = time.time() + 1
+    while len(inside) < 3 and time.time() < deadline:
+        time.sleep(0.001)
+    assert len(inside) == 3  # all three readers hold the lock together
+
+    def writer():
+        with lock.write():
+            inside.append("w")
+
+    w = threading.Thread(target=writer)
+    w.start()
+    time.sleep(0.02)
+    assert "w" not in inside  # the writer waits for the readers
+    entered.set()
+    w.join(1)
+    for r in readers:
+        r.join(1)
+    assert inside[-1] == "w"
+
+
+def test_rwlock_is_reentrant():
+    lock = RWLock()
+    with lock.write():
+        with lock.write(), lock.read():
+            pass
+    with lock.read(), lock.read():
+        pass
+    with lock.write():
+        pass  # everything above was released
+    with pytest.raises(RuntimeError):
+        lock.release_write()
+
+
+def test_executor_matches_sequential_results():
+    table = fill(Table(make_schema()))
+    table.create_index("dept_name")
+    queries = [SelectQuery(["ID"], EqualsCondition("dept_name", d)) for d in ["CS", "EE", "Math", "Bio"]]
+    queries.append(SelectQuery(None, LessThanCondition("salary", 1100)))
+    queries.append(GroupByQuery(["dept_name"], [Aggregate("count")]))
+    with QueryExecutor(max_workers=4) as executor:
+        futures = executor.submit_all((q, table) for q in queries)
+        results = [f.result() for f in futures]
+    assert [ids(r) for r in results] == [ids(q.select(table)) for q in queries]
+
+
+@pytest.mark.parametrize("wal", [False, True])
+def test_process_executor_reopens_heap_files(wal, tmp_path):
+    path = str(tmp_path / "inst.tbl")
+    table = fill(HeapFileTable(path, make_schema(), wal=wal))
+    try:
+        query = SelectQuery(["ID"], EqualsCondition("dept_name", "EE"))
+        with QueryExecutor(max_workers=2, processes=True) as executor:
+            heap_result, memory_result = executor.map([(query, table), (query, fill(Table(make_schema())))])
+        assert ids(heap_result) == ids(memory_result) == list(range(1, 1000, 4))
+        assert os.path.exists(path + ".wal") == wal  # the workers left the owner's log alone
+        table.insert(DbTuple(table.get_schema(), 1000, "EE", 0))
+    finally:
+        table.close()
+    with HeapFileTable(path) as reopened:
+        assert reopened.size() == 1001
+
+
+@pytest.mark.parametrize("kind", [Table, ColumnarTable])
+def test_process_executor_ships_in_memory_tables_once(kind):
+    table = fill(kind(make_schema()))
+    table.get_schema().get_codec()  # a built codec must not stop the table from pickling
+    assert ids(pickle.loads(pickle.dumps(table))) == list(range(1000))
+    queries = [SelectQuery(["ID"], EqualsCondition("dept_name", d)) for d in ["CS", "EE", "Math", "Bio"]]
+    with QueryExecutor(max_workers=2, processes=True) as executor:
+        first = executor.map((q, table) for q in queries)
+        pool = executor._pool
+        assert [ids(r) for r in executor.map((q, table) for q in queries)] == [ids(r) for r in first]
+        assert executor._pool is pool  # the unchanged table was not shipped again
+
+        table.insert(DbTuple(table.get_schema(), 1000, "EE", 0))
+        table.delete(1)
+        assert ids(executor.map([(queries[1], table)])[0]) == list(range(5, 1000, 4)) + [1000]
+        assert executor._pool is not pool
+
+
+@pytest.mark.parametrize("kind", ["table", "heap"])
+def test_reads_run_alongside_writes(kind, tmp_path):
+    s = make_schema()
+    if kind == "table":
+        table = Table(s)
+    else:
+        table = HeapFileTable(str(tmp_path / "inst.tbl"), s, page_size=512,
+                              buffer_pool=BufferPool(memory_budget=8 * 512))
+    fill(table, 500)
+    table.create_index("salary")
+    errors = []
+    stop = threading.Event()
+
+    def reader():
+        try:
+            while not stop.is_set():
+                rows = list(table.scan(lambda t: t.values[2] < 1250))
+                if any(t.get(2) >= 1250 for t in rows):
+                    errors.append("scan returned a non-matching row")
+                for t in table.index_range("salary", 1000, 1010):
+                    if t is None or not 1000 <= t.get(2) <= 1010:
+                        errors.append("index returned a bad row")
+        except Exception as e:  # surfaced below
+            errors.append(repr(e))
+
+    readers = [threading.Thread(target=reader) for _ in range(3)]
+    for r in readers:
+        r.start()
+    try:
+        for i in range(500, 1500):
+            table.insert(DbTuple(s, i, "New", 1000 + i))
+            if i % 3 == 0:
+                table.delete(i - 400)
+    finally:
+        stop.set()
+        for r in readers:
+            r.join()
+    assert not errors
+    assert table.size() == 1500 - len(range(501, 1500, 3))
+    table.close()
@@ -0,0 +1,78 @@
+import random
+from heap_db.schema import Schema
+from heap_db.table import Table
+from heap_db.db_tuple import DbTuple
+from heap_db.select_query import SelectQuery
+from heap_db import select_query
+from heap_db.external_sort import ExternalSorter, is_sorted, sort_key
+
+
+def make_rows(n, seed=1):
+    s = Schema()
+    s.add_int_type("k")
+    s.add_varchar_type("v", 10)
+    rng = random.Random(seed)
+    rows = [DbTuple(s, rng.randrange(50) if i % 9 else None, f"r{i}") for i in range(n)]
+    return s, rows
+
+
+def test_spills_runs_and_merges_in_order(tmp_path):
+    s, rows = make_rows(500)
+    sorter = ExternalSorter(s, sort_key([0]), memory_budget=4000, temp_dir=str(tmp_path))
+    out = list(sorter.sort(rows))
+    assert sorter.runs_written > 1
+    assert len(out) == 500
+    assert is_sorted(out, sort_key([0]))
+    assert all(r.get(0) is None for r in out[-len([r for r in rows if r.get(0) is None]):])
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_small_input_sorts_in_memory():
+    s, rows = make_rows(20)
+    sorter = ExternalSorter(s, sort_key([1, 0]))
+    out = list(sorter.sort(rows))
+    assert sorter.runs_written == 0
+    assert [r.get(1) for r in out] == sorted(r.get(1) for r in rows)
+
+
+def test_many_runs_merge_in_passes(monkeypatch):
+    monkeypatch.setattr("heap_db.external_sort.MAX_MERGE_FAN_IN", 3)
+    s, rows = make_rows(300, seed=5)
+    sorter = ExternalSorter(s, sort_key([0]), memory_budget=2000)
+    out = list(sorter.sort(rows))
+    assert len(out) == 300 and is_sorted(out, sort_key([0]))
+
+
+def _join_inputs():
+    sp = Schema(); sp.add_key_int_type("id"); sp.add_int_type("player_id"); sp.add_int_type("year")
+    ss = Schema(); ss.add_int_type("player_id"); ss.add_int_type("year"); ss.add_int_type("salary")
+    perf, sal = Table(sp), Table(ss)
+    rng = random.Random(3)
+    for i in range(300):
+        perf.insert(DbTuple(sp, i, rng.randrange(20), 2000 + rng.randrange(4)))
+    for i in range(150):
+        sal.insert(DbTuple(ss, rng.randrange(20), 2000 + rng.randrange(4), i))
+    return perf, sal
+
+
+def test_sort_merge_join_matches_hash_join():
+    perf, sal = _join_inputs()
+    expected = sorted(tuple(r) for r in SelectQuery.natural_join(perf, sal))
+    out = SelectQuery.sort_merge_join(perf, sal, memory_budget=3000)
+    assert out.get_schema().size() == 4
+    assert sorted(tuple(r) for r in out) == expected
+
+
+def test_sort_merge_join_skips_sort_for_ordered_input(monkeypatch):
+    s1 = Schema(); s1.add_key_int_type("id"); s1.add_varchar_type("name", 10)
+    s2 = Schema(); s2.add_int_type("id"); s2.add_int_type("score")
+    t1, t2 = Table(s1), Table(s2)
+    for i in range(50):
+        t1.insert(DbTuple(s1, i, f"n{i}"))
+        t2.insert(DbTuple(s2, i, i * i))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("sorted input should not be re-sorted")
+    monkeypatch.setattr(select_query, "ExternalSorter", fail)
+    out = SelectQuery.sort_merge_join(t1, t2)
+    assert [tuple(r) for r in out] == [(i, f"n{i}", i * i) for i in range(50)]
@@ -0,0 +1,102 @@
+import random
+from collections import defaultdict
+import pytest
+from heap_db.schema import Schema
+from heap_db.table import Table
+from heap_db.db_tuple import DbTuple
+from heap_db.heap_file import HeapFileTable
+from heap_db.operators import Limit, Scan
+from heap_db.group_by import Aggregate, GroupByQuery
+from heap_db.query_conditions import EqualsCondition, GreaterThanCondition
+
+
+def make_table():
+    s = Schema()
+    s.add_key_int_type("ID")
+    s.add_varchar_type("dept_name", 15)
+    s.add_int_type("salary")
+    t = Table(s)
+    rows = [(1, "CS", 100), (2, "EE", 200), (3, "CS", 300), (4, "Math", None), (5, "CS", 300), (6, "EE", 50)]
+    for row in rows:
+        t.insert(DbTuple(s, *row))
+    return t
+
+
+AGGS = [Aggregate("count"), Aggregate("count", "salary"), Aggregate("count_distinct", "salary"),
+        Aggregate("sum", "salary"), Aggregate("min", "salary"), Aggregate("max", "salary"),
+        Aggregate("avg", "salary")]
+
+
+def test_group_by_all_aggregates():
+    query = GroupByQuery(["dept_name"], AGGS)
+    result = {row[0]: row[1:] for row in query.stream(make_table())}
+    assert result == {
+        "CS": [3, 3, 2, 700, 100, 300, 700 / 3],
+        "EE": [2, 2, 2, 250, 50, 200, 125.0],
+        "Math": [1, 0, 0, None, None, None, None],
+    }
+
+
+def test_select_returns_table_with_rounded_avg():
+    query = GroupByQuery(["dept_name"], [Aggregate("avg", "salary", alias="avg_sal"), Aggregate("max", "dept_name")])
+    out = query.select(make_table())
+    schema = out.get_schema()
+    assert [schema.get_name(i) for i in range(schema.size())] == ["dept_name", "avg_sal", "max_dept_name"]
+    assert [tuple(r) for r in out] == [("CS", 233, "CS"), ("EE", 125, "EE"), ("Math", None, "Math")]
+
+
+def test_where_and_having():
+    query = GroupByQuery(["dept_name"], [Aggregate("count")],
+                         condition=GreaterThanCondition("salary", 60),
+                         having=GreaterThanCondition("count", 1))
+    assert list(query.stream(make_table())) == [["CS", 3]]
+
+
+def test_global_aggregate_on_empty_input():
+    query = GroupByQuery([], [Aggregate("count"), Aggregate("sum", "salary")],
+                         condition=EqualsCondition("dept_name", "Bio"))
+    assert list(query.stream(make_table())) == [[0, None]]
+
+
+def test_spilling_matches_in_memory(tmp_path):
+    s = Schema()
+    s.add_int_type("customer_id")
+    s.add_int_type("order_id")
+    s.add_int_type("amount")
+    rng = random.Random(7)
+    t = Table(s)
+    expected = defaultdict(lambda: [0, 0, set()])
+    for n in range(5000):
+        cust, amount = rng.randrange(1500), rng.randrange(100)
+        t.insert(DbTuple(s, cust, n, amount))
+        e = expected[cust]
+        e[0] += 1
+        e[1] += amount
+        e[2].add(amount)
+
+    query = GroupByQuery(["customer_id"], [Aggregate("count"), Aggregate("sum", "amount"),
+                                           Aggregate("count_distinct", "amount")],
+                         memory_budget=20_000, temp_dir=str(tmp_path))
+    result = list(query.stream(t))
+    assert query.partitions_spilled > 0
+    assert len(result) == len(expected)
+    assert {r[0]: r[1:] for r in result} == {k: [v[0], v[1], len(v[2])] for k, v in expected.items()}
+
+
+def test_operator_input_and_heap_file(tmp_path):
+    src = make_table()
+    heap = HeapFileTable(str(tmp_path / "inst.tbl"), src.get_schema())
+    heap.insert_many(r for r in src if r.get("salary") is not None)
+    plan = GroupByQuery(["dept_name"], [Aggregate("sum", "salary")]).plan(Limit(Scan(heap), 3))
+    assert [tuple(r) for r in plan] == [("CS", 400), ("EE", 200)]
+    assert "HashAggregate" in plan.explain()
+    heap.close()
+
+
+def test_invalid_aggregates():
+    with pytest.raises(ValueError):
+        Aggregate("median", "salary")
+    with pytest.raises(ValueError):
+        Aggregate("sum")
+    with pytest.raises(ValueError):
+        GroupByQuery(["dept_name"], [Aggregate("sum", "nope")]).select(make_table())
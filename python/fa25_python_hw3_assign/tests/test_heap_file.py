@@ -0,0 +1,129 @@
+import os
+import pytest
+from heap_db.schema import Schema
+from heap_db.db_tuple import DbTuple
+from heap_db.heap_file import HeapFileTable, SlottedPage
+
+
+def make_schema():
+    schema = Schema()
+    schema.add_key_int_type("ID")
+    schema.add_varchar_type("name", 30)
+    schema.add_varchar_type("dept_name", 30)
+    schema.add_int_type("salary")
+    return schema
+
+
+ROWS = [
+    (22222, "Einstein",   "Physics",    95000),
+    (12121, "Wu",         "Finance",    90000),
+    (32343, "El Said",    "History",    60000),
+    (45565, "Katz",       "Comp. Sci.", 75000),
+    (10101, "Srinivasan", "Comp. Sci.", 65000),
+]
+
+
+@pytest.fixture
+def heap_path(tmp_path):
+    return str(tmp_path / "inst.tbl")
+
+
+def test_varchar_round_trip():
+    schema = make_schema()
+    row = DbTuple(schema, *ROWS[0])
+    assert DbTuple.deserialize(schema, row.serialize()) == row
+
+
+def test_slotted_page_insert_delete_reuse():
+    page = SlottedPage(SlottedPage.format(256))
+    a = page.insert(b"a" * 100)
+    b = page.insert(b"b" * 100)
+    assert (a, b) == (0, 1)
+    assert page.insert(b"c" * 100) == -1          # page is full
+
+    assert page.delete(a)
+    assert page.get(a) is None
+    c = page.insert(b"c" * 100)                   # reuses slot 0 after compaction
+    assert c == 0
+    assert bytes(page.get(c)) == b"c" * 100
+    assert bytes(page.get(b)) == b"b" * 100
+
+
+def test_insert_lookup_delete(heap_path):
+    schema = make_schema()
+    table = HeapFileTable(heap_path, schema)
+    for row in ROWS:
+        assert table.insert(DbTuple(schema, *row))
+    assert not table.insert(DbTuple(schema, 22222, "Royce", "Physics", 1))
+    assert table.size() == len(ROWS)
+
+    found = table.lookup_by_key(45565)
+    assert found is not None and found.get("name") == "Katz"
+    assert table.lookup_by_column("dept_name", "Comp. Sci.").size() == 2
+
+    assert table.delete(45565)
+    assert not table.delete(45565)
+    assert table.lookup_by_key(45565) is None
+    assert table.size() == len(ROWS) - 1
+    table.close()
+
+
+def test_reopen_reads_schema_from_header(heap_path):
+    schema = make_schema()
+    with HeapFileTable(heap_path, schema) as table:
+        for row in ROWS:
+            table.insert(DbTuple(schema, *row))
+
+    reopened = HeapFileTable(heap_path)
+    assert repr(reopened.get_schema()) == repr(schema)
+    assert reopened.size() == len(ROWS)
+    assert sorted(tuple(r) for r in reopened) == sorted(ROWS)
+    reopened.close()
+
+
+def test_rows_span_many_pages(heap_path):
+    schema = make_schema()
+    table = HeapFileTable(heap_path, schema, page_size=512)
+    for i in range(200):
+        table.insert(DbTuple(schema, i, f"name{i}", "dept", i * 10))
+    assert table.page_count > 2
+    assert [r.get(0) for r in table] == list(range(200))
+    table.close()
+
+
+def test_schema_mismatch_raises(heap_path):
+    HeapFileTable(heap_path, make_schema()).close()
+    other = Schema()
+    other.add_int_type("x")
+    with pytest.raises(ValueError):
+        HeapFileTable(heap_path, other)
+
+
+def test_read_only_open_leaves_the_log_alone(heap_path):
+    schema = make_schema()
+    with pytest.raises(ValueError):
+        HeapFileTable(heap_path, read_only=True)
+    table = HeapFileTable(heap_path, schema, wal=True)
+    table.insert(DbTuple(schema, 1, "Alice", "CS", 90))
+    table.flush()
+    reader = HeapFileTable(heap_path, read_only=True)
+    assert reader.lookup_by_key(1).get(1) == "Alice" and os.path.exists(heap_path + ".wal")
+    with pytest.raises(ValueError):
+        reader.insert(DbTuple(reader.get_schema(), 2, "Bob", "CS", 80))
+    with pytest.raises(ValueError):
+        reader.delete(1)
+    reader.close()
+    table.close()
+
+
+def test_secondary_index_on_heap_file(heap_path):
+    schema = make_schema()
+    table = HeapFileTable(heap_path, schema)
+    for row in ROWS:
+        table.insert(DbTuple(schema, *row))
+    table.create_index("dept_name")
+    table.insert(DbTuple(schema, 11112, "Hopper", "Comp. Sci.", 99000))
+    assert {t.get("name") for t in table.index_lookup("dept_name", "Comp. Sci.")} == {"Katz", "Srinivasan", "Hopper"}
+    table.delete(45565)
+    assert table.lookup_by_column("dept_name", "Comp. Sci.").size() == 2
+    table.close()
@@ -31,3 +31,29 @@ def test_natural_join_no_common_columns_cartesian():
     s2 = Schema(); s2.add_key_int_type("b"); t2 = Table(s2); t2.insert(DbTuple(s2, 10)); t2.insert(DbTuple(s2, 20))
     out = SelectQuery.natural_join(t1, t2)
     assert len(list(out)) == 2  # 1x2 cartesian
+
+
+def _nested_loop(t1, t2, cols):
+    return [(tuple(r1), tuple(r2)) for r1 in t1 for r2 in t2
+            if all(r1.get_by_name(c) == r2.get_by_name(c) for c in cols)]
+
+
+def _perf_and_salary_tables(n_perf, n_sal):
+    # performances(id, player_id, year) and salaries(player_id, year, salary): join on two columns
+    sp = Schema(); sp.add_key_int_type("id"); sp.add_int_type("player_id"); sp.add_int_type("year")
+    ss = Schema(); ss.add_int_type("player_id"); ss.add_int_type("year"); ss.add_int_type("salary")
+    perf, sal = Table(sp), Table(ss)
+    for i in range(n_perf):
+        perf.insert(DbTuple(sp, i, i % 7, 2000 + i % 3))
+    for i in range(n_sal):
+        sal.insert(DbTuple(ss, i % 5, 2000 + i % 4, 1000 + i))
+    return perf, sal
+
+
+def test_hash_join_composite_key_matches_nested_loop_order():
+    for n_perf, n_sal in ((40, 12), (12, 40)):  # exercise both build sides
+        perf, sal = _perf_and_salary_tables(n_perf, n_sal)
+        out = SelectQuery.natural_join(perf, sal)
+        expected = _nested_loop(perf, sal, ["player_id", "year"])
+        assert out.get_schema().size() == 4
+        assert [tuple(r) for r in out] == [r1 + (r2[2],) for r1, r2 in expected]
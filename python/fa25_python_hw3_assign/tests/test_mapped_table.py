@@ -0,0 +1,82 @@
+import pickle
+import pytest
+from heap_db.schema import Schema
+from heap_db.db_tuple import DbTuple
+from heap_db.heap_file import HeapFileTable
+from heap_db.mapped_table import MappedTable
+from heap_db.parallel_scan import ParallelScan
+from heap_db.select_query import SelectQuery
+from heap_db.query_conditions import BetweenCondition, EqualsCondition
+
+
+def make_schema():
+    s = Schema()
+    s.add_key_int_type("ID")
+    s.add_varchar_type("dept_name", 15)
+    s.add_int_type("salary")
+    return s
+
+
+@pytest.fixture
+def heap_path(tmp_path):
+    path = str(tmp_path / "inst.tbl")
+    s = make_schema()
+    with HeapFileTable(path, s, page_size=512) as table:
+        table.insert_many(DbTuple(s, i, ["CS", "EE", "Math"][i % 3], 1000 + i) for i in range(600))
+        for i in range(0, 600, 5):
+            table.delete(i)
+    return path
+
+
+def test_mapped_table_reads_like_heap_file(heap_path):
+    with HeapFileTable(heap_path) as heap:
+        expected = [t.values for t in heap]
+    with MappedTable(heap_path) as table:
+        assert table.size() == len(expected) == 480
+        assert [t.values for t in table] == expected
+        assert table.lookup_by_key(7).values == [7, "EE", 1007]
+        assert table.lookup_by_key(5) is None
+        predicate = EqualsCondition("dept_name", "Math").compile(table.get_schema())
+        assert [t.get(0) for t in table.scan(predicate)] == [i for i in range(2, 600, 3) if i % 5]
+
+
+def test_mapped_table_indexes_and_planner(heap_path):
+    with MappedTable(heap_path) as table:
+        table.create_index("salary")
+        assert [t.get(0) for t in table.index_range("salary", 1100, 1104)] == [101, 102, 103, 104]
+        assert table.index_lookup("salary", 1105) == []
+        query = SelectQuery(["ID"], BetweenCondition("salary", 1100, 1104))
+        assert "IndexRangeScan" in query.plan(table).explain()
+        assert sorted(t.get(0) for t in query.select(table)) == [101, 102, 103, 104]
+
+
+def test_mapped_table_is_read_only(heap_path):
+    s = make_schema()
+    with MappedTable(heap_path) as table:
+        with pytest.raises(ValueError):
+            table.insert(DbTuple(table.get_schema(), 1000, "CS", 1))
+        with pytest.raises(ValueError):
+            table.delete(7)
+    with pytest.raises(ValueError):
+        MappedTable(heap_path, schema=Schema())
+    with MappedTable(heap_path, schema=s) as table:
+        assert table.get_schema() is s
+
+
+def test_mapped_table_refuses_unrecovered_log(heap_path):
+    with open(heap_path + ".wal", "wb"):
+        pass
+    with pytest.raises(ValueError):
+        MappedTable(heap_path)
+
+
+def test_mapped_table_pickles_and_scans_in_parallel(heap_path, monkeypatch):
+    import heap_db.parallel_scan as parallel_scan
+    monkeypatch.setattr(parallel_scan, "MIN_PARALLEL_ROWS", 100)
+    with MappedTable(heap_path) as table:
+        copy = pickle.loads(pickle.dumps(table))
+        assert [t.values for t in copy] == [t.values for t in table]
+        copy.close()
+        condition = EqualsCondition("dept_name", "EE")
+        serial = [t.values for t in table.scan(condition.compile(table.get_schema()))]
+        assert [t.values for t in ParallelScan(table, condition, workers=2).rows()] == serial
@@ -0,0 +1,137 @@
+import pytest
+from heap_db.schema import Schema
+from heap_db.table import Table
+from heap_db.db_tuple import DbTuple
+from heap_db.heap_file import HeapFileTable
+from heap_db.buffer_pool import BufferPool
+from heap_db.select_query import SelectQuery
+from heap_db.query_conditions import EqualsCondition, NotCondition
+from heap_db.operators import Filter, IndexScan, Join, Limit, Operator, Project, Scan
+
+
+def make_tables():
+    s1 = Schema()
+    s1.add_key_int_type("ID")
+    s1.add_varchar_type("name", 30)
+    s1.add_varchar_type("dept_name", 15)
+    inst = Table(s1)
+    for i in range(100):
+        inst.insert(DbTuple(s1, i, f"name{i}", ["CS", "EE", "Math"][i % 3]))
+
+    s2 = Schema()
+    s2.add_key_varchar_type("dept_name", 15)
+    s2.add_varchar_type("building", 12)
+    dept = Table(s2)
+    dept.insert(DbTuple(s2, "CS", "Gates"))
+    dept.insert(DbTuple(s2, "EE", "Packard"))
+    return inst, dept
+
+
+def test_pipeline_matches_select():
+    inst, _ = make_tables()
+    cond = EqualsCondition("dept_name", "EE")
+    plan = Project(Filter(Scan(inst), cond), ["name"])
+    expected = SelectQuery(["name"], cond).select(inst)
+    assert [tuple(r) for r in plan] == [tuple(r) for r in expected]
+    assert [tuple(r) for r in plan.to_table()] == [tuple(r) for r in expected]
+
+
+def test_limit_stops_scanning_early():
+    inst, _ = make_tables()
+    pulled = []
+
+    def predicate(row):
+        pulled.append(row.values[0])
+        return row.values[2] == "CS"
+
+    rows = list(Limit(Filter(Scan(inst), predicate), 5))
+    assert [r.get("ID") for r in rows] == [0, 3, 6, 9, 12]
+    assert len(pulled) == 13
+    assert list(Limit(Scan(inst), 0)) == []
+
+
+def test_join_matches_natural_join_order():
+    inst, dept = make_tables()
+    plan = Join(Scan(inst), Scan(dept))
+    expected = SelectQuery.natural_join(inst, dept)
+    assert [tuple(r) for r in plan] == [tuple(r) for r in expected]
+    assert plan.get_schema().size() == 4
+
+
+def test_index_scan_and_explain():
+    inst, _ = make_tables()
+    inst.create_index("dept_name")
+    plan = SelectQuery(["ID"], NotCondition(EqualsCondition("ID", 4))).plan(inst, limit=3)
+    assert [r.get(0) for r in plan] == [0, 1, 2]
+    plan = SelectQuery(None, EqualsCondition("dept_name", "Math")).plan(inst)
+    assert "IndexScan(dept_name = 'Math')" in plan.explain()
+    assert len(list(plan)) == 33
+    assert IndexScan.supports(inst, "ID") and not IndexScan.supports(inst, "name")
+
+
+def test_limit_releases_heap_file_pages(tmp_path):
+    inst, _ = make_tables()
+    pool = BufferPool()
+    table = HeapFileTable(str(tmp_path / "inst.tbl"), inst.get_schema(), buffer_pool=pool)
+    table.insert_many(inst)
+    it = iter(Limit(Scan(table), 2))
+    assert len(list(it)) == 2
+    assert all(frame.pin_count == 0 for frame in pool._frames.values())
+    table.close()
+
+
+def make_orders():
+    s = Schema()
+    s.add_key_int_type("order_id")
+    s.add_int_type("customer_id")
+    s.add_int_type("amount")
+    t = Table(s)
+    amounts = [50, None, 20, 50, 90, 10, None, 70]
+    for i, amount in enumerate(amounts):
+        t.insert(DbTuple(s, i, i % 3, amount))
+    return t
+
+
+def test_order_by_asc_desc_and_nulls():
+    from heap_db.operators import OrderBy
+    t = make_orders()
+    asc = [r.get("order_id") for r in OrderBy(Scan(t), ["amount"])]
+    assert asc == [5, 2, 0, 3, 7, 4, 1, 6]          # stable ties, NULLs last
+    desc = [r.get("order_id") for r in OrderBy(Scan(t), [("amount", True)])]
+    assert desc == [1, 6, 4, 7, 0, 3, 2, 5]         # NULLs first
+    mixed = [tuple(r)[1:] for r in OrderBy(Scan(t), ["customer_id", ("amount", True)])]
+    assert mixed == [(0, None), (0, 50), (0, 50), (1, None), (1, 90), (1, 70), (2, 20), (2, 10)]
+
+
+def test_top_k_matches_full_sort_and_spills(tmp_path):
+    from heap_db.operators import OrderBy
+    t = make_orders()
+    full = [tuple(r) for r in OrderBy(Scan(t), [("amount", True), "order_id"])]
+    for k in range(0, 10):
+        assert [tuple(r) for r in OrderBy(Scan(t), [("amount", True), "order_id"], limit=k)] == full[:k]
+    # a budget of one row forces the external sort path
+    spilled = OrderBy(Scan(t), [("amount", True), "order_id"], limit=5, memory_budget=1, temp_dir=str(tmp_path))
+    assert [tuple(r) for r in spilled] == full[:5]
+
+
+def test_select_plan_with_order_by():
+    from heap_db.group_by import Aggregate, GroupByQuery
+    from heap_db.operators import OrderBy
+    t = make_orders()
+    plan = SelectQuery(["order_id"], NotCondition(EqualsCondition("customer_id", 1))).plan(t, limit=2, order_by=["amount"])
+    assert [r.get(0) for r in plan] == [5, 2]
+    assert "TopK(2; amount)" in plan.explain()
+    # top customer by order count
+    counts = GroupByQuery(["customer_id"], [Aggregate("count"), Aggregate("sum", "amount")]).plan(Scan(t))
+    top = list(OrderBy(counts, [("count", True), ("sum_amount", True)], limit=1))
+    assert tuple(top[0]) == (1, 3, 160)
+
+
+def test_operator_subclasses_must_define_rows():
+    class NoRows(Operator):
+        pass
+
+    with pytest.raises(TypeError):
+        Operator()
+    with pytest.raises(TypeError):
+        NoRows()
@@ -0,0 +1,112 @@
+import pickle
+import threading
+import pytest
+import heap_db.parallel_scan as parallel_scan
+from heap_db.schema import Schema
+from heap_db.table import Table
+from heap_db.columnar_table import ColumnarTable
+from heap_db.heap_file import HeapFileTable
+from heap_db.db_tuple import DbTuple
+from heap_db.parallel_scan import ParallelScan
+from heap_db.select_query import SelectQuery
+from heap_db.query_conditions import BetweenCondition, EqualsCondition, GreaterThanCondition, InCondition
+
+
+def make_schema():
+    s = Schema()
+    s.add_key_int_type("ID")
+    s.add_varchar_type("dept_name", 15)
+    s.add_int_type("salary")
+    return s
+
+
+@pytest.fixture(autouse=True)
+def small_tables_go_parallel(monkeypatch):
+    monkeypatch.setattr(parallel_scan, "MIN_PARALLEL_ROWS", 100)
+
+
+@pytest.fixture(params=["table", "columnar", "heap"])
+def table(request, tmp_path):
+    s = make_schema()
+    if request.param == "table":
+        t = Table(s)
+    elif request.param == "columnar":
+        t = ColumnarTable(s)
+    else:
+        t = HeapFileTable(str(tmp_path / "inst.tbl"), s, page_size=1024)
+    t.insert_many(DbTuple(s, i, ["CS", "EE", "Math", "Bio"][i % 4], 1000 + i * 7 % 5000) for i in range(3000))
+    yield t
+    t.close()
+
+
+CONDITIONS = [
+    EqualsCondition("dept_name", "EE"),
+    BetweenCondition("salary", 2000, 2500) & ~InCondition("dept_name", ("CS", "Bio")),
+    GreaterThanCondition("salary", 10 ** 6),
+]
+
+
+@pytest.mark.parametrize("condition", CONDITIONS)
+def test_parallel_scan_matches_serial_scan(table, condition):
+    serial = list(table.scan(condition.compile(table.get_schema())))
+    parallel = list(ParallelScan(table, condition, workers=2).rows())
+    assert [t.values for t in parallel] == [t.values for t in serial]
+
+
+def test_select_with_workers(table):
+    query = SelectQuery(["ID"], BetweenCondition("salary", 1000, 1500))
+    op = query.plan(table, workers=2)
+    assert "ParallelScan(workers=2)" in op.explain()
+    assert [t.values for t in query.select(table, workers=2)] == [t.values for t in query.select(table)]
+
+
+def test_partitions_with_nulls_are_sent_without_fork(monkeypatch):
+    monkeypatch.setattr(parallel_scan, "_can_fork", lambda: False)
+    s = make_schema()
+    t = Table(s)
+    t.insert_many(DbTuple(s, i, "CS" if i % 2 else "EE", None if i % 3 else i) for i in range(300))
+    query = SelectQuery(["ID"], EqualsCondition("dept_name", "EE"))
+    assert [r.values for r in query.select(t, workers=2)] == [r.values for r in query.select(t)]
+
+
+def test_conditions_pickle():
+    condition = CONDITIONS[1]
+    assert pickle.loads(pickle.dumps(condition)) == condition
+
+
+def test_falls_back_to_serial_scan(table):
+    # a condition class defined inside a function cannot be sent to a worker
+    class LocalCondition(EqualsCondition):
+        pass
+
+    condition = LocalCondition("dept_name", "EE")
+    with pytest.raises((pickle.PicklingError, AttributeError)):
+        pickle.dumps(condition)
+    assert len(list(ParallelScan(table, condition, workers=2).rows())) == 750
+
+
+def test_concurrent_scans_of_different_tables():
+    s = make_schema()
+    tables = []
+    for n in (3000, 500):
+        t = Table(s)
+        t.insert_many(DbTuple(s, i, ["CS", "EE"][i % 2], i) for i in range(n))
+        tables.append(t)
+    condition = EqualsCondition("dept_name", "EE")
+    results = {}
+    errors = []
+
+    def scan(n, t):
+        try:
+            for _ in range(3):
+                results[n] = [row.get(0) for row in ParallelScan(t, condition, workers=2).rows()]
+        except Exception as e:  # surfaced below
+            errors.append(repr(e))
+
+    threads = [threading.Thread(target=scan, args=(n, t)) for n, t in enumerate(tables)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    assert not errors
+    assert results == {0: list(range(1, 3000, 2)), 1: list(range(1, 500, 2))}
@@ -0,0 +1,200 @@
+import pytest
+from heap_db.schema import Schema
+from heap_db.table import Table
+from heap_db.columnar_table import ColumnarTable
+from heap_db.heap_file import HeapFileTable
+from heap_db.db_tuple import DbTuple
+from heap_db.select_query import SelectQuery
+from heap_db.planner import access_path
+from heap_db.operators import IndexRangeScan, IndexScan, MultiIndexScan
+from heap_db.query_conditions import (BetweenCondition, EqualsCondition, GreaterThanCondition,
+                                      InCondition, LessThanCondition, OrCondition)
+
+
+def make_schema():
+    s = Schema()
+    s.add_key_int_type("ID")
+    s.add_varchar_type("dept_name", 15)
+    s.add_int_type("salary")
+    return s
+
+
+def fill(table):
+    s = table.get_schema()
+    for i in range(200):
+        table.insert(DbTuple(s, i, ["CS", "EE", "Math", "Bio"][i % 4], 30000 + 250 * i))
+    return table
+
+
+@pytest.fixture(params=["table", "columnar", "heap"])
+def table(request, tmp_path):
+    s = make_schema()
+    if request.param == "table":
+        t = Table(s)
+    elif request.param == "columnar":
+        t = ColumnarTable(s)
+    else:
+        t = HeapFileTable(str(tmp_path / "inst.tbl"), s)
+    yield fill(t)
+    t.close()
+
+
+CONDITIONS = [
+    LessThanCondition("salary", 35000),
+    GreaterThanCondition("salary", 75000, inclusive=True),
+    BetweenCondition("salary", 40000, 41000),
+    GreaterThanCondition("salary", 40000) & LessThanCondition("salary", 42000, inclusive=True),
+    InCondition("dept_name", ["EE", "Bio"]),
+    InCondition("ID", [5, 7, 500]),
+    EqualsCondition("dept_name", "CS") & LessThanCondition("salary", 33000),
+    OrCondition(LessThanCondition("salary", 31000), EqualsCondition("ID", 150)),
+]
+
+
+@pytest.mark.parametrize("cond", CONDITIONS)
+def test_indexed_results_match_scan(table, cond):
+    query = SelectQuery(None, cond)
+    scanned = sorted(tuple(r) for r in query.select(table))
+    table.create_index("salary")
+    table.create_index("dept_name")
+    assert sorted(tuple(r) for r in query.select(table)) == scanned
+
+
+def test_access_path_choice():
+    t = fill(Table(make_schema()))
+    assert access_path(t, LessThanCondition("salary", 1)) is None
+    t.create_index("salary")
+    t.create_index("dept_name")
+
+    path = access_path(t, GreaterThanCondition("salary", 40000) & LessThanCondition("salary", 42000))
+    assert isinstance(path, IndexRangeScan)
+    assert (path.low, path.high, path.low_inclusive, path.high_inclusive) == (40000, 42000, False, False)
+    assert [r.get("salary") for r in path] == [40250, 40500, 40750, 41000, 41250, 41500, 41750]
+
+    path = access_path(t, BetweenCondition("salary", 1, 10 ** 6) & InCondition("dept_name", ["CS"]))
+    assert isinstance(path, MultiIndexScan)
+    assert isinstance(access_path(t, InCondition("dept_name", ["CS"]) & EqualsCondition("ID", 3)), IndexScan)
+    assert access_path(t, OrCondition(LessThanCondition("salary", 1), EqualsCondition("ID", 1))) is None
+    assert "IndexRangeScan" in SelectQuery(["ID"], LessThanCondition("salary", 31000)).plan(t).explain()
+
+
+def test_range_on_mismatched_type_matches_nothing():
+    t = fill(Table(make_schema()))
+    t.create_index("salary")
+    assert t.index_range("salary", "a", "b") == []
+    assert t.index_range("name", 1, 2) is None
+
+
+# ----- cost-based planning -----
+
+from heap_db.planner import LogicalQuery, Planner, TableStats
+from heap_db.operators import IndexNestedLoopJoin, Join, MergeJoin
+
+
+def make_baseball():
+    ps = Schema()
+    ps.add_key_int_type("player_id")
+    ps.add_varchar_type("last_name", 20)
+    players = Table(ps)
+    for i in range(3000):
+        players.insert(DbTuple(ps, i, f"Player{i}"))
+
+    fs = Schema()
+    fs.add_key_int_type("perf_id")
+    fs.add_int_type("player_id")
+    fs.add_int_type("team_id")
+    fs.add_int_type("HR")
+    perfs = Table(fs)
+    for i in range(3000):
+        perfs.insert(DbTuple(fs, i, i % 300, i % 30, i % 50))
+
+    ts = Schema()
+    ts.add_key_int_type("team_id")
+    ts.add_varchar_type("team_name", 20)
+    teams = Table(ts)
+    for i in range(30):
+        teams.insert(DbTuple(ts, i, f"Team{i}"))
+    return players, perfs, teams
+
+
+def reference(tables, cond=None):
+    out = tables[0]
+    for t in tables[1:]:
+        out = SelectQuery.natural_join(out, t)
+    if cond is not None:
+        out = SelectQuery(None, cond).select(out)
+    return out
+
+
+def rows_by_name(table_or_plan, names):
+    schema = table_or_plan.get_schema()
+    idx = [schema.get_column_index(n) for n in names]
+    return sorted(tuple(r.values[i] for i in idx) for r in table_or_plan)
+
+
+def test_three_way_join_matches_reference_in_any_argument_order():
+    players, perfs, teams = make_baseball()
+    cond = EqualsCondition("team_name", "Team7") & GreaterThanCondition("HR", 40)
+    expected = reference([players, perfs, teams], cond)
+    names = [expected.get_schema().get_name(i) for i in range(expected.get_schema().size())]
+    for order in ([players, perfs, teams], [teams, players, perfs], [perfs, teams, players]):
+        plan = Planner().plan(LogicalQuery(order, cond))
+        assert rows_by_name(plan, names) == rows_by_name(expected, names)
+    plan = Planner().plan(LogicalQuery([players, perfs, teams], cond))
+    schema = plan.get_schema()
+    assert [schema.get_name(i) for i in range(schema.size())] == names
+
+
+def test_selective_table_drives_index_nested_loop_join():
+    players, perfs, teams = make_baseball()
+    perfs.create_index("team_id")
+    plan = Planner().plan(LogicalQuery([players, perfs, teams], EqualsCondition("team_name", "Team3"),
+                                       columns=["last_name", "HR"]))
+    text = plan.explain()
+    # teams is filtered to one row, so it is read first and probes perfs by team_id,
+    # then players by its primary key; no table is hashed in full
+    assert "IndexNestedLoopJoin(team_id)" in text and "IndexNestedLoopJoin(player_id)" in text
+    assert len(list(plan)) == 100
+
+
+def test_hash_join_builds_on_smaller_input_and_merge_join_when_over_budget():
+    players, perfs, teams = make_baseball()
+    plan = Planner().plan(LogicalQuery([perfs, teams]))
+    assert isinstance(plan, Join) or isinstance(plan.child, Join)
+    join = plan if isinstance(plan, Join) else plan.child
+    assert join.right.get_schema() is teams.get_schema()
+
+    # without an index on the join column and with no memory for a hash table
+    s = Schema()
+    s.add_int_type("player_id")
+    s.add_varchar_type("nickname", 20)
+    nicknames = Table(s)
+    for i in range(0, 300, 2):
+        nicknames.insert(DbTuple(s, i, f"Nick{i}"))
+    plan = Planner(memory_budget=1).plan(LogicalQuery([perfs, nicknames]))
+    assert "MergeJoin" in plan.explain()
+    assert rows_by_name(plan, ["perf_id", "nickname"]) == rows_by_name(reference([perfs, nicknames]), ["perf_id", "nickname"])
+
+
+def test_stats_change_access_path():
+    t = fill(Table(make_schema()))
+    t.create_index("dept_name")
+    cond = EqualsCondition("dept_name", "CS")
+    assert "IndexScan" in Planner().plan(LogicalQuery([t], cond)).explain()
+    # with only two distinct departments an index read costs more than a scan
+    stats = {t: TableStats(t.size(), {"dept_name": 2})}
+    assert "IndexScan" not in Planner(stats).plan(LogicalQuery([t], cond)).explain()
+
+
+def test_order_limit_and_many_tables():
+    schemas, tables = [], []
+    for n in range(10):
+        s = Schema()
+        s.add_key_int_type(f"k{n}")
+        s.add_int_type(f"k{n + 1}")
+        t = Table(s)
+        for i in range(20):
+            t.insert(DbTuple(s, i, (i + 1) % 20))
+        tables.append(t)
+    plan = Planner().plan(LogicalQuery(tables, order_by=[("k0", True)], limit=3, columns=["k0", "k10"]))
+    assert [tuple(r) for r in plan] == [(19, 9), (18, 8), (17, 7)]
@@ -0,0 +1,72 @@
+import pytest
+from heap_db.schema import Schema
+from heap_db.db_tuple import DbTuple
+
+
+def make_schema():
+    s = Schema()
+    s.add_key_int_type("id")
+    s.add_int_type("age")
+    s.add_varchar_type("name", 20)
+    s.add_varchar_type("dept", 10)
+    s.add_int_type("salary")
+    return s
+
+
+def legacy_serialize(row):
+    """Per-column encoding via the column types, as DbTuple.serialize used to do."""
+    buf = bytearray()
+    for i in range(row.schema.size()):
+        row.schema.get_type(i).write_value(row.values[i], buf)
+    return bytes(buf)
+
+
+def test_codec_is_cached_on_schema():
+    s = make_schema()
+    assert s.get_codec() is s.get_codec()
+    s.add_int_type("extra")
+    assert s.get_codec().schema_size == 6
+
+
+def test_byte_format_unchanged():
+    s = make_schema()
+    row = DbTuple(s, 7, 41, "Zoë", "CS", 90000)
+    assert row.serialize() == legacy_serialize(row)
+    assert DbTuple.deserialize(s, row.serialize()) == row
+
+
+def test_serialize_many_round_trip():
+    s = make_schema()
+    rows = [DbTuple(s, i, 20 + i, f"name{i}", "EE" if i % 2 else "", i * 100) for i in range(50)]
+    codec = s.get_codec()
+    buf, offsets = codec.serialize_many(rows)
+    assert len(offsets) == 51 and offsets[-1] == len(buf)
+    assert bytes(buf[offsets[3]:offsets[4]]) == rows[3].serialize()
+    assert codec.deserialize_many(buf, offsets) == rows
+    assert codec.deserialize_many(bytes(buf)) == rows
+
+
+def test_all_int_schema_uses_fixed_width_buffer():
+    s = Schema()
+    s.add_int_type("a")
+    s.add_int_type("b")
+    codec = s.get_codec()
+    buf, offsets = codec.serialize_many([[1, 2], [3, -4]])
+    assert codec.all_fixed and len(buf) == 16
+    assert [tuple(r) for r in codec.deserialize_many(buf, offsets)] == [(1, 2), (3, -4)]
+
+
+def test_null_int_cannot_be_serialized():
+    s = make_schema()
+    row = DbTuple(s, 1, None, "a", "b", 1)
+    with pytest.raises(ValueError, match="NULL at column 1"):
+        row.serialize()
+
+
+def test_deserialize_rejects_bad_payloads():
+    s = make_schema()
+    data = DbTuple(s, 1, 2, "abc", "d", 3).serialize()
+    with pytest.raises(ValueError):
+        DbTuple.deserialize(s, data[:-2])
+    with pytest.raises(ValueError, match="Extra"):
+        DbTuple.deserialize(s, data + b"\x00")
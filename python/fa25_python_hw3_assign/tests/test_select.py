@@ -31,3 +31,23 @@ def test_projection_schema_and_values():
     assert out.get_schema().get_name(0) == "name"
     names = [r.get_by_name("name") for r in out]
     assert set(names) == {"Ada", "Grace"}
+
+
+def test_select_equals_uses_secondary_index():
+    from heap_db.query_conditions import EqualsCondition
+    tbl = make_people_table()
+    for i in range(3, 100):
+        tbl.insert(DbTuple(tbl.get_schema(), i, f"P{i}", 100 + i))
+    tbl.insert(DbTuple(tbl.get_schema(), 100, "Alan", 28))
+    tbl.create_index("age")
+    query = SelectQuery(["name"], EqualsCondition("age", 28))
+    assert "IndexScan(age = 28)" in query.plan(tbl).explain()
+    out = query.select(tbl)
+    assert {r.get_by_name("name") for r in out} == {"Grace", "Alan"}
+
+
+def test_select_equals_on_primary_key():
+    from heap_db.query_conditions import EqualsCondition
+    tbl = make_people_table()
+    out = SelectQuery(None, EqualsCondition("id", 2)).select(tbl)
+    assert [r.get_by_name("name") for r in out] == ["Grace"]
@@ -0,0 +1,134 @@
+import pytest
+from heap_db.schema import Schema
+from heap_db.table import Table
+from heap_db.columnar_table import ColumnarTable
+from heap_db.heap_file import HeapFileTable
+from heap_db.db_tuple import DbTuple
+from heap_db.planner import Planner, TableStats, selectivity
+from heap_db.statistics import AnalyzedStats, HyperLogLog, analyze
+from heap_db.query_conditions import BetweenCondition, EqualsCondition, LessThanCondition
+
+
+def make_schema():
+    s = Schema()
+    s.add_key_int_type("ID")
+    s.add_varchar_type("dept_name", 15)
+    s.add_int_type("salary")
+    return s
+
+
+def fill(table, n=2000):
+    s = table.get_schema()
+    rows = []
+    for i in range(n):
+        # CS is half the table; the other departments share the rest
+        dept = "CS" if i % 2 == 0 else ["EE", "Math", "Bio", "Art", "Law"][i % 5]
+        rows.append(DbTuple(s, i, dept, 1000 + i))
+    table.insert_many(rows)
+    return table
+
+
+@pytest.fixture(params=["table", "columnar", "heap"])
+def table(request, tmp_path):
+    s = make_schema()
+    if request.param == "table":
+        t = Table(s)
+    elif request.param == "columnar":
+        t = ColumnarTable(s)
+    else:
+        t = HeapFileTable(str(tmp_path / "inst.tbl"), s)
+    yield fill(t)
+    t.close()
+
+
+def test_hyperloglog_estimate_is_close():
+    sketch = HyperLogLog()
+    for i in range(100000):
+        sketch.add(i)
+    assert abs(sketch.estimate() - 100000) / 100000 < 0.05
+    other = HyperLogLog()
+    for i in range(50000, 150000):
+        other.add(i)
+    sketch.merge(other)
+    assert abs(sketch.estimate() - 150000) / 150000 < 0.05
+
+
+def test_analyze_column_statistics(table):
+    stats = table.analyze()
+    assert table.statistics is stats
+    assert stats.row_count == 2000
+    salary = stats.columns["salary"]
+    assert (salary.min, salary.max, salary.null_count) == (1000, 2999, 0)
+    assert salary.ndv == 2000
+    assert salary.histogram[0] == 1000 and salary.histogram[-1] == 2999
+    dept = stats.columns["dept_name"]
+    assert dept.ndv == 6
+    assert dept.mcv[0][0] == "CS" and dept.mcv[0][1] == pytest.approx(0.5)
+    assert dept.histogram == []  # histograms are for INT columns only
+
+
+def test_sketch_takes_over_for_many_distinct_values():
+    s = make_schema()
+    t = Table(s)
+    t.insert_many(DbTuple(s, i, "CS", i) for i in range(20000))
+    stats = analyze(t, sample_size=1000)
+    assert abs(stats.columns["ID"].ndv - 20000) / 20000 < 0.05
+    # histogram and MCVs come from the sample, but min/max see every row
+    assert stats.columns["salary"].min == 0 and stats.columns["salary"].max == 19999
+
+
+def test_null_counts():
+    s = make_schema()
+    t = Table(s)
+    t.insert_many(DbTuple(s, i, "CS", None if i % 4 else i) for i in range(100))
+    salary = t.analyze().columns["salary"]
+    assert salary.null_count == 75
+    assert salary.eq_selectivity(None) == pytest.approx(0.75)
+    assert (salary.min, salary.max, salary.ndv) == (0, 96, 25)
+
+
+def test_selectivity_uses_histogram_and_mcv(table):
+    stats = table.analyze()
+    assert selectivity(LessThanCondition("salary", 1500), stats) == pytest.approx(0.25, abs=0.03)
+    assert selectivity(BetweenCondition("salary", 1000, 1199), stats) == pytest.approx(0.1, abs=0.03)
+    assert selectivity(EqualsCondition("salary", 5000), stats) == 0.0  # above max
+    assert selectivity(EqualsCondition("dept_name", "CS"), stats) == pytest.approx(0.5)
+    assert selectivity(EqualsCondition("dept_name", "EE"), stats) == pytest.approx(0.1, abs=0.03)
+    # without ANALYZE the planner falls back to fixed guesses
+    assert selectivity(LessThanCondition("salary", 1500), TableStats.basic(table)) == pytest.approx(1 / 3)
+
+
+def test_statistics_round_trip():
+    s = make_schema()
+    stats = fill(Table(s)).analyze()
+    again = AnalyzedStats.from_json(stats.to_json())
+    assert again.row_count == stats.row_count
+    assert again.columns == stats.columns
+
+
+def test_heap_file_persists_statistics(tmp_path):
+    path = str(tmp_path / "inst.tbl")
+    t = fill(HeapFileTable(path, make_schema()))
+    t.analyze()
+    t.close()
+    reopened = HeapFileTable(path)
+    try:
+        assert reopened.statistics is not None
+        assert reopened.statistics.columns["salary"].max == 2999
+        assert Planner().stats_for(reopened) is reopened.statistics
+    finally:
+        reopened.close()
+
+
+def test_planner_uses_analyzed_statistics():
+    s = make_schema()
+    t = fill(Table(s))
+    t.create_index("salary")
+    query = lambda: Planner().access(t, LessThanCondition("salary", 1010))
+    # without statistics a one-sided range is guessed at 1/3 of the table
+    assert query().estimated_rows == pytest.approx(2000 / 3, abs=1)
+    t.analyze()
+    # the histogram shows only ten rows qualify
+    plan = query()
+    assert "IndexRangeScan" in plan.explain()
+    assert plan.estimated_rows == pytest.approx(10, abs=5)
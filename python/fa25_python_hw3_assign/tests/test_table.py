@@ -87,4 +87,145 @@ def test_schema_without_key():
     
     # For non-key lookups, lookup_by_column returns a Table.
     result = table.lookup_by_column("cola", 5)
-    assert result.size() == 2, "Lookup should return both tuples."
\ No newline at end of file
+    assert result.size() == 2, "Lookup should return both tuples."
+
+def test_delete_then_reinsert_same_key(table_instance):
+    """Deleting a key frees it for a new insert and keeps the other rows in order."""
+    table, old_tup, _ = table_instance
+    order_before = [t.get_int(0) for t in table if t.get_int(0) != 22222]
+    assert table.delete(22222)
+    assert table.lookup_by_key(22222) is None
+    assert not table.delete(22222)
+    assert [t.get_int(0) for t in table] == order_before
+    assert table.insert(old_tup)
+    assert table.lookup_by_key(22222) is old_tup
+    assert table.size() == 7
+
+
+def test_key_index_survives_compaction():
+    """Many deletes trigger compaction; lookups must still find the survivors."""
+    schema = Schema()
+    schema.add_key_int_type("id")
+    schema.add_int_type("v")
+    table = Table(schema)
+    for i in range(1000):
+        assert table.insert(DbTuple(schema, i, i * 2))
+    for i in range(0, 1000, 3):
+        assert table.delete(i)
+    assert table.size() == 1000 - len(range(0, 1000, 3))
+    for i in range(1000):
+        found = table.lookup_by_key(i)
+        assert (found is None) == (i % 3 == 0)
+        if found is not None:
+            assert found.get_int(1) == i * 2
+    assert table.lookup_by_column("id", 4).size() == 1
+
+
+def test_secondary_index_lookup(table_instance):
+    """lookup_by_column answers from the B+tree once an index exists and tracks changes."""
+    table, _, new_tup = table_instance
+    table.create_index("dept_name")
+    assert table.has_index("dept_name")
+    assert table.lookup_by_column("dept_name", "Comp. Sci.").size() == 2
+    table.insert(DbTuple(table.get_schema(), 11112, "Hopper", "Comp. Sci.", 99000))
+    assert table.lookup_by_column("dept_name", "Comp. Sci.").size() == 3
+    table.delete(45565)
+    assert {t.get("name") for t in table.index_lookup("dept_name", "Comp. Sci.")} == {"Srinivasan", "Hopper"}
+    assert table.index_lookup("salary", 1) is None
+
+
+def test_create_index_on_missing_column_raises(table_instance):
+    table, _, _ = table_instance
+    with pytest.raises(ValueError):
+        table.create_index("nope")
+
+
+def make_counter_table(n):
+    schema = Schema()
+    schema.add_key_int_type("id")
+    schema.add_int_type("v")
+    table = Table(schema)
+    table.insert_many(DbTuple(schema, i, i) for i in range(n))
+    return table
+
+
+def test_iteration_reads_a_snapshot():
+    """Rows deleted or inserted while iterating do not change what the iterator yields."""
+    table = make_counter_table(100)
+    schema = table.get_schema()
+    seen = []
+    for t in table:
+        seen.append(t.get_int(0))
+        if t.get_int(0) == 10:
+            for i in range(50, 100):
+                table.delete(i)
+            table.insert(DbTuple(schema, 500, 0))
+    assert seen == list(range(100))
+    assert sorted(t.get_int(0) for t in table) == list(range(50)) + [500]
+
+
+def test_lookup_does_not_see_rows_of_an_unfinished_insert_many():
+    table = make_counter_table(10)
+    schema = table.get_schema()
+    seen = []
+
+    def rows():
+        for i in range(10, 20):
+            # lookup_by_key takes no lock, so it runs while insert_many holds the write lock
+            seen.append(table.lookup_by_key(i - 1) is not None)
+            yield DbTuple(schema, i, 0)
+
+    assert table.insert_many(rows()) == 10
+    assert seen == [True] + [False] * 9  # only key 9 was committed before the batch
+    assert all(table.lookup_by_key(i) is not None for i in range(20))
+
+
+def test_snapshot_survives_vacuum():
+    table = make_counter_table(100)
+    snap = table.snapshot()
+    for i in range(0, 100, 2):
+        table.delete(i)
+    assert table.vacuum() == 50
+    assert table.vacuum() == 0
+    assert snap.size() == 100 and len(list(snap)) == 100
+    assert table.size() == 50 and [t.get_int(0) for t in table] == list(range(1, 100, 2))
+    assert table.lookup_by_key(51).get_int(1) == 51
+    assert [t.get_int(0) for t in snap.scan(lambda t: t.values[0] < 3)] == [0, 1, 2]
+
+
+def test_concurrent_scans_see_consistent_snapshots():
+    """Readers scan while a writer inserts batches and deletes rows under a background vacuum."""
+    import threading
+    table = make_counter_table(200)
+    schema = table.get_schema()
+    table.start_vacuum(interval=0.001)
+    errors = []
+    stop = threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            snap = table.snapshot()
+            ids = [t.get_int(0) for t in snap]
+            if len(ids) != snap.size() or len(set(ids)) != len(ids):
+                errors.append("snapshot does not match its size")
+            newest = max(ids) // 10 * 10
+            if not set(range(newest, newest + 10)) <= set(ids):
+                errors.append("saw part of an insert_many batch")
+
+    readers = [threading.Thread(target=reader) for _ in range(2)]
+    for r in readers:
+        r.start()
+    try:
+        for batch in range(200):
+            first = 200 + 10 * batch
+            table.insert_many(DbTuple(schema, i, i) for i in range(first, first + 10))
+            for i in range(first - 200, first - 190):
+                assert table.delete(i)
+    finally:
+        stop.set()
+        for r in readers:
+            r.join()
+        table.close()
+    assert not errors
+    assert table.size() == 200
+    assert sorted(t.get_int(0) for t in table) == list(range(2000, 2200))
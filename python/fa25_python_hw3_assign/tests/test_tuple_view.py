@@ -0,0 +1,59 @@
+import pytest
+from heap_db.schema import Schema
+from heap_db.db_tuple import DbTuple
+from heap_db.tuple_view import DbTupleView
+from heap_db.heap_file import HeapFileTable
+from heap_db.query_conditions import EqualsCondition
+
+
+def make_schema():
+    s = Schema()
+    s.add_key_int_type("id")
+    s.add_varchar_type("first_name", 20)
+    s.add_varchar_type("last_name", 20)
+    s.add_int_type("birth_year")
+    s.add_varchar_type("birth_city", 30)
+    return s
+
+
+def test_view_decodes_only_accessed_columns():
+    s = make_schema()
+    row = DbTuple(s, 2, "Hank", "Aaron", 1934, "Mobile")
+    view = DbTupleView(s, row.serialize())
+    assert view.get("birth_year") == 1934
+    assert view.decoded_columns() == 1
+    assert view[4] == "Mobile"
+    assert view.get_by_name("last_name") == "Aaron"
+    assert view.get_key() == 2
+    assert view.decoded_columns() == 4
+    assert view.to_tuple() == row
+    assert list(view) == list(row)
+
+
+def test_view_to_tuple_without_access():
+    s = make_schema()
+    row = DbTuple(s, 3, "Tommie", "Zoë", 1939, "")
+    assert DbTupleView(s, memoryview(row.serialize())).to_tuple() == row
+
+
+def test_view_errors_match_db_tuple():
+    s = make_schema()
+    view = DbTupleView(s, DbTuple(s, 1, "a", "b", 2, "c").serialize())
+    with pytest.raises(ValueError):
+        view.get("nope")
+    with pytest.raises(ValueError):
+        view.get(9)
+    with pytest.raises(ValueError):
+        view.get_int(1)
+
+
+def test_compiled_predicate_runs_on_views(tmp_path):
+    s = make_schema()
+    table = HeapFileTable(str(tmp_path / "players.tbl"), s)
+    for i in range(100):
+        table.insert(DbTuple(s, i, f"f{i}", f"l{i}", 1900 + i % 10, "Mobile"))
+    pred = EqualsCondition("birth_year", 1903).compile(s)
+    out = list(table.scan(pred))
+    assert [r.get(0) for r in out] == list(range(3, 100, 10))
+    assert all(isinstance(r, DbTuple) for r in out)
+    table.close()
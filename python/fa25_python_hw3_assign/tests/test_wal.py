@@ -0,0 +1,190 @@
+import os
+import pytest
+from heap_db.schema import Schema
+from heap_db.db_tuple import DbTuple
+from heap_db.heap_file import HeapFileTable, SlottedPage
+from heap_db.buffer_pool import BufferPool
+from heap_db.wal import OP_DELETE, OP_INSERT, WriteAheadLog, read_log
+
+
+def make_schema():
+    s = Schema()
+    s.add_key_int_type("ID")
+    s.add_varchar_type("name", 20)
+    s.add_int_type("age")
+    return s
+
+
+def crash(table):
+    """
+    Simulate a crash: pages still in the buffer pool and the header are never
+    written, and log records not yet fsynced are lost.
+    """
+    wal = table.wal
+    if wal is not None:
+        wal._closed.set()  # stop the flusher without its final sync
+        if wal._flusher is not None:
+            wal._flusher.join()
+        wal._buffer.clear()
+        wal.file.close()
+    table.file.close()
+
+
+def rows_of(table):
+    return sorted((t.get(0), t.get(1), t.get(2)) for t in table)
+
+
+def test_log_round_trip(tmp_path):
+    path = str(tmp_path / "t.wal")
+    log = WriteAheadLog(path)
+    log.append(OP_INSERT, (1, 0), b"abc")
+    log.append(OP_DELETE, (1, 0))
+    log.commit()
+    assert log.syncs == 1
+    log.close()
+    assert list(read_log(path)) == [(OP_INSERT, (1, 0), b"abc"), (OP_DELETE, (1, 0), None)]
+
+
+def test_torn_tail_is_ignored(tmp_path):
+    path = str(tmp_path / "t.wal")
+    log = WriteAheadLog(path)
+    log.append(OP_INSERT, (1, 0), b"abc")
+    log.append(OP_INSERT, (1, 1), b"defg")
+    log.close()
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 2)
+    assert list(read_log(path)) == [(OP_INSERT, (1, 0), b"abc")]
+
+
+def test_slotted_page_put():
+    page = SlottedPage(SlottedPage.format(256))
+    assert page.put(3, b"xyz")
+    assert page.slot_count() == 4 and page.get(0) is None
+    assert bytes(page.get(3)) == b"xyz"
+    assert page.put(3, b"replaced")
+    assert bytes(page.get(3)) == b"replaced" and page.live_count() == 1
+    assert not page.put(0, b"x" * 300)
+
+
+def test_committed_rows_survive_crash(tmp_path):
+    path = str(tmp_path / "p.tbl")
+    s = make_schema()
+    t = HeapFileTable(path, s, buffer_pool=BufferPool(), wal=True)
+    t.insert_many(DbTuple(s, i, f"P{i}", 20 + i % 30) for i in range(300))
+    t.insert(DbTuple(s, 1000, "late", 99))
+    for i in range(0, 300, 3):
+        t.delete(i)
+    expected = rows_of(t)
+    crash(t)
+
+    reopened = HeapFileTable(path, buffer_pool=BufferPool())
+    try:
+        assert reopened.size() == len(expected) == 201
+        assert rows_of(reopened) == expected
+        assert reopened.lookup_by_key(1000).get(1) == "late"
+        assert not os.path.exists(path + ".wal")
+    finally:
+        reopened.close()
+
+
+def test_recovery_with_pages_partly_written(tmp_path):
+    # a tiny pool evicts (and writes) pages mid-run, so disk holds a mix of old and new pages
+    path = str(tmp_path / "p.tbl")
+    s = make_schema()
+    t = HeapFileTable(path, s, page_size=512, buffer_pool=BufferPool(memory_budget=2048), wal=True)
+    t.insert_many(DbTuple(s, i, f"P{i}", i) for i in range(200))
+    t.flush()  # checkpoint: the log starts empty from here
+    for i in range(0, 200, 2):
+        t.delete(i)
+    t.insert_many(DbTuple(s, i, f"Q{i}", i) for i in range(200, 400))
+    expected = rows_of(t)
+    crash(t)
+
+    reopened = HeapFileTable(path, wal=True, buffer_pool=BufferPool())
+    try:
+        assert rows_of(reopened) == expected
+        assert reopened.size() == len(expected)
+        # the recovered table keeps working
+        assert reopened.insert(DbTuple(reopened.get_schema(), 0, "again", 1))
+    finally:
+        reopened.close()
+
+
+def test_records_are_logged_while_their_page_is_pinned(tmp_path):
+    # an unpinned dirty page may be evicted by another thread at any moment, so it must already be logged
+    path = str(tmp_path / "p.tbl")
+    s = make_schema()
+    pool = BufferPool()
+    t = HeapFileTable(path, s, buffer_pool=pool, wal=True)
+    pinned = []
+    append = t.wal.append
+
+    def checked_append(op, rid, record=b""):
+        pinned.append(pool._frames[(t, rid[0])].pin_count > 0)
+        return append(op, rid, record)
+
+    t.wal.append = checked_append
+    for i in range(100):
+        t.insert(DbTuple(s, i, f"P{i}", i))
+    for i in range(0, 100, 5):
+        t.delete(i)
+    assert len(pinned) == 120 and all(pinned)
+    t.close()
+
+
+def test_group_commit_batches_fsyncs(tmp_path):
+    path = str(tmp_path / "p.tbl")
+    s = make_schema()
+    t = HeapFileTable(path, s, buffer_pool=BufferPool(), wal=True, flush_interval=60)
+    for i in range(500):
+        t.insert(DbTuple(s, i, f"P{i}", i))
+    assert t.wal.syncs == 0  # commits wait for the next group flush
+    t.sync()
+    assert t.wal.syncs == 1
+    crash(t)
+    reopened = HeapFileTable(path, buffer_pool=BufferPool())
+    try:
+        assert reopened.size() == 500
+    finally:
+        reopened.close()
+
+
+def test_unsynced_log_tail_is_lost(tmp_path):
+    path = str(tmp_path / "p.tbl")
+    s = make_schema()
+    t = HeapFileTable(path, s, buffer_pool=BufferPool(), wal=True, flush_interval=60)
+    t.insert_many(DbTuple(s, i, f"P{i}", i) for i in range(100))
+    t.sync()
+    t.insert_many(DbTuple(s, i, f"P{i}", i) for i in range(100, 200))
+    t.delete(5)
+    assert t.wal.pending()
+    crash(t)
+    reopened = HeapFileTable(path, buffer_pool=BufferPool())
+    try:
+        assert [row[0] for row in rows_of(reopened)] == list(range(100))
+    finally:
+        reopened.close()
+
+
+def test_dirty_pages_evicted_before_commit(tmp_path):
+    # a tiny pool writes pages back during insert_many, before the batch commits; each
+    # write-back must force the log first, so recovery finds every row that reached disk
+    path = str(tmp_path / "p.tbl")
+    s = make_schema()
+    t = HeapFileTable(path, s, page_size=512, buffer_pool=BufferPool(memory_budget=2048),
+                      wal=True, flush_interval=60)
+    t.insert_many(DbTuple(s, i, f"P{i}", i) for i in range(400))
+    assert t.wal.syncs > 0 and t.wal.pending()  # forced by evictions; the tail is still unsynced
+    crash(t)
+    reopened = HeapFileTable(path, buffer_pool=BufferPool())
+    try:
+        ids = [row[0] for row in rows_of(reopened)]
+        assert 0 < len(ids) < 400 and ids == list(range(len(ids)))
+        assert reopened.size() == len(ids)
+    finally:
+        reopened.close()
+
+
+def test_flush_interval_must_not_be_negative(tmp_path):
+    with pytest.raises(ValueError):
+        WriteAheadLog(str(tmp_path / "t.wal"), flush_interval=-1)